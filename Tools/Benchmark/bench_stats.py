@@ -0,0 +1,115 @@
+"""
+CatTalk2D 벤치마크 통계 유틸리티
+- 지연 시간 백분위수/표준편차
+- 비율(한국어 응답률 등)의 신뢰구간
+"""
+
+import math
+from typing import Optional
+
+
+def percentile(sorted_values: list[float], q: float) -> Optional[float]:
+    """
+    정렬된 값 목록에서 q 백분위수 (0~100, 선형 보간)
+    - 여러 백분위수를 구할 때 정렬을 한 번만 하도록 정렬된 입력을 받음
+    """
+    if not sorted_values:
+        return None
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+
+    pos = (len(sorted_values) - 1) * q / 100
+    lower = math.floor(pos)
+    upper = math.ceil(pos)
+    if lower == upper:
+        return sorted_values[lower]
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (pos - lower)
+
+
+def latency_stats(values: list[float]) -> dict:
+    """지연 시간 요약: p50/p90/p99/max/stddev (한 번 정렬 + 한 번 순회)"""
+    values = sorted(v for v in values if v is not None)
+    if not values:
+        return {"p50": None, "p90": None, "p99": None, "max": None, "stddev": None}
+
+    n = len(values)
+    mean = sum(values) / n
+    variance = sum((v - mean) ** 2 for v in values) / (n - 1) if n > 1 else 0.0
+
+    return {
+        "p50": percentile(values, 50),
+        "p90": percentile(values, 90),
+        "p99": percentile(values, 99),
+        "max": values[-1],
+        "stddev": math.sqrt(variance),
+    }
+
+
+def wilson_interval(successes: int, total: int, z: float = 1.96) -> Optional[list[float]]:
+    """
+    비율의 Wilson 점수 신뢰구간 (기본 95%, % 단위로 반환)
+    - 표본이 작거나 비율이 0%/100% 근처여도 구간이 [0, 100]을 벗어나지 않음
+    """
+    if total <= 0:
+        return None
+
+    p = successes / total
+    denom = 1 + z * z / total
+    center = (p + z * z / (2 * total)) / denom
+    margin = z * math.sqrt(p * (1 - p) / total + z * z / (4 * total * total)) / denom
+    return [max(0.0, center - margin) * 100, min(1.0, center + margin) * 100]
+
+
+def normal_sf(z: float) -> float:
+    """표준정규분포 상단 꼬리 확률 P(Z > z)"""
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def mann_whitney_p(a: list[float], b: list[float]) -> Optional[float]:
+    """
+    Mann-Whitney U 검정 양측 p-value (정규 근사, 동점 보정)
+    - 지연 시간처럼 분포가 치우친 값의 두 집단 비교용 (평균 대신 순위 사용)
+    """
+    n1, n2 = len(a), len(b)
+    if n1 == 0 or n2 == 0:
+        return None
+
+    combined = sorted([(v, 0) for v in a] + [(v, 1) for v in b])
+    ranks = [0.0] * len(combined)
+    tie_term = 0.0
+    i = 0
+    while i < len(combined):
+        j = i
+        while j + 1 < len(combined) and combined[j + 1][0] == combined[i][0]:
+            j += 1
+        avg_rank = (i + j) / 2 + 1
+        for k in range(i, j + 1):
+            ranks[k] = avg_rank
+        ties = j - i + 1
+        tie_term += ties ** 3 - ties
+        i = j + 1
+
+    rank_sum_a = sum(rank for rank, (_, group) in zip(ranks, combined) if group == 0)
+    u = rank_sum_a - n1 * (n1 + 1) / 2
+    mean_u = n1 * n2 / 2
+    n = n1 + n2
+    var_u = n1 * n2 / 12 * ((n + 1) - tie_term / (n * (n - 1))) if n > 1 else 0.0
+    if var_u <= 0:
+        return 1.0
+
+    # 연속성 보정
+    z = (abs(u - mean_u) - 0.5) / math.sqrt(var_u)
+    return min(1.0, 2 * normal_sf(max(z, 0.0)))
+
+
+def two_proportion_p(successes_a: int, total_a: int, successes_b: int, total_b: int) -> Optional[float]:
+    """두 비율 차이에 대한 z-검정 양측 p-value (한국어 응답률 등 비교용)"""
+    if total_a == 0 or total_b == 0:
+        return None
+
+    pooled = (successes_a + successes_b) / (total_a + total_b)
+    se = math.sqrt(pooled * (1 - pooled) * (1 / total_a + 1 / total_b))
+    if se == 0:
+        return 1.0
+    z = (successes_a / total_a - successes_b / total_b) / se
+    return 2 * normal_sf(abs(z))
@@ -6,13 +6,30 @@ CatTalk2D 모델 벤치마크 스크립트
 """
 
 import json
+import sys
 import time
-import requests
 import argparse
+import hashlib
 from pathlib import Path
-from dataclasses import dataclass, asdict
-from typing import Optional
-import re
+from dataclasses import dataclass, asdict, fields
+from typing import Callable, Iterable, Optional, Union
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from bench_stats import latency_stats, wilson_interval
+from cat_scorer import contains_english, has_cat_suffix, score_batch
+from control_codec import compact_messages, summarize_forms
+from compare import CompareThresholds, compare_runs, load_run, print_report
+from load_test import find_knee, run_load_test
+from mock_ollama import add_mock_arguments, config_from_args, start_mock_server
+from ollama_client import OllamaClient
+from prefix_bench import LAYOUTS, layout_cases, print_prefix_report, run_prefix_benchmark, summarize_layouts
+from response_cache import CACHE_MODES, ResponseCache, cache_key
+from rescore import RESCORE_GROUP_FIELDS, print_groups, rescore_file
+from results_store import ResultsWriter, completed_keys, read_results, result_key
+from sweep import (grid_configs, iter_jobs, load_default_options, load_space, print_ranking,
+                   random_configs, rank_configs, run_sweep)
+from testset import GROUP_FIELDS, iter_testset
 
 
 @dataclass
@@ -26,6 +43,29 @@ class BenchmarkResult:
     has_cat_suffix: bool
     response_length: int
     error: Optional[str] = None
+    ttft_ms: Optional[float] = None         # 첫 토큰까지 시간 (스트리밍 모드)
+    inter_token_ms: Optional[float] = None  # 평균 토큰 간 지연 (스트리밍 모드)
+    tokens_per_sec: Optional[float] = None  # 디코드 속도 (eval_count / eval_duration)
+    load_ms: Optional[float] = None         # 모델 로드 시간 (load_duration)
+    prompt_eval_ms: Optional[float] = None  # 프롬프트 처리(prefill) 시간 (prompt_eval_duration)
+    prompt_eval_count: Optional[int] = None # prefill한 프롬프트 토큰 수 (서버 prefix 캐시 적중분 제외)
+    eval_ms: Optional[float] = None         # 토큰 생성(decode) 시간 (eval_duration)
+    connect_ms: Optional[float] = None      # 클라이언트 연결 수립 시간 (풀 재사용 시 0)
+    server_ms: Optional[float] = None       # 서버 측 전체 처리 시간 (total_duration)
+    attempts: int = 1                       # 재시도 포함 시도 횟수
+    prompt_index: int = 0                   # 테스트 케이스 인덱스 (TEST_PROMPTS 또는 --testset 줄 순서)
+    prompt_sha: Optional[str] = None        # 전체 프롬프트 SHA-256 (compare에서 같은 테스트셋인지 확인)
+    trial: int = 0                          # 반복 회차 (--repeat)
+    meta: Optional[dict] = None             # 케이스 메타 (caseKey/category/ageLevel 등)
+    is_warmup: bool = False                 # 워밍업 요청 (통계 제외)
+    cached: bool = False                    # 응답 캐시에서 가져온 결과 (지연 값은 원래 측정치)
+    cat_score: Optional[int] = None         # 고양이다움 점수 0~100 (cat_scorer, 요약 생성 시 일괄 채점)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "BenchmarkResult":
+        """JSONL 레코드에서 복원 (모르는 필드는 무시)"""
+        names = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in data.items() if k in names})
 
 
 @dataclass
@@ -38,9 +78,52 @@ class ModelSummary:
     avg_response_time_ms: float
     avg_response_length: float
     error_count: int
+    avg_ttft_ms: Optional[float] = None
+    avg_inter_token_ms: Optional[float] = None
+    avg_tokens_per_sec: Optional[float] = None
+    warmup_load_ms: Optional[float] = None   # 워밍업 요청의 콜드 로드 시간 (통계 제외)
+    avg_load_ms: Optional[float] = None
+    avg_prompt_eval_ms: Optional[float] = None
+    avg_eval_ms: Optional[float] = None
+    trials: int = 1
+    p50_response_time_ms: Optional[float] = None
+    p90_response_time_ms: Optional[float] = None
+    p99_response_time_ms: Optional[float] = None
+    max_response_time_ms: Optional[float] = None
+    stddev_response_time_ms: Optional[float] = None
+    korean_rate_ci: Optional[list[float]] = None      # 95% Wilson 신뢰구간 [하한, 상한] (%)
+    cat_suffix_rate_ci: Optional[list[float]] = None
+    avg_connect_ms: Optional[float] = None
+    avg_server_ms: Optional[float] = None
+    retry_count: int = 0
+    avg_cat_score: Optional[float] = None    # 평균 고양이다움 점수 (0~100)
+    cached_count: int = 0                    # 응답 캐시에서 가져온 결과 수
+
+
+def mean_of(values: list) -> Optional[float]:
+    """None을 제외한 평균 (값이 없으면 None)"""
+    values = [v for v in values if v is not None]
+    return sum(values) / len(values) if values else None
+
+
+OLLAMA_HOST = "http://localhost:11434"
+OLLAMA_URL = f"{OLLAMA_HOST}/api/generate"
+OLLAMA_CHAT_URL = f"{OLLAMA_HOST}/api/chat"
+
+RESULTS_JSONL = "benchmark_results.jsonl"
+RUN_CONFIG_JSON = "benchmark_run.json"
 
+# 모든 테스트가 공유하는 클라이언트 (main()에서 CLI 옵션으로 재설정)
+client = OllamaClient()
 
-OLLAMA_URL = "http://localhost:11434/api/generate"
+# 응답 캐시 (main()에서 --cache-mode로 설정, None이면 사용 안 함)
+cache: Optional[ResponseCache] = None
+
+# 기본 샘플링 옵션 (sampling_options.json — LoRA 학습 스크립트의 Modelfile과 공유)
+SAMPLING_OPTIONS = load_default_options()
+
+# 모델 이름 → digest (캐시 키용, 실행 중 한 번만 조회)
+_model_digests = {}
 
 # 테스트 프롬프트 세트
 TEST_PROMPTS = [
@@ -106,8 +189,23 @@ TEST_PROMPTS = [
 ]
 
 
-def build_prompt(control: dict, user_text: str) -> str:
-    """Control 정보를 기반으로 프롬프트 생성"""
+# build_prompt 레이아웃
+# - dynamic_first: 상태(기분/호감도/나이) → 규칙 순서 (기존)
+# - static_first: 페르소나/규칙 → 상태 순서 (요청마다 앞부분이 같아 서버의 prefill 캐시 재사용 가능)
+PROMPT_LAYOUTS = ("dynamic_first", "static_first")
+
+
+def builtin_cases(layout: str = "dynamic_first") -> Iterable[dict]:
+    """TEST_PROMPTS를 테스트 케이스 형식으로 변환 (control 값을 meta로 사용)"""
+    for test in TEST_PROMPTS:
+        yield {
+            "prompt": build_prompt(test["control"], test["userText"], layout),
+            "meta": dict(test["control"]),
+        }
+
+
+def build_prompt(control: dict, user_text: str, layout: str = "dynamic_first") -> str:
+    """Control 정보를 기반으로 프롬프트 생성 (layout: PROMPT_LAYOUTS)"""
     mood_desc = {
         "happy": "기분이 좋음",
         "hungry": "배고픔",
@@ -129,172 +227,912 @@ def build_prompt(control: dict, user_text: str) -> str:
         "adult": "어른 고양이 (성숙함)"
     }
 
-    prompt = f"""당신은 '망고'라는 이름의 귀여운 고양이입니다.
+    persona = "당신은 '망고'라는 이름의 귀여운 고양이입니다."
 
-현재 상태:
+    state = f"""현재 상태:
 - 기분: {mood_desc.get(control.get('moodTag', 'neutral'), '평범함')}
 - 호감도: {affection_desc.get(control.get('affectionTier', 'mid'), '보통')}
-- 나이: {age_desc.get(control.get('ageLevel', 'teen'), '청소년')}
+- 나이: {age_desc.get(control.get('ageLevel', 'teen'), '청소년')}"""
 
-규칙:
+    rules = """규칙:
 1. 반드시 한국어로만 대답하세요
 2. 문장 끝에 '냥', '냥~', '냥!' 중 하나를 붙이세요
 3. 1-2문장으로 짧게 대답하세요
-4. 고양이답게 귀엽고 솔직하게 대답하세요
+4. 고양이답게 귀엽고 솔직하게 대답하세요"""
 
-주인이 말합니다: "{user_text}"
+    turn = f"""주인이 말합니다: "{user_text}"
 
 망고의 대답:"""
 
-    return prompt
+    if layout == "static_first":
+        sections = [persona, rules, state, turn]
+    elif layout == "dynamic_first":
+        sections = [persona, state, rules, turn]
+    else:
+        raise ValueError(f"알 수 없는 프롬프트 레이아웃: {layout}")
+
+    return "\n\n".join(sections)
 
 
-def contains_english(text: str) -> bool:
-    """영어 포함 여부 확인"""
-    english_pattern = re.compile(r'[a-zA-Z]{2,}')
-    # 일부 허용 패턴 제외 (예: OK, TV 등 일상적 외래어)
-    allowed = {'ok', 'tv', 'pc', 'sns'}
+def tokens_per_sec(final_chunk: dict) -> Optional[float]:
+    """Ollama 최종 응답의 eval_count/eval_duration(ns)으로 디코드 속도 계산"""
+    eval_count = final_chunk.get("eval_count")
+    eval_duration = final_chunk.get("eval_duration")
+    if not eval_count or not eval_duration:
+        return None
+    return eval_count / (eval_duration / 1e9)
 
-    matches = english_pattern.findall(text.lower())
-    for match in matches:
-        if match not in allowed:
-            return True
-    return False
 
+def ns_to_ms(value: Optional[int]) -> Optional[float]:
+    """Ollama duration 필드(나노초)를 ms로 변환"""
+    return value / 1e6 if value is not None else None
 
-def has_cat_suffix(text: str) -> bool:
-    """고양이 어미 확인"""
-    return any(suffix in text for suffix in ['냥', '냐', '야옹', '먀'])
 
+def chunk_text(chunk: dict) -> str:
+    """/api/generate("response")와 /api/chat("message.content") 응답 모두에서 텍스트 추출"""
+    if "message" in chunk:
+        return (chunk.get("message") or {}).get("content", "")
+    return chunk.get("response", "")
 
-def run_test(model: str, prompt: str, timeout: int = 30) -> BenchmarkResult:
-    """단일 테스트 실행"""
-    start_time = time.time()
+
+def prompt_label(prompt: Union[str, list]) -> str:
+    """결과 파일에 남길 프롬프트 요약 (chat 메시지면 마지막 user 메시지)"""
+    if isinstance(prompt, list):
+        prompt = next((m["content"] for m in reversed(prompt) if m["role"] == "user"), "")
+    return prompt[:50] + "..."
+
+
+def prompt_digest(prompt: Union[str, list]) -> str:
+    """전체 프롬프트(문자열 또는 chat 메시지 목록) SHA-256 — prompt_label은 잘린 요약이라 비교에 쓰지 않음"""
+    canonical = json.dumps(prompt, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def read_stream(response, start_time: float) -> tuple[str, dict, Optional[float], Optional[float]]:
+    """
+    Ollama NDJSON 스트림을 청크 단위로 소비
+    Returns: (전체 텍스트, 최종 청크, TTFT ms, 평균 토큰 간 지연 ms)
+    """
+    pieces = []
+    token_times = []
+    final_chunk = {}
+
+    for line in response.iter_lines():
+        if not line:
+            continue
+        chunk = json.loads(line)
+        piece = chunk_text(chunk)
+        if piece:
+            token_times.append(time.perf_counter())
+            pieces.append(piece)
+        if chunk.get("done"):
+            # break하지 않고 스트림 끝까지 읽어야 연결이 풀로 반환됨
+            final_chunk = chunk
+
+    ttft_ms = (token_times[0] - start_time) * 1000 if token_times else None
+    inter_token_ms = None
+    if len(token_times) > 1:
+        inter_token_ms = (token_times[-1] - token_times[0]) / (len(token_times) - 1) * 1000
+
+    return "".join(pieces), final_chunk, ttft_ms, inter_token_ms
+
+
+def run_test(model: str, prompt: Union[str, list], timeout: int = 30,
+             stream: bool = False, options: Optional[dict] = None) -> BenchmarkResult:
+    """
+    단일 테스트 실행 (stream=True면 TTFT/토큰 간 지연까지 측정)
+    - prompt가 문자열이면 /api/generate, 메시지 목록이면 /api/chat으로 요청
+    - options를 생략하면 SAMPLING_OPTIONS 사용
+    """
+    start_time = time.perf_counter()
+    chat = isinstance(prompt, list)
+    timing = None
 
     try:
-        response = requests.post(
-            OLLAMA_URL,
-            json={
+        response, timing = client.post(
+            OLLAMA_CHAT_URL if chat else OLLAMA_URL,
+            {
                 "model": model,
-                "prompt": prompt,
-                "stream": False,
-                "options": {
-                    "temperature": 0.7,
-                    "top_p": 0.9,
-                    "top_k": 40,
-                    "repeat_penalty": 1.2
-                }
+                "messages" if chat else "prompt": prompt,
+                "stream": stream,
+                "options": options or SAMPLING_OPTIONS
             },
-            timeout=timeout
+            timeout=timeout,
+            stream=stream
         )
 
-        elapsed_ms = (time.time() - start_time) * 1000
-
         if response.status_code == 200:
-            result = response.json()
-            text = result.get("response", "")
+            ttft_ms = None
+            inter_token_ms = None
+            if stream:
+                with response:
+                    text, result, ttft_ms, inter_token_ms = read_stream(response, start_time)
+            else:
+                result = response.json()
+                text = chunk_text(result)
+
+            elapsed_ms = (time.perf_counter() - start_time) * 1000
 
             return BenchmarkResult(
                 model=model,
-                prompt=prompt[:50] + "...",
+                prompt=prompt_label(prompt),
+                prompt_sha=prompt_digest(prompt),
                 response=text,
                 response_time_ms=elapsed_ms,
                 is_korean=not contains_english(text),
                 has_cat_suffix=has_cat_suffix(text),
-                response_length=len(text)
+                response_length=len(text),
+                ttft_ms=ttft_ms,
+                inter_token_ms=inter_token_ms,
+                tokens_per_sec=tokens_per_sec(result),
+                load_ms=ns_to_ms(result.get("load_duration")),
+                prompt_eval_ms=ns_to_ms(result.get("prompt_eval_duration")),
+                prompt_eval_count=result.get("prompt_eval_count"),
+                eval_ms=ns_to_ms(result.get("eval_duration")),
+                connect_ms=timing.connect_ms,
+                server_ms=ns_to_ms(result.get("total_duration")),
+                attempts=timing.attempts
             )
         else:
+            elapsed_ms = (time.perf_counter() - start_time) * 1000
             return BenchmarkResult(
                 model=model,
-                prompt=prompt[:50] + "...",
+                prompt=prompt_label(prompt),
+                prompt_sha=prompt_digest(prompt),
                 response="",
                 response_time_ms=elapsed_ms,
                 is_korean=False,
                 has_cat_suffix=False,
                 response_length=0,
-                error=f"HTTP {response.status_code}"
+                error=f"HTTP {response.status_code}",
+                connect_ms=timing.connect_ms,
+                attempts=timing.attempts
             )
 
     except Exception as e:
-        elapsed_ms = (time.time() - start_time) * 1000
+        elapsed_ms = (time.perf_counter() - start_time) * 1000
+        # 재시도 끝에 실패하면 client.post가 예외에 timing을 붙여 줌 (응답을 읽다 실패하면 이미 받은 timing)
+        timing = timing or getattr(e, "timing", None)
         return BenchmarkResult(
             model=model,
-            prompt=prompt[:50] + "...",
+            prompt=prompt_label(prompt),
+            prompt_sha=prompt_digest(prompt),
             response="",
             response_time_ms=elapsed_ms,
             is_korean=False,
             has_cat_suffix=False,
             response_length=0,
-            error=str(e)
+            error=str(e),
+            connect_ms=timing.connect_ms if timing else None,
+            attempts=timing.attempts if timing else 1
         )
 
 
-def run_benchmark(models: list[str], output_dir: str = ".") -> dict:
-    """전체 벤치마크 실행"""
-    results = []
-    summaries = []
+def model_digest(model: str) -> str:
+    """
+    모델 digest 조회 (/api/tags, 목록에 없으면 /api/show)
+    - 조회에 실패하면 모델 이름을 대신 사용 (같은 이름으로 다시 만든 모델과 구분되지 않음)
+    """
+    if model in _model_digests:
+        return _model_digests[model]
 
-    for model in models:
-        print(f"\n{'='*50}")
-        print(f"Testing model: {model}")
-        print('='*50)
-
-        model_results = []
-
-        for i, test in enumerate(TEST_PROMPTS):
-            prompt = build_prompt(test["control"], test["userText"])
-            result = run_test(model, prompt)
-            model_results.append(result)
-            results.append(asdict(result))
-
-            status = "OK" if result.is_korean and result.has_cat_suffix else "WARN"
-            print(f"  [{i+1}/{len(TEST_PROMPTS)}] {status} - {result.response_time_ms:.0f}ms")
-            if result.response:
-                print(f"       Response: {result.response[:60]}...")
-            if result.error:
-                print(f"       Error: {result.error}")
-
-        # 모델 요약 계산
-        valid_results = [r for r in model_results if not r.error]
-        if valid_results:
-            summary = ModelSummary(
-                model=model,
-                total_tests=len(model_results),
-                korean_rate=sum(1 for r in valid_results if r.is_korean) / len(valid_results) * 100,
-                cat_suffix_rate=sum(1 for r in valid_results if r.has_cat_suffix) / len(valid_results) * 100,
-                avg_response_time_ms=sum(r.response_time_ms for r in valid_results) / len(valid_results),
-                avg_response_length=sum(r.response_length for r in valid_results) / len(valid_results),
-                error_count=len(model_results) - len(valid_results)
-            )
-            summaries.append(asdict(summary))
+    digest = None
+    try:
+        tags = client.session.get(f"{OLLAMA_HOST}/api/tags", timeout=10).json()
+        for entry in tags.get("models", []):
+            if entry.get("name") in (model, f"{model}:latest") and entry.get("digest"):
+                digest = entry["digest"]
+                break
+        if digest is None:
+            show = client.session.post(f"{OLLAMA_HOST}/api/show", json={"model": model}, timeout=10).json()
+            digest = show.get("digest")
+            if digest is None and show.get("modelfile"):
+                # /api/show에 digest가 없으면 Modelfile(FROM의 blob 해시 포함) 내용으로 대신 식별
+                digest = hashlib.sha256(show["modelfile"].encode("utf-8")).hexdigest()
+    except Exception as e:
+        print(f"  [cache] {model} digest 조회 실패: {e}")
+
+    _model_digests[model] = digest or f"name:{model}"
+    return _model_digests[model]
+
+
+def sampling_options(seed: Optional[int], trial: int, base: Optional[dict] = None) -> dict:
+    """회차별 샘플링 옵션 (seed를 주면 회차마다 seed+trial로 재현 가능한 샘플 생성)"""
+    base = base or SAMPLING_OPTIONS
+    if seed is None:
+        return base
+    return {**base, "seed": seed + trial}
+
+
+def request_cache_key(model: str, prompt: Union[str, list], options: dict, stream: bool, trial: int) -> str:
+    """요청 캐시 키 (같은 옵션으로 반복한 회차도 서로 다른 샘플로 보관)"""
+    endpoint = "chat" if isinstance(prompt, list) else "generate"
+    return cache_key(model_digest(model), endpoint, prompt, options, stream, trial)
+
+
+def cached_run_test(model: str, prompt: Union[str, list], options: dict, stream: bool,
+                    trial: int) -> BenchmarkResult:
+    """캐시를 거쳐 run_test 실행 (적중 시 요청 없이 저장된 결과 반환, 오류 결과는 저장하지 않음)"""
+    if cache is None:
+        return run_test(model, prompt, stream=stream, options=options)
+
+    key = request_cache_key(model, prompt, options, stream, trial)
+    hit = cache.get(key)
+    if hit is not None:
+        result = BenchmarkResult.from_dict(hit)
+        result.cached = True
+        result.prompt_sha = prompt_digest(prompt)
+        return result
+
+    result = run_test(model, prompt, stream=stream, options=options)
+    if not result.error:
+        cache.put(key, model, asdict(result))
+    return result
+
+
+def ordered_map(fn: Callable, items: Iterable, concurrency: int):
+    """
+    items에 fn을 최대 concurrency개 동시 적용하고 입력 순서대로 결과 반환(yield)
+    - 제출 대기열을 concurrency의 2배로 제한해 입력을 끝까지 미리 읽지 않음
+    """
+    if concurrency <= 1:
+        for item in items:
+            yield fn(item)
+        return
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        window = deque()
+        for item in items:
+            window.append(executor.submit(fn, item))
+            if len(window) >= concurrency * 2:
+                yield window.popleft().result()
+        while window:
+            yield window.popleft().result()
+
+
+def run_model_tests(model: str, cases: Callable[[], Iterable[dict]], concurrency: int = 1,
+                    stream: bool = False, repeat: int = 1, skip: Optional[set] = None,
+                    seed: Optional[int] = None):
+    """
+    한 모델에 대해 테스트 케이스를 repeat회 실행 (최대 concurrency개 동시 요청)
+    - cases: 케이스 이터레이터를 새로 만드는 함수 (회차마다 처음부터 다시 읽음)
+    - skip: 이미 완료된 (모델, 케이스 인덱스, 회차) 키 — 해당 조합은 실행하지 않음
+    - seed: 샘플링 seed (회차마다 seed+trial)
+    - 결과는 완료 순서와 무관하게 (회차, 케이스) 순서대로 반환(yield)
+    """
+    skip = skip or set()
+    jobs = (
+        (trial, index, case)
+        for trial in range(repeat)
+        for index, case in enumerate(cases())
+        if (model, index, trial) not in skip
+    )
+
+    def run_job(job):
+        trial, index, case = job
+        result = cached_run_test(model, case["prompt"], sampling_options(seed, trial), stream, trial)
+        result.prompt_index = index
+        result.trial = trial
+        result.meta = case.get("meta")
+        return result
+
+    yield from ordered_map(run_job, jobs, concurrency)
+
+
+def summarize_model(model: str, model_results: list[BenchmarkResult],
+                    warmup: Optional[BenchmarkResult] = None) -> Optional[ModelSummary]:
+    """모델별 요약 통계 계산 (워밍업 결과는 통계에서 제외하고 로드 시간만 기록)"""
+    valid_results = [r for r in model_results if not r.error]
+    if not valid_results:
+        return None
+
+    latency = latency_stats([r.response_time_ms for r in valid_results])
+    korean_count = sum(1 for r in valid_results if r.is_korean)
+    suffix_count = sum(1 for r in valid_results if r.has_cat_suffix)
+
+    return ModelSummary(
+        model=model,
+        total_tests=len(model_results),
+        korean_rate=korean_count / len(valid_results) * 100,
+        cat_suffix_rate=suffix_count / len(valid_results) * 100,
+        avg_response_time_ms=sum(r.response_time_ms for r in valid_results) / len(valid_results),
+        avg_response_length=sum(r.response_length for r in valid_results) / len(valid_results),
+        error_count=len(model_results) - len(valid_results),
+        avg_ttft_ms=mean_of([r.ttft_ms for r in valid_results]),
+        avg_inter_token_ms=mean_of([r.inter_token_ms for r in valid_results]),
+        avg_tokens_per_sec=mean_of([r.tokens_per_sec for r in valid_results]),
+        warmup_load_ms=warmup.load_ms if warmup and not warmup.error else None,
+        avg_load_ms=mean_of([r.load_ms for r in valid_results]),
+        avg_prompt_eval_ms=mean_of([r.prompt_eval_ms for r in valid_results]),
+        avg_eval_ms=mean_of([r.eval_ms for r in valid_results]),
+        trials=len({r.trial for r in model_results}),
+        p50_response_time_ms=latency["p50"],
+        p90_response_time_ms=latency["p90"],
+        p99_response_time_ms=latency["p99"],
+        max_response_time_ms=latency["max"],
+        stddev_response_time_ms=latency["stddev"],
+        korean_rate_ci=wilson_interval(korean_count, len(valid_results)),
+        cat_suffix_rate_ci=wilson_interval(suffix_count, len(valid_results)),
+        avg_connect_ms=mean_of([r.connect_ms for r in valid_results]),
+        avg_server_ms=mean_of([r.server_ms for r in valid_results]),
+        retry_count=sum(r.attempts - 1 for r in model_results if not r.cached),
+        avg_cat_score=mean_of([r.cat_score for r in valid_results]),
+        cached_count=sum(1 for r in model_results if r.cached)
+    )
 
-    # 결과 저장
+
+def summarize_groups(model_results: list[BenchmarkResult], field: str) -> dict:
+    """meta[field] 값별 요약 (케이스 종류별로 어디서 약한지 확인용)"""
+    groups = {}
+    for r in model_results:
+        key = (r.meta or {}).get(field)
+        if key is not None:
+            groups.setdefault(key, []).append(r)
+
+    summary = {}
+    for key in sorted(groups):
+        group = groups[key]
+        valid = [r for r in group if not r.error]
+        latency = latency_stats([r.response_time_ms for r in valid])
+        summary[key] = {
+            "count": len(group),
+            "error_count": len(group) - len(valid),
+            "korean_rate": sum(1 for r in valid if r.is_korean) / len(valid) * 100 if valid else None,
+            "cat_suffix_rate": sum(1 for r in valid if r.has_cat_suffix) / len(valid) * 100 if valid else None,
+            "avg_response_time_ms": mean_of([r.response_time_ms for r in valid]),
+            "p90_response_time_ms": latency["p90"],
+            "avg_cat_score": mean_of([r.cat_score for r in valid]),
+        }
+    return summary
+
+
+def run_benchmark(models: list[str], output_dir: str = ".", concurrency: int = 1,
+                  stream: bool = False, warmup: bool = True, repeat: int = 1,
+                  testset: Optional[str] = None, group_by: Optional[list[str]] = None,
+                  resume: bool = False, seed: Optional[int] = None) -> dict:
+    """
+    전체 벤치마크 실행
+    - testset 지정 시 JSONL의 system/user 메시지를 /api/chat으로 전송하고 meta 필드별로 묶어 요약
+    - 결과는 완료될 때마다 benchmark_results.jsonl에 추가되고, 요약 파일은 마지막에 JSONL에서 생성
+    - resume=True면 JSONL에 이미 성공으로 기록된 (모델, 케이스, 회차)는 건너뜀
+    - 응답 캐시를 읽는 모드에서 남은 테스트가 모두 캐시에 있으면 워밍업도 생략 (GPU 사용 없음)
+    """
     output_path = Path(output_dir)
     output_path.mkdir(parents=True, exist_ok=True)
+    results_path = output_path / RESULTS_JSONL
+    run_config = {"testset": testset, "repeat": repeat, "stream": stream, "seed": seed}
+
+    if testset:
+        cases = lambda: iter_testset(testset)
+        group_by = group_by or ["category", "caseKey"]
+    else:
+        cases = builtin_cases
+        group_by = group_by or []
+    test_count = sum(1 for _ in cases())
+
+    done = set()
+    if resume:
+        check_run_config(output_path, run_config)
+        done = completed_keys(results_path)
+        print(f"Resume: {len(done)}건 완료된 결과를 건너뜁니다")
+    with open(output_path / RUN_CONFIG_JSON, "w", encoding="utf-8") as f:
+        json.dump(run_config, f, ensure_ascii=False, indent=2)
+
+    with ResultsWriter(results_path, append=resume) as writer:
+        for model in models:
+            print(f"\n{'='*50}")
+            print(f"Testing model: {model} (concurrency={concurrency})")
+            print('='*50)
+
+            remaining = sum(1 for trial in range(repeat) for index in range(test_count)
+                            if (model, index, trial) not in done)
+            if remaining == 0:
+                print("  모든 테스트가 이미 완료됨")
+                continue
+
+            if warmup and cache is not None and cache.reads and all(
+                cache.contains(request_cache_key(model, case["prompt"], sampling_options(seed, trial), stream, trial))
+                for trial in range(repeat) for index, case in enumerate(cases())
+                if (model, index, trial) not in done
+            ):
+                print("  모든 테스트가 캐시에 있어 워밍업 생략")
+            # 워밍업: 모델 로드 비용을 첫 프롬프트에서 분리 (결과/통계에는 포함하지 않음)
+            elif warmup:
+                warmup_result = run_test(model, next(iter(cases()))["prompt"], timeout=120)
+                warmup_result.is_warmup = True
+                writer.write(asdict(warmup_result))
+                if warmup_result.error:
+                    print(f"  [warmup] Error: {warmup_result.error}")
+                else:
+                    print(f"  [warmup] {warmup_result.response_time_ms:.0f}ms"
+                          f" (load {warmup_result.load_ms or 0:.0f}ms)")
+
+            for i, result in enumerate(run_model_tests(model, cases, concurrency, stream, repeat, done, seed)):
+                writer.write(asdict(result))
+
+                status = "OK" if result.is_korean and result.has_cat_suffix else "WARN"
+                timing = f"{result.response_time_ms:.0f}ms"
+                if result.ttft_ms is not None:
+                    timing += f" (TTFT {result.ttft_ms:.0f}ms)"
+                if result.cached:
+                    timing += " [cache]"
+                print(f"  [{i+1}/{remaining}] {status} - {timing}")
+                if result.response:
+                    print(f"       Response: {result.response[:60]}...")
+                if result.error:
+                    print(f"       Error: {result.error}")
+
+    summary = write_summary(output_path, models, test_count, testset, repeat, group_by)
+    print_summary(summary["summaries"], summary["groups"])
+    if cache is not None:
+        stats = cache.stats()
+        print(f"\n응답 캐시 ({cache.mode}): 적중 {stats['hits']}건 / 미적중 {stats['misses']}건,"
+              f" {stats['entries']}개 항목 {stats['bytes'] / 1024 / 1024:.1f}MB")
+    return summary
+
+
+def check_run_config(output_path: Path, run_config: dict):
+    """
+    이어서 실행할 때 이전 실행과 설정이 같은지 확인
+    - 테스트셋이 다르면 인덱스가 어긋나고, 반복/스트리밍/시드가 다르면 한 파일에 조건이 다른 결과가 섞이므로 중단
+    - 이전 run_config.json에 기록된 항목만 비교
+    """
+    config_path = output_path / RUN_CONFIG_JSON
+    if not config_path.exists():
+        return
+    with open(config_path, "r", encoding="utf-8") as f:
+        previous = json.load(f)
+    diffs = [f"{key}: 이전 {previous[key]!r} → 현재 {run_config.get(key)!r}"
+             for key in previous if previous[key] != run_config.get(key)]
+    if diffs:
+        raise SystemExit("--resume: 이전 실행과 설정이 다릅니다 (새 --output으로 실행하세요)\n  "
+                         + "\n  ".join(diffs))
 
+
+def load_latest_results(results_path: Path) -> tuple[dict, dict]:
+    """
+    결과 JSONL을 읽어 키별 최신 결과만 남김 (재실행/재시도된 조합은 마지막 기록이 유효)
+    Returns: ({(모델, 케이스, 회차): 결과}, {모델: 마지막 워밍업 결과})
+    """
+    latest = {}
+    warmups = {}
+    for record in read_results(results_path):
+        result = BenchmarkResult.from_dict(record)
+        if result.is_warmup:
+            warmups[result.model] = result
+        else:
+            latest[result_key(record)] = result
+    return latest, warmups
+
+
+def apply_cat_scores(results: list[BenchmarkResult]):
+    """성공한 결과 전체를 한 번에 고양이다움 채점 (케이스 meta를 채점 control로 사용)"""
+    valid = [r for r in results if not r.error]
+    scores = score_batch([r.response for r in valid], [r.meta for r in valid])
+    for result, score in zip(valid, scores):
+        result.cat_score = score.score_total
+
+
+def write_summary(output_path: Path, models: list[str], test_count: int, testset: Optional[str],
+                  repeat: int, group_by: list[str]) -> dict:
+    """
+    결과 JSONL로부터 benchmark_results.json 생성
+    - 개별 결과는 한 건씩 직렬화해 쓰므로 결과 수만큼 큰 JSON 문자열을 메모리에 만들지 않음
+    """
+    latest, warmups = load_latest_results(output_path / RESULTS_JSONL)
+    apply_cat_scores(list(latest.values()))
+
+    by_model = {}
+    for key in sorted(latest, key=lambda k: (models.index(k[0]) if k[0] in models else len(models), k)):
+        by_model.setdefault(key[0], []).append(latest[key])
+
+    summaries = []
+    groups = {}
+    for model, model_results in by_model.items():
+        model_results.sort(key=lambda r: (r.trial, r.prompt_index))
+        summary = summarize_model(model, model_results, warmups.get(model))
+        if summary:
+            summaries.append(asdict(summary))
+        if group_by:
+            groups[model] = {field: summarize_groups(model_results, field) for field in group_by}
+
+    header = {
+        "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "models": models,
+        "test_count": test_count,
+        "testset": testset,
+        "repeat": repeat,
+    }
     with open(output_path / "benchmark_results.json", "w", encoding="utf-8") as f:
-        json.dump({
-            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
-            "models": models,
-            "test_count": len(TEST_PROMPTS),
-            "results": results,
-            "summaries": summaries
-        }, f, ensure_ascii=False, indent=2)
+        # {header..., "results": [...], "summaries": [...], "groups": {...}} 형식을 조각으로 기록
+        f.write(json.dumps(header, ensure_ascii=False, indent=2)[:-2] + ',\n  "results": [')
+        first = True
+        for model_results in by_model.values():
+            for result in model_results:
+                f.write(("\n    " if first else ",\n    ") + json.dumps(asdict(result), ensure_ascii=False))
+                first = False
+        f.write("\n  ],\n")
+        f.write('  "summaries": ' + json.dumps(summaries, ensure_ascii=False, indent=2) + ",\n")
+        f.write('  "groups": ' + json.dumps(groups, ensure_ascii=False, indent=2) + "\n}\n")
+
+    return {"summaries": summaries, "groups": groups}
+
 
-    # 요약 출력
+def print_summary(summaries: list[dict], groups: dict):
+    """요약 출력"""
     print("\n" + "="*60)
     print("BENCHMARK SUMMARY")
     print("="*60)
 
     for s in summaries:
         print(f"\n{s['model']}:")
-        print(f"  한국어 응답률: {s['korean_rate']:.1f}%")
-        print(f"  고양이 어미 사용률: {s['cat_suffix_rate']:.1f}%")
+        print(f"  한국어 응답률: {s['korean_rate']:.1f}%"
+              f" (95% CI {s['korean_rate_ci'][0]:.1f}~{s['korean_rate_ci'][1]:.1f}%)")
+        print(f"  고양이 어미 사용률: {s['cat_suffix_rate']:.1f}%"
+              f" (95% CI {s['cat_suffix_rate_ci'][0]:.1f}~{s['cat_suffix_rate_ci'][1]:.1f}%)")
         print(f"  평균 응답 시간: {s['avg_response_time_ms']:.0f}ms")
+        print(f"  응답 시간 p50/p90/p99/max: {s['p50_response_time_ms']:.0f}"
+              f" / {s['p90_response_time_ms']:.0f} / {s['p99_response_time_ms']:.0f}"
+              f" / {s['max_response_time_ms']:.0f}ms (σ {s['stddev_response_time_ms']:.0f}ms)")
         print(f"  평균 응답 길이: {s['avg_response_length']:.0f}자")
-        print(f"  오류: {s['error_count']}건")
+        if s['avg_cat_score'] is not None:
+            print(f"  고양이다움 점수: {s['avg_cat_score']:.1f}/100")
+        if s['avg_ttft_ms'] is not None:
+            print(f"  평균 TTFT: {s['avg_ttft_ms']:.0f}ms")
+        if s['avg_inter_token_ms'] is not None:
+            print(f"  평균 토큰 간 지연: {s['avg_inter_token_ms']:.1f}ms")
+        if s['avg_tokens_per_sec'] is not None:
+            print(f"  디코드 속도: {s['avg_tokens_per_sec']:.1f} tok/s")
+        if s['warmup_load_ms'] is not None:
+            print(f"  콜드 로드 (워밍업): {s['warmup_load_ms']:.0f}ms")
+        if s['avg_eval_ms'] is not None:
+            print(f"  단계별 평균: load {s['avg_load_ms'] or 0:.0f}ms"
+                  f" / prefill {s['avg_prompt_eval_ms'] or 0:.0f}ms"
+                  f" / decode {s['avg_eval_ms']:.0f}ms")
+        if s['avg_connect_ms'] is not None and s['avg_server_ms'] is not None:
+            print(f"  연결 수립 / 서버 처리: {s['avg_connect_ms']:.1f}ms / {s['avg_server_ms']:.0f}ms")
+        print(f"  오류: {s['error_count']}건 (재시도 {s['retry_count']}회)")
+        if s['cached_count']:
+            print(f"  캐시 결과: {s['cached_count']}건 (지연 값은 캐시 저장 당시 측정치)")
+
+        for field, table in groups.get(s['model'], {}).items():
+            if field == "caseKey":
+                continue  # 케이스 단위는 JSON에만 기록 (출력이 너무 길어짐)
+            print(f"  [{field}별]")
+            for key, g in table.items():
+                rate = f"{g['cat_suffix_rate']:.0f}%" if g['cat_suffix_rate'] is not None else "-"
+                avg = f"{g['avg_response_time_ms']:.0f}ms" if g['avg_response_time_ms'] is not None else "-"
+                score = f"{g['avg_cat_score']:.0f}" if g['avg_cat_score'] is not None else "-"
+                print(f"    {key:<20} n={g['count']:<4} 어미 {rate:>5}  점수 {score:>3}  평균 {avg}")
+
+
+def set_ollama_host(host: str):
+    """Ollama 서버 주소 변경 (--url / --mock)"""
+    global OLLAMA_HOST, OLLAMA_URL, OLLAMA_CHAT_URL
+    OLLAMA_HOST = host.rstrip("/")
+    OLLAMA_URL = f"{OLLAMA_HOST}/api/generate"
+    OLLAMA_CHAT_URL = f"{OLLAMA_HOST}/api/chat"
+
+
+def configure_client(args, pool_size: int):
+    """CLI 옵션으로 공유 클라이언트 재설정"""
+    global client
+    keep_alive = None if args.keep_alive == "none" else args.keep_alive
+    client = OllamaClient(keep_alive=keep_alive, max_retries=args.retries,
+                          backoff=args.retry_backoff, pool_size=pool_size)
+
+
+def configure_cache(args):
+    """CLI 옵션으로 응답 캐시 설정 (--cache-mode off면 사용 안 함)"""
+    global cache
+    if args.cache_mode == "off":
+        cache = None
+        return
+    cache = ResponseCache(Path(args.cache_path), args.cache_mode, int(args.cache_max_mb * 1024 * 1024))
+    print(f"Cache: {args.cache_path} ({args.cache_mode})")
+
+
+def run_load_command(args) -> dict:
+    """loadtest 서브커맨드: 가상 사용자 수 단계별 처리량/지연 측정"""
+    prompts = [case["prompt"] for case in builtin_cases()]
+
+    def request_fn(prompt: str) -> BenchmarkResult:
+        return run_test(args.model, prompt, timeout=args.timeout, stream=args.stream)
 
-    return {"results": results, "summaries": summaries}
+    print("CatTalk2D Load Test")
+    print(f"Model: {args.model}")
+    print(f"Users: {args.users} (think time {args.think_time}s)")
+
+    # 워밍업: 첫 단계에 모델 로드 시간이 섞이지 않도록
+    request_fn(prompts[0])
+
+    steps = run_load_test(request_fn, prompts, args.users, args.think_time, args.duration,
+                          args.max_in_flight, args.seed)
+    knee = find_knee(steps)
+
+    output_path = Path(args.output)
+    output_path.mkdir(parents=True, exist_ok=True)
+
+    with open(output_path / "load_test_results.json", "w", encoding="utf-8") as f:
+        json.dump({
+            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "model": args.model,
+            "think_time": args.think_time,
+            "duration": args.duration,
+            "steps": [asdict(step) for step in steps],
+            "max_stable_users": knee.users if knee else 0
+        }, f, ensure_ascii=False, indent=2)
+
+    print("\n" + "="*60)
+    print("LOAD TEST SUMMARY")
+    print("="*60)
+    print(f"{'users':>6} {'offered':>9} {'thruput':>9} {'err%':>6} {'p50':>7} {'p90':>7} {'p99':>7}")
+    for step in steps:
+        p50, p90, p99 = (f"{v:.0f}" if v is not None else "-"
+                         for v in (step.p50_latency_ms, step.p90_latency_ms, step.p99_latency_ms))
+        print(f"{step.users:>6} {step.offered_rps:>9.2f} {step.throughput_rps:>9.2f}"
+              f" {step.error_rate:>6.1f} {p50:>7} {p90:>7} {p99:>7}"
+              f"{'  *' if step.saturated else ''}")
+    print(f"\n최대 안정 동시 사용자: {knee.users if knee else 0}명 (* = 포화)")
+
+    return {"steps": [asdict(step) for step in steps]}
+
+
+def run_compare_command(args) -> int:
+    """compare 서브커맨드: 두 실행 비교, 유의한 회귀가 있으면 1 반환"""
+    thresholds = CompareThresholds(
+        max_latency_increase_pct=args.max_latency_increase,
+        max_tps_drop_pct=args.max_tps_drop,
+        max_rate_drop_pt=args.max_rate_drop,
+        alpha=args.alpha
+    )
+    report = compare_runs(load_run(args.baseline), load_run(args.candidate), thresholds)
+    print_report(report)
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    if not report["models"]:
+        print("비교할 공통 모델이 없습니다")
+        return 2
+    if report["testset_mismatch"]:
+        return 2
+    return 1 if report["failures"] else 0
+
+
+def run_rescore_command(args) -> dict:
+    """rescore 서브커맨드: 기존 결과/데이터셋의 품질 지표를 오프라인으로 다시 계산"""
+    input_path = Path(args.input)
+    if args.output:
+        output_path = Path(args.output)
+    elif input_path.is_dir():
+        output_path = input_path / "benchmark_results_rescored.jsonl"
+    else:
+        output_path = input_path.with_name(f"{input_path.stem}_rescored.jsonl")
+    groups_path = output_path.with_name(f"{output_path.stem}_groups.json")
+
+    print("CatTalk2D Rescore")
+    print(f"Input: {input_path}")
+    print(f"Output: {output_path}")
+
+    start = time.perf_counter()
+    result = rescore_file(str(input_path), str(output_path), tuple(args.group_by),
+                          workers=args.workers, chunk_size=args.chunk_size)
+    elapsed = time.perf_counter() - start
+
+    with open(groups_path, "w", encoding="utf-8") as f:
+        json.dump({
+            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "input": str(input_path),
+            "records": result["records"],
+            "scored": result["scored"],
+            "groups": result["groups"],
+        }, f, ensure_ascii=False, indent=2)
+
+    print_groups(result["groups"])
+    print(f"\n{result['records']}건 중 {result['scored']}건 채점"
+          f" ({elapsed:.1f}s, {result['scored'] / elapsed if elapsed else 0:,.0f}건/s)")
+    print(f"집계: {groups_path}")
+    return result
+
+
+def run_sweep_command(args) -> list[dict]:
+    """sweep 서브커맨드: 모델 × 샘플링 옵션 조합별 품질/지연 순위표"""
+    space = load_space(args.space)
+    if args.search == "grid":
+        configs = grid_configs(space, SAMPLING_OPTIONS)
+    else:
+        configs = random_configs(space, SAMPLING_OPTIONS, args.samples, args.search_seed)
+    cases = list(iter_testset(args.testset)) if args.testset else list(builtin_cases())
+
+    total = len(args.models) * len(configs) * len(cases) * args.repeat
+    print("CatTalk2D Sampling Sweep")
+    print(f"Models: {', '.join(args.models)}")
+    print(f"Configs: {len(configs)} ({args.search}), Cases: {len(cases)}, Repeat: {args.repeat}"
+          f" → {total} requests (concurrency={args.concurrency})")
+
+    def request_fn(model: str, config_index: int, case_index: int, trial: int) -> BenchmarkResult:
+        options = sampling_options(args.sampling_seed, trial, configs[config_index])
+        result = cached_run_test(model, cases[case_index]["prompt"], options, args.stream, trial)
+        result.prompt_index = case_index
+        result.trial = trial
+        result.meta = cases[case_index].get("meta")
+        return result
+
+    def on_model_start(model: str):
+        print(f"\n[{model}]")
+        if not args.no_warmup:
+            warmup_result = run_test(model, cases[0]["prompt"], timeout=120)
+            if warmup_result.error:
+                print(f"  [warmup] Error: {warmup_result.error}")
+
+    output_path = Path(args.output)
+    output_path.mkdir(parents=True, exist_ok=True)
+    results = []
+    jobs = []
+    with ResultsWriter(output_path / "sweep_results.jsonl", append=False) as writer:
+        for i, (job, result) in enumerate(run_sweep(request_fn, iter_jobs(args.models, configs, cases, args.repeat),
+                                                    args.concurrency, on_model_start), start=1):
+            writer.write({**asdict(result), "config": job[1], "options": configs[job[1]]})
+            results.append(result)
+            jobs.append(job)
+            if i % 50 == 0 or i == total:
+                print(f"  {i}/{total} 완료")
+
+    # 품질 점수는 모든 응답을 모은 뒤 한 번에 채점
+    apply_cat_scores(results)
+    records = [{**asdict(result), "config": job[1]} for job, result in zip(jobs, results)]
+    rows = rank_configs(records, configs, SAMPLING_OPTIONS)
+
+    with open(output_path / "sweep_summary.json", "w", encoding="utf-8") as f:
+        json.dump({
+            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "models": args.models,
+            "search": args.search,
+            "space": space,
+            "base_options": SAMPLING_OPTIONS,
+            "test_count": len(cases),
+            "repeat": args.repeat,
+            "ranking": rows,
+        }, f, ensure_ascii=False, indent=2)
+
+    print_ranking(rows)
+    print(f"\n결과: {output_path / 'sweep_summary.json'}")
+    return rows
+
+
+def run_prefix_command(args) -> dict:
+    """prefix 서브커맨드: 프롬프트 레이아웃별 prefill 시간 비교 (고정 부분 앞 vs 상태 앞)"""
+    if args.testset:
+        cases = list(iter_testset(args.testset))[:args.cases]
+        cases_by_layout = {layout: layout_cases(cases, layout) for layout in LAYOUTS}
+    else:
+        cases_by_layout = {layout: list(builtin_cases(layout))[:args.cases] for layout in LAYOUTS}
+    case_count = len(cases_by_layout[LAYOUTS[0]])
+
+    print("CatTalk2D Prompt Prefix Benchmark")
+    print(f"Models: {', '.join(args.models)}")
+    print(f"Cases: {case_count} x {len(LAYOUTS)} layouts x {args.rounds} rounds (순차 요청)")
+
+    output_path = Path(args.output)
+    output_path.mkdir(parents=True, exist_ok=True)
+    reports = {}
+    with ResultsWriter(output_path / "prefix_results.jsonl", append=False) as writer:
+        for model in args.models:
+            # 응답 캐시는 거치지 않음 (서버 prefill을 실제로 측정해야 함)
+            def request_fn(prompt: Union[str, list]) -> BenchmarkResult:
+                return run_test(model, prompt, timeout=120, stream=args.stream)
+
+            def on_result(record: dict):
+                result = record["result"]
+                result.meta = {"layout": record["layout"], "round": record["round"]}
+                result.prompt_index = record["index"]
+                result.trial = record["round"]
+                result.is_warmup = record["priming"]
+                writer.write(asdict(result))
+
+            if not args.no_warmup:
+                warmup_result = run_test(model, cases_by_layout[LAYOUTS[0]][0]["prompt"], timeout=120)
+                if warmup_result.error:
+                    print(f"  [{model}] [warmup] Error: {warmup_result.error}")
+
+            records = run_prefix_benchmark(request_fn, cases_by_layout, args.rounds, on_result)
+            reports[model] = summarize_layouts(records)
+
+    with open(output_path / "prefix_summary.json", "w", encoding="utf-8") as f:
+        json.dump({
+            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "models": args.models,
+            "testset": args.testset,
+            "test_count": case_count,
+            "rounds": args.rounds,
+            "reports": reports,
+        }, f, ensure_ascii=False, indent=2)
+
+    print("\n" + "="*60)
+    print("PROMPT PREFIX SUMMARY (priming 요청 제외)")
+    print("="*60)
+    for model, report in reports.items():
+        print_prefix_report(model, report)
+    print(f"\n결과: {output_path / 'prefix_summary.json'}")
+    return reports
+
+
+def run_control_command(args) -> dict:
+    """
+    control 서브커맨드: 테스트셋의 CONTROL JSON과 압축 형식의 프롬프트 토큰 수/prefill 시간 비교
+    - 같은 케이스를 두 형식으로 연달아 요청 (num_predict=1로 생성은 최소화)
+    - 서버 prefix 캐시에 걸리지 않도록 첫 메시지 앞에 요청마다 다른 번호를 붙여 전체 프롬프트를 prefill
+    """
+    testset = args.testset or str(Path(__file__).resolve().parents[2] / "CombData" / "testset.jsonl")
+    cases = list(iter_testset(testset))[:args.cases]
+    options = {**SAMPLING_OPTIONS, "num_predict": 1}
+    request_count = 0
+
+    def cold(messages: list) -> list:
+        nonlocal request_count
+        request_count += 1
+        first = messages[0]
+        return [{**first, "content": f"#{request_count}\n{first['content']}"}] + messages[1:]
+
+    print("CatTalk2D CONTROL Encoding Benchmark")
+    print(f"Models: {', '.join(args.models)}")
+    print(f"Testset: {testset} ({len(cases)} cases x {args.rounds} rounds)")
+
+    output_path = Path(args.output)
+    output_path.mkdir(parents=True, exist_ok=True)
+    reports = {}
+    with ResultsWriter(output_path / "control_results.jsonl", append=False) as writer:
+        for model in args.models:
+            if not args.no_warmup:
+                warmup_result = run_test(model, cases[0]["prompt"], timeout=120)
+                if warmup_result.error:
+                    print(f"  [{model}] [warmup] Error: {warmup_result.error}")
+
+            records = []
+            for round_index in range(args.rounds):
+                for index, case in enumerate(cases):
+                    forms = {"verbose": case["prompt"], "compact": compact_messages(case["prompt"])}
+                    # 라운드마다 두 형식의 요청 순서를 바꿈
+                    for form in (("verbose", "compact") if round_index % 2 == 0 else ("compact", "verbose")):
+                        result = run_test(model, cold(forms[form]), timeout=120, options=options)
+                        result.prompt_index = index
+                        result.trial = round_index
+                        result.meta = {**case.get("meta", {}), "form": form}
+                        writer.write(asdict(result))
+                        records.append({"form": form, "result": result})
+            reports[model] = summarize_forms(records)
+
+    with open(output_path / "control_summary.json", "w", encoding="utf-8") as f:
+        json.dump({
+            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "models": args.models,
+            "testset": testset,
+            "test_count": len(cases),
+            "rounds": args.rounds,
+            "reports": reports,
+        }, f, ensure_ascii=False, indent=2)
+
+    def fmt(value: Optional[float], spec: str) -> str:
+        return format(value, spec) if value is not None else "-"
+
+    print("\n" + "="*60)
+    print("CONTROL ENCODING SUMMARY (verbose JSON vs compact)")
+    print("="*60)
+    for model, report in reports.items():
+        print(f"\n{model}:")
+        for form, s in report["forms"].items():
+            print(f"  {form:<8} n={s['count']:<4} 프롬프트 토큰 {fmt(s['avg_prompt_tokens'], '6.1f')}"
+                  f"  prefill 평균 {fmt(s['avg_prompt_eval_ms'], '6.1f')}ms"
+                  f" / p50 {fmt(s['p50_prompt_eval_ms'], '6.1f')}ms"
+                  + (f" (오류 {s['error_count']})" if s['error_count'] else ""))
+        savings = report["savings_pct"]
+        if savings:
+            print(f"  → compact 절감: 토큰 {fmt(savings.get('avg_prompt_tokens'), '+.1f')}%"
+                  f", prefill {fmt(savings.get('avg_prompt_eval_ms'), '+.1f')}%")
+    print(f"\n결과: {output_path / 'control_summary.json'}")
+    return reports
 
 
 def main():
@@ -310,14 +1148,192 @@ def main():
         default="./benchmark_output",
         help="결과 저장 디렉토리"
     )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        help="모델별 동시 요청 수 (기본 1 = 순차 실행)"
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="스트리밍 모드로 TTFT/토큰 간 지연 측정"
+    )
+    parser.add_argument(
+        "--no-warmup",
+        action="store_true",
+        help="모델별 워밍업 요청 생략 (첫 요청에 로드 시간이 포함됨)"
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=1,
+        help="프롬프트 세트 반복 횟수 (백분위수/신뢰구간 정밀도 향상)"
+    )
+    parser.add_argument(
+        "--testset",
+        help="테스트셋 JSONL 경로 (예: ../../CombData/testset.jsonl) — 지정 시 /api/chat으로 실제 게임 메시지 전송"
+    )
+    parser.add_argument(
+        "--group-by",
+        nargs="+",
+        choices=GROUP_FIELDS,
+        help="결과를 묶을 meta 필드 (--testset 기본: category caseKey)"
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="출력 디렉토리의 benchmark_results.jsonl에 이미 기록된 테스트는 건너뛰고 이어서 실행"
+    )
+
+    parser.add_argument(
+        "--keep-alive",
+        default="10m",
+        help="Ollama keep_alive (예: 10m, -1=영구, none=서버 기본값)"
+    )
+    parser.add_argument("--retries", type=int, default=2, help="일시적 오류 재시도 횟수")
+    parser.add_argument("--retry-backoff", type=float, default=0.5, help="재시도 백오프 기본 간격(초)")
+    parser.add_argument("--url", default=OLLAMA_HOST, help="Ollama 서버 주소")
+    parser.add_argument(
+        "--mock",
+        action="store_true",
+        help="내장 가짜 Ollama 서버로 실행 (GPU/모델 없이 하네스 테스트)"
+    )
+    parser.add_argument(
+        "--sampling-seed",
+        type=int,
+        help="샘플링 seed (회차마다 seed+trial, 지정하면 같은 설정의 응답을 재현 가능)"
+    )
+    parser.add_argument(
+        "--cache-mode",
+        choices=CACHE_MODES,
+        default="off",
+        help="응답 캐시: off(기본) / read(적중 시 사용) / write(적중 시 사용 + 새 결과 저장) / refresh(항상 새로 생성해 덮어씀)"
+    )
+    parser.add_argument("--cache-path", default="./benchmark_cache/responses.sqlite", help="응답 캐시 파일 경로")
+    parser.add_argument("--cache-max-mb", type=float, default=512, help="응답 캐시 최대 크기(MB), 넘으면 LRU 삭제")
+    add_mock_arguments(parser)
+
+    subparsers = parser.add_subparsers(dest="command")
+
+    load_parser = subparsers.add_parser("loadtest", help="동시 플레이어 부하 테스트")
+    load_parser.add_argument("--model", default="aya:8b", help="테스트할 모델")
+    load_parser.add_argument(
+        "--users",
+        nargs="+",
+        type=int,
+        default=[1, 2, 4, 8, 16],
+        help="단계별 가상 사용자 수"
+    )
+    load_parser.add_argument(
+        "--think-time",
+        type=float,
+        default=10.0,
+        help="사용자 1명이 말을 거는 평균 간격(초)"
+    )
+    load_parser.add_argument("--duration", type=float, default=60.0, help="단계별 부하 시간(초)")
+    load_parser.add_argument("--max-in-flight", type=int, default=256, help="최대 동시 요청 수")
+    load_parser.add_argument("--timeout", type=int, default=120, help="요청 타임아웃(초)")
+    load_parser.add_argument("--stream", action="store_true", help="스트리밍 모드로 요청")
+    load_parser.add_argument("--seed", type=int, default=42, help="도착 시각 난수 시드")
+    load_parser.add_argument("--output", default="./benchmark_output", help="결과 저장 디렉토리")
+
+    compare_parser = subparsers.add_parser("compare", help="두 벤치마크 실행 비교 (회귀 검사)")
+    compare_parser.add_argument("baseline", help="기준 benchmark_results.json (또는 출력 디렉토리)")
+    compare_parser.add_argument("candidate", help="후보 benchmark_results.json (또는 출력 디렉토리)")
+    compare_parser.add_argument("--max-latency-increase", type=float, default=10.0,
+                                help="허용 p50/p90 지연 증가율 (%%)")
+    compare_parser.add_argument("--max-tps-drop", type=float, default=10.0,
+                                help="허용 디코드 속도 감소율 (%%)")
+    compare_parser.add_argument("--max-rate-drop", type=float, default=5.0,
+                                help="허용 한국어/어미 비율 하락 (%%p)")
+    compare_parser.add_argument("--alpha", type=float, default=0.05, help="유의수준")
+    compare_parser.add_argument("--report", help="비교 결과 JSON 저장 경로")
+
+    rescore_parser = subparsers.add_parser("rescore", help="기존 결과/데이터셋 오프라인 재채점")
+    rescore_parser.add_argument(
+        "input",
+        help="benchmark_results.jsonl/.json, 벤치마크 출력 디렉토리, 또는 데이터셋 JSONL (예: ../../CombData/dataset.jsonl)"
+    )
+    rescore_parser.add_argument("--output", help="채점된 JSONL 경로 (기본: 입력 옆 *_rescored.jsonl)")
+    rescore_parser.add_argument(
+        "--group-by",
+        nargs="+",
+        choices=GROUP_FIELDS,
+        default=list(RESCORE_GROUP_FIELDS),
+        help="집계할 meta 필드 (기본: ageLevel moodTag affectionTier)"
+    )
+    rescore_parser.add_argument("--workers", type=int, help="채점 프로세스 수 (기본: CPU 코어 수)")
+    rescore_parser.add_argument("--chunk-size", type=int, default=1000, help="프로세스에 한 번에 넘길 레코드 수")
+
+    sweep_parser = subparsers.add_parser(
+        "sweep",
+        help="모델 × 샘플링 옵션 스윕 (--models/--testset/--concurrency/--repeat 등은 공통 옵션 사용)"
+    )
+    sweep_parser.add_argument("--space", required=True, help="탐색 공간 JSON (예: sweeps/sampling_grid.json)")
+    sweep_parser.add_argument("--search", choices=["grid", "random"], default="grid", help="탐색 방식")
+    sweep_parser.add_argument("--samples", type=int, default=8, help="무작위 탐색 조합 수")
+    sweep_parser.add_argument("--search-seed", type=int, default=0, help="무작위 탐색 난수 시드")
+
+    prefix_parser = subparsers.add_parser(
+        "prefix",
+        help="프롬프트 레이아웃(dynamic_first/static_first)별 prefill 시간 비교 (--models/--testset 공통 옵션 사용)"
+    )
+    prefix_parser.add_argument("--rounds", type=int, default=3, help="레이아웃별 블록 반복 횟수 (라운드마다 순서 교대)")
+    prefix_parser.add_argument("--cases", type=int, help="사용할 케이스 수 (기본: 전체)")
+
+    control_parser = subparsers.add_parser(
+        "control",
+        help="CONTROL JSON vs 압축 형식의 프롬프트 토큰 수/prefill 비교 (--testset 기본: ../../CombData/testset.jsonl)"
+    )
+    control_parser.add_argument("--rounds", type=int, default=2, help="케이스 세트 반복 횟수")
+    control_parser.add_argument("--cases", type=int, help="사용할 케이스 수 (기본: 전체)")
 
     args = parser.parse_args()
 
+    if args.command == "compare":
+        sys.exit(run_compare_command(args))
+
+    if args.command == "rescore":
+        run_rescore_command(args)
+        return
+
+    if args.mock:
+        _, mock_url = start_mock_server(config_from_args(args))
+        print(f"Mock Ollama server: {mock_url}")
+        set_ollama_host(mock_url)
+    else:
+        set_ollama_host(args.url)
+
+    if args.command == "loadtest":
+        configure_client(args, pool_size=args.max_in_flight)
+        run_load_command(args)
+        return
+
+    configure_client(args, pool_size=max(args.concurrency, 1))
+    configure_cache(args)
+
+    if args.command == "sweep":
+        run_sweep_command(args)
+        return
+
+    if args.command == "prefix":
+        run_prefix_command(args)
+        return
+
+    if args.command == "control":
+        run_control_command(args)
+        return
+
     print("CatTalk2D Model Benchmark")
     print(f"Models: {', '.join(args.models)}")
     print(f"Output: {args.output}")
+    print(f"Concurrency: {args.concurrency}")
 
-    run_benchmark(args.models, args.output)
+    run_benchmark(args.models, args.output, args.concurrency, args.stream,
+                  warmup=not args.no_warmup, repeat=args.repeat,
+                  testset=args.testset, group_by=args.group_by, resume=args.resume,
+                  seed=args.sampling_seed)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,747 @@
+#!/usr/bin/env python3
+"""
+CatTalk2D 고양이다움 점수 (CatLikenessScorer 파이썬 포팅)
+- Tools/CatDevTools/Services/Scoring/CatLikenessScorer.cs 규칙을 그대로 옮김 (docs/cat_scoring_rules.md 참고)
+- 기존 7요소(Routine/Need/Trust/Tsundere/Sensitivity/Monologue/Action) + v2 4요소, 140점 → 100점 정규화
+- 모든 고정 키워드를 하나의 정규식(접두사 트리 형태)으로 한 번만 컴파일하고,
+  응답마다 텍스트를 한 번만 스캔해 등장한 키워드 집합을 구한 뒤 규칙은 집합 조회로 평가
+- score_batch()로 응답 목록을 한 번에 채점 (같은 응답 텍스트는 스캔 결과 재사용)
+- 벤치마크 기본 품질 검사(한국어 여부, 고양이 어미)도 여기서 제공
+"""
+
+import argparse
+import json
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Iterable, Optional, Sequence, Union
+
+# ============================================================
+# 키워드 사전 (CatScoreKeywords.cs + CatLikenessScorer.cs 인라인 목록)
+# 모든 키워드는 C#과 같이 부분 문자열(Contains)로 매칭
+# ============================================================
+
+KEYWORDS = {
+    # 1. RoutineConsistency
+    "NightDawn.Strong": ("우다다", "후다닥", "질주", "폴짝", "점프", "사냥", "잡아", "쫓아",
+                         "뛰어", "달려", "신나", "텐션", "에너지"),
+    "NightDawn.Weak": ("놀자", "뛰자", "장난", "장난감", "움직", "활동"),
+    "NightDawn.Contradiction": ("너무 졸려", "그냥 잘래", "잠만", "나른", "늘어져", "기운 없어"),
+    "Afternoon.Strong": ("졸려", "하품", "잠", "누울래", "눈 감겨", "나른"),
+    "Afternoon.Weak": ("귀찮", "가만히", "쉬자", "멍", "가만", "잠깐만", "늘어져"),
+    "Afternoon.Contradiction": ("우다다", "뛰자", "달려", "지금 놀자", "신나"),
+    "DeepNight.Strong": ("조용히", "자야", "시끄러워", "말걸지마", "하악"),
+    "DeepNight.Weak": ("짜증", "귀찮", "피곤"),
+    "DeepNight.Contradiction": ("신나", "놀자", "달려", "뛰자", "우다다"),
+    "Morning.Strong": ("기지개", "일어났다", "밥", "배고", "아침", "일어나"),
+    "Morning.Weak": ("눈 떠", "깼다", "움직", "활동"),
+    "Evening.Strong": ("보고싶었", "기다렸", "왔다", "집에", "간식", "저녁"),
+    "Evening.Weak": ("같이", "옆에", "놀자", "심심했"),
+    "Feeding.Strong": ("밥", "사료", "간식", "츄르", "캔", "먹자", "먹을래", "배고파",
+                       "허기", "줬으면", "더 줘", "또 줘", "빨리", "지금", "당장", "얼른",
+                       "기다렸어", "달라"),
+    "Feeding.Contradiction": ("배 안 고파", "난 괜찮아", "밥 필요 없어", "배불러"),
+
+    # 2. NeedPriority
+    "NeedFood.Match": ("밥", "사료", "간식", "츄르", "먹", "배고", "허기", "배고파",
+                       "먹을래", "더 줘", "캔", "사냥", "잡아먹"),
+    "NeedPlay.Match": ("놀자", "장난감", "공", "낚싯대", "레이저", "사냥", "잡아", "쫓아",
+                       "던져", "같이", "심심", "재밌"),
+    "NeedPlay.Mismatch": ("잠", "쉬자", "그냥 가만히", "졸려"),
+    "NeedRest.Match": ("졸려", "잠", "쉬자", "하품", "누울래", "가만히", "피곤",
+                       "눈 감겨", "기운 없어", "나른"),
+    "NeedRest.Mismatch": ("놀자", "뛰자", "우다다", "신나게", "달려"),
+    "NeedAffection.Match": ("옆에", "같이", "보고", "좋아", "기대", "안아", "만져", "쓰다듬",
+                            "여기 와", "있어줘", "따뜻", "편해", "골골", "그르릉"),
+    "NeedAffection.Mismatch": ("저리 가", "귀찮아", "나가", "혼자", "건들지마"),
+
+    # 3. TrustAlignment
+    "TrustLow.Match": ("가까이 오지마", "저리", "싫어", "그만", "건드리지마", "만지지마",
+                       "하악", "물어", "할퀴", "화난다", "짜증", "나가", "꺼져", "내 자리"),
+    "TrustLow.Mismatch": ("사랑해", "최고야", "완전 좋아", "평생 같이", "안아줘요",
+                          "보고싶었어", "너밖에 없어", "영원히"),
+    "TrustMid.Match": ("괜찮아", "잠깐", "조금만", "그냥", "나쁘진 않아", "천천히",
+                       "들어와", "만져도 돼", "오늘은 봐줄게"),
+    "TrustHigh.Match": ("옆에 있어줘", "같이 있어", "만져줘", "쓰다듬어줘", "안아줘",
+                        "여기 와", "기대도 돼", "편해", "좋아", "그르릉", "골골"),
+    "TrustHigh.Mismatch": ("나가", "꺼져", "싫어", "만지지마"),
+
+    # 4. TsundereIndependence
+    "Tsundere.Match": ("딱히", "착각하지마", "나쁘진 않아", "그냥", "어쩔 수 없이",
+                       "오늘만", "가끔", "내가 원할 때", "잠깐만", "뭐", "흥"),
+    "Tsundere.Independence": ("혼자 있을래", "내버려 둬", "가만히 둘래", "내 자리",
+                              "조용히", "혼자가 편해"),
+    "Tsundere.Mismatch": ("너무 사랑해", "평생", "영원히", "절대", "완전 내꺼"),
+
+    # 5. SensitivityTiming
+    "Sensitivity.TiredPetReject": ("싫어", "하지마", "그만", "만지지마", "건드리지마",
+                                   "피곤해", "귀찮아", "하악"),
+    "Sensitivity.StressedTalkReject": ("짜증", "지금 말 걸지마", "귀찮", "시끄러워", "조용히",
+                                       "그만", "화났어", "건들지마"),
+    "Sensitivity.TooFriendly": ("괜찮아~", "사랑해~", "상담해줄게", "도와줄게", "이야기해봐"),
+
+    # 6. MonologueObservation
+    "Monologue.Match": ("흠", "음…", "냥…", "으음", "그냥", "뭐지", "이상해", "재밌네",
+                        "…", "냥", "흥"),
+    "Observation.Match": ("창밖", "새", "바람", "소리", "움직", "발소리", "그림자", "빛",
+                          "햇빛", "밖에", "문", "창문", "커튼", "복도"),
+
+    # 7. ActionLanguage
+    "ActionIgnore.Match": ("훽", "돌아섬", "그냥 감", "가버림", "도망", "피함", "외면", "삐딱"),
+    "ActionSleepy.Match": ("하품", "기지개", "쿨쿨", "잠든다", "누움", "말아잠", "눈 감음"),
+    "ActionActive.Match": ("우다다", "후다닥", "폴짝", "쾅쾅", "뛰어다님", "질주", "점프"),
+    "ActionGrooming.Match": ("그루밍", "핥", "세수", "털", "발로", "얼굴 닦"),
+
+    # 사람 같은 문장 감점
+    "HumanLike.Penalty": ("제가", "당신", "고객님", "문의", "상담", "도와드릴게요",
+                          "해결책", "분석해보면", "하는 것이 좋습니다", "힘들었겠네요",
+                          "감정을 인정해요", "논리적으로", "결론적으로", "요약하면",
+                          "걱정하지 마세요", "이해합니다", "말씀하신", "질문에 대해"),
+
+    # 9. AgeExpression (v2)
+    "Age.child.Match": ("냐", "미야", "모르겠", "뭐야", "무서", "엄마", "놀아줘", "배고파"),
+    "Age.child.Mismatch": ("당연하지", "알겠어", "그래서", "왜냐하면", "생각해보면"),
+    "Age.teen.Match": ("흥", "싫어", "왜", "귀찮", "뭐", "알아서", "몰라", "내 맘이야"),
+    "Age.teen.Mismatch": ("네", "알겠습니다", "감사합니다"),
+    "Age.adult.Match": ("그래", "좋아", "알겠", "그러지", "뭐", "..."),
+    "Age.adult.Mismatch": ("냐냐", "미야미야", "놀아줘", "무서워"),
+
+    # 10. EmotionCoherence (v2)
+    "Mood.happy.Match": ("좋아", "행복", "기분 좋", "신나", "놀자", "골골", "같이"),
+    "Mood.happy.Mismatch": ("싫", "짜증", "귀찮", "가", "하악"),
+    "Mood.stressed.Match": ("짜증", "싫", "시끄러", "건드리지", "가", "혼자"),
+    "Mood.stressed.Mismatch": ("좋아", "행복", "놀자", "기분 좋"),
+    "Mood.tired.Match": ("졸려", "피곤", "자고 싶", "귀찮", "나중에", "쉬"),
+    "Mood.tired.Mismatch": ("놀자", "신나", "우다다", "뛰"),
+    "Mood.hungry.Match": ("밥", "배고", "먹", "굶", "언제 줘"),
+
+    # 11. ContextAwareness (v2)
+    "Behavior.avoiding": ("싫", "가", "안 해", "만지지", "저리"),
+    "Behavior.affectionate": ("좋아", "골골", "부비", "같이", "옆에"),
+    "Behavior.seeking": ("줘", "달라", "원해", "배고", "심심", "놀아"),
+    "Hint.zoomies": ("우다다", "뛰", "달리", "질주"),
+    "Hint.yawn": ("하품", "졸려", "입 벌"),
+    "Hint.food_seek": ("밥", "배고", "먹", "간식"),
+    "Hint.turn_away": ("등 돌", "외면", "무시"),
+    "Hint.purr": ("골골", "그르렁", "좋아"),
+    "Hint.approach": ("다가", "옆에", "가까이"),
+    "Hint.curious": ("뭐야", "궁금", "신기"),
+    "Hint.stretch": ("기지개", "스트레칭", "쭉"),
+    "Hint.rest": ("쉬", "휴식", "눕"),
+    "Hint.sleep": ("자", "잠", "졸"),
+    "Hint.hiss": ("하악", "위협", "경고"),
+    "Hint.ignore": ("무시", "씹", "관심 없"),
+}
+
+# 영어 단어 (일부 일상적 외래어는 허용)
+ENGLISH_PATTERN = re.compile(r'[a-zA-Z]{2,}')
+ALLOWED_ENGLISH = {'ok', 'tv', 'pc', 'sns'}
+
+# 고양이 어미
+CAT_SUFFIXES = ('냥', '냐', '야옹', '먀')
+
+# 140점 만점(기존 100 + 확장 40) → 100점 만점
+RAW_MAX = 140
+
+REASON_PREFIX = {
+    "Routine": "[Routine]",
+    "Need": "[Need]",
+    "Trust": "[Trust]",
+    "Tsundere": "[Tsundere]",
+    "Sensitivity": "[Sensitivity]",
+    "Monologue": "[Monologue]",
+    "Action": "[Action]",
+    "HumanLike": "[HumanLike]",
+    "Memory": "[Memory]",
+    "AgeExpression": "[AgeExpr]",
+    "EmotionCoherence": "[Emotion]",
+    "ContextAwareness": "[Context]",
+}
+
+
+# ============================================================
+# 다중 키워드 매처
+# ============================================================
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """
+    키워드 목록을 접두사 트리 형태의 정규식으로 변환 (예: 잠, 잠깐, 잠깐만 → 잠(?:깐(?:만)?)?)
+    - 정규식 엔진이 후보를 하나씩 시도하지 않고 문자 단위로 분기하므로 키워드 수가 늘어도 빠름
+    - 각 위치에서 가장 긴 키워드를 매칭
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node: dict) -> str:
+        end = "" in node
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if end:
+            return body + "?" if len(branches) == 1 and len(body) == 1 else "(?:" + body + ")?"
+        return body
+
+    return build(trie)
+
+
+class KeywordMatcher:
+    """
+    여러 키워드를 한 번의 스캔으로 찾는 매처
+    - 겹치는 키워드도 모두 찾도록 모든 위치에서 전방탐색((?=...))으로 가장 긴 키워드를 잡고,
+      그 키워드에 포함된 짧은 키워드(예: '잠깐만' 안의 '잠', '잠깐', '깐')를 함께 추가
+    - 결과는 C#의 keywords.Where(k => text.Contains(k))와 같은 집합
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        unique = sorted({k.lower() for k in keywords if k})
+        self.pattern = re.compile("(?=(" + _trie_pattern(unique) + "))")
+        self.contained = {k: frozenset(other for other in unique if other in k) for k in unique}
+
+    def find(self, text: str) -> frozenset:
+        """text(소문자)에 등장하는 키워드 집합"""
+        found = set()
+        for match in self.pattern.finditer(text):
+            found |= self.contained[match.group(1)]
+        return frozenset(found)
+
+
+# 모듈 로드 시 한 번만 컴파일
+MATCHER = KeywordMatcher(k for words in KEYWORDS.values() for k in words)
+
+
+# ============================================================
+# 입력/출력
+# ============================================================
+
+@dataclass
+class ScoringControl:
+    """채점 입력 (CatLikenessScorer.ScoringControl과 같은 필드/기본값)"""
+    age_level: str = "teen"
+    energy: float = 50
+    stress: float = 50
+    affection_tier: str = "mid"
+    trust_tier: str = "mid"
+    mood_summary: str = "neutral"
+    time_block: str = "afternoon"
+    is_feeding_window: bool = False
+    need_top1: str = "none"
+    behavior_hint: str = ""
+    behavior_type: str = "Neutral"
+    last_interaction_type: str = ""
+    memory_recent_summary: str = ""
+    memory_habit: str = ""
+
+
+@dataclass
+class ScoreResult:
+    """채점 결과"""
+    score_total: int
+    breakdown: dict
+    reasons_debug: list[str] = field(default_factory=list)
+    reasons_user: list[str] = field(default_factory=list)
+    matched_keywords: list[str] = field(default_factory=list)
+
+
+def control_from_meta(meta: Optional[dict]) -> ScoringControl:
+    """
+    테스트셋 meta / CONTROL 딕셔너리를 ScoringControl로 변환
+    - timeBlock/needTop1/trustTier가 없으면 DevTools(MainViewModel.ConvertToScoringControl)와 같이
+      moodTag/affectionTier에서 추정
+    """
+    meta = meta or {}
+    mood = str(meta.get("moodTag") or meta.get("moodSummary") or "neutral").lower()
+    affection = str(meta.get("affectionTier") or "mid").lower()
+    state = meta.get("stateSnapshot") or {}
+
+    time_block = meta.get("timeBlock") or {
+        "tired": "afternoon", "sleepy": "afternoon",
+        "excited": "night", "playful": "night",
+        "grumpy": "deepnight",
+    }.get(mood, "afternoon")
+
+    need_top1 = meta.get("needTop1") or {
+        "hungry": "food",
+        "bored": "play", "playful": "play", "excited": "play",
+        "tired": "rest", "sleepy": "rest",
+        "lonely": "affection",
+    }.get(mood, "none")
+
+    trust_tier = meta.get("trustTier") or (affection if affection in ("low", "high") else "mid")
+
+    return ScoringControl(
+        age_level=str(meta.get("ageLevel") or "teen"),
+        energy=state.get("energy", meta.get("energy", 50)),
+        stress=state.get("stress", meta.get("stress", 50)),
+        affection_tier=affection,
+        trust_tier=trust_tier,
+        mood_summary=mood,
+        time_block=time_block,
+        is_feeding_window=bool(meta.get("isFeedingWindow", False)),
+        need_top1=need_top1,
+        behavior_hint=meta.get("behaviorHint") or "",
+        behavior_type=meta.get("behaviorType") or "Neutral",
+        last_interaction_type=meta.get("lastInteractionType") or "",
+        memory_recent_summary=meta.get("memoryRecentSummary") or "",
+        memory_habit=meta.get("memoryHabit") or "",
+    )
+
+
+# ============================================================
+# 채점
+# ============================================================
+
+class _Evaluation:
+    """응답 1건 채점 상태 (found: 응답에 등장한 키워드 집합)"""
+
+    def __init__(self, control: ScoringControl, text: str, found: frozenset):
+        self.control = control
+        self.text = text
+        self.found = found
+        self.reasons = []          # (category, delta, message, is_base)
+        self.keywords = []
+
+    def count(self, name: str) -> int:
+        return sum(1 for k in KEYWORDS[name] if k in self.found)
+
+    def matched(self, name: str) -> list[str]:
+        return [k for k in KEYWORDS[name] if k in self.found]
+
+    def reason(self, category: str, delta: int, message: str, is_base: bool = False):
+        self.reasons.append((category, delta, message, is_base))
+
+    def keep(self, name: str) -> list[str]:
+        """매칭된 키워드를 기록하고 반환"""
+        matched = self.matched(name)
+        self.keywords.extend(matched)
+        return matched
+
+    # 1. RoutineConsistency (0~20)
+    def routine(self) -> int:
+        score = 0
+        has_match = False
+
+        if self.control.is_feeding_window:
+            if self.count("Feeding.Strong"):
+                score += 12
+                has_match = True
+                self.reason("Routine", 12, "밥시간에 음식 언급(+12)")
+                self.keep("Feeding.Strong")
+            elif self.count("Feeding.Contradiction"):
+                score -= 6
+                self.reason("Routine", -6, "밥시간인데 음식 무관심(-6)")
+
+        block = self.control.time_block.lower()
+        # (키워드 그룹, strong 점수, weak 점수, 모순 감점, strong 설명, weak 설명, 모순 설명)
+        rules = {
+            "night": ("NightDawn", 16, 10, 8, "Night/Dawn 활동성 키워드", "Night/Dawn 약한 활동",
+                      "Night인데 졸림/나른 톤"),
+            "afternoon": ("Afternoon", 16, 10, 10, "Afternoon 졸림 키워드", "Afternoon 무심 키워드",
+                          "Afternoon인데 '우다다/신나' 언급"),
+            "deepnight": ("DeepNight", 16, 10, 8, "DeepNight 조용/짜증 키워드", "DeepNight 약한 짜증",
+                          "DeepNight인데 '신나/놀자' 언급"),
+            "morning": ("Morning", 14, 8, 0, "Morning 기상 키워드", "Morning 약한 활동", ""),
+            "evening": ("Evening", 14, 8, 0, "Evening 기다림/귀가 키워드", "Evening 약한 애착", ""),
+        }
+        rule = rules.get("night" if block == "dawn" else block)
+        if rule:
+            group, strong, weak, contra, strong_msg, weak_msg, contra_msg = rule
+            if self.count(f"{group}.Strong"):
+                score += strong
+                has_match = True
+                matched = self.keep(f"{group}.Strong")
+                self.reason("Routine", strong, f"{strong_msg} '{','.join(matched[:2])}'(+{strong})")
+            elif self.count(f"{group}.Weak"):
+                score += weak
+                has_match = True
+                matched = self.keep(f"{group}.Weak")
+                self.reason("Routine", weak, f"{weak_msg} '{','.join(matched[:2])}'(+{weak})")
+            if contra and self.count(f"{group}.Contradiction"):
+                score -= contra
+                self.reason("Routine", -contra, f"{contra_msg}(-{contra})")
+
+        if not has_match:
+            score += 6
+            self.reason("Routine", 6, "시간대 특정 키워드 없음 (기본 +6)", is_base=True)
+
+        return _clamp(score, 0, 20)
+
+    # 2. NeedPriority (0~25)
+    def need(self) -> int:
+        need = self.control.need_top1.lower()
+        group = {"food": "NeedFood", "play": "NeedPlay", "rest": "NeedRest",
+                 "affection": "NeedAffection"}.get(need)
+        if group is None:
+            self.reason("Need", 12, "needTop1=none, 기본값(12)", is_base=True)
+            return 12
+
+        if self.count(f"{group}.Match"):
+            matched = self.keep(f"{group}.Match")
+            self.reason("Need", 25, f"needTop1={need}이고 '{','.join(matched[:2])}' 언급(+25)")
+            return 25
+
+        if need == "food":
+            # 음식 욕구는 언급이 없으면 바로 감점 (NeedFood.Mismatch는 C#에서도 사용하지 않음)
+            self.reason("Need", -20, "needTop1=food인데 음식 언급 없음(-20)")
+            return 5
+
+        if self.count(f"{group}.Mismatch"):
+            mismatch_msg = {"play": "잠/쉬자만", "rest": "놀자/우다다만", "affection": "거절만"}[need]
+            self.reason("Need", -20, f"needTop1={need}인데 {mismatch_msg} 언급(-20)")
+            return 5
+
+        self.reason("Need", 12, f"needTop1={need}, 중립 응답(12)", is_base=True)
+        return 12
+
+    # 3. TrustAlignment (0~20)
+    def trust(self) -> int:
+        score = 10
+        tier = self.control.trust_tier.lower()
+
+        if tier == "low":
+            if self.count("TrustLow.Match"):
+                score += 10
+                matched = self.keep("TrustLow.Match")
+                self.reason("Trust", 10, f"trust=low이고 '{','.join(matched[:2])}' 경계 표현(+10)")
+            if self.count("TrustLow.Mismatch"):
+                score -= 12
+                matched = self.matched("TrustLow.Mismatch")
+                self.reason("Trust", -12, f"trust=low인데 '{','.join(matched[:2])}' 과한 애정(-12)")
+        elif tier == "mid":
+            if self.count("TrustMid.Match"):
+                score += 6
+                matched = self.keep("TrustMid.Match")
+                self.reason("Trust", 6, f"trust=mid이고 '{','.join(matched[:2])}' 중립적 허용(+6)")
+            else:
+                self.reason("Trust", 10, "trust=mid, 기본값(10)", is_base=True)
+        elif tier == "high":
+            if self.count("TrustHigh.Match"):
+                score += 10
+                matched = self.keep("TrustHigh.Match")
+                self.reason("Trust", 10, f"trust=high이고 '{','.join(matched[:2])}' 애착 표현(+10)")
+            if self.count("TrustHigh.Mismatch") > 1:  # 1회는 허용, 반복 시 감점
+                score -= 6
+                self.reason("Trust", -6, "trust=high인데 과격 거절 반복(-6)")
+
+        return _clamp(score, 0, 20)
+
+    # 4. TsundereIndependence (0~10)
+    def tsundere(self) -> int:
+        score = 4
+        if self.count("Tsundere.Match"):
+            score += 3
+            self.reason("Tsundere", 3, "츤데레 표현(+3)")
+            self.keep("Tsundere.Match")
+        if self.count("Tsundere.Independence"):
+            score += 3
+            self.reason("Tsundere", 3, "독립성 표현(+3)")
+            self.keep("Tsundere.Independence")
+        if self.count("Tsundere.Mismatch"):
+            score -= 4
+            self.reason("Tsundere", -4, "과한 감정 표현(-4)")
+        return _clamp(score, 0, 10)
+
+    # 5. SensitivityTiming (0~10)
+    def sensitivity(self) -> int:
+        score = 5
+        interaction = self.control.last_interaction_type.lower()
+        tired_pet = self.control.energy < 30 and "pet" in interaction
+        stressed_talk = self.control.stress > 70 and "talk" in interaction
+
+        if tired_pet and self.count("Sensitivity.TiredPetReject"):
+            score += 5
+            self.reason("Sensitivity", 5, "피곤+Pet에서 거부 반응(+5)")
+            self.keep("Sensitivity.TiredPetReject")
+        if stressed_talk and self.count("Sensitivity.StressedTalkReject"):
+            score += 5
+            self.reason("Sensitivity", 5, "스트레스+Talk에서 짜증 반응(+5)")
+            self.keep("Sensitivity.StressedTalkReject")
+        if (tired_pet or stressed_talk) and self.count("Sensitivity.TooFriendly"):
+            score -= 5
+            self.reason("Sensitivity", -5, "민감 상황인데 너무 상냥(-5)")
+        return _clamp(score, 0, 10)
+
+    # 6. MonologueObservation (0~5)
+    def monologue(self) -> int:
+        score = 0
+        if self.count("Monologue.Match"):
+            score += 2
+            self.reason("Monologue", 2, "혼잣말/중얼(+2)")
+            self.keep("Monologue.Match")
+        if self.count("Observation.Match"):
+            score += 3
+            self.reason("Monologue", 3, "관찰 표현(+3)")
+            self.keep("Observation.Match")
+        return _clamp(score, 0, 5)
+
+    # 7. ActionLanguage (0~10)
+    def action(self) -> int:
+        score = 0
+        for name, points, message in (
+            ("ActionIgnore.Match", 3, "무시/떠남 행동(+3)"),
+            ("ActionSleepy.Match", 3, "졸림 행동(+3)"),
+            ("ActionActive.Match", 2, "활동 행동(+2)"),
+            ("ActionGrooming.Match", 2, "그루밍 행동(+2)"),
+        ):
+            if self.count(name):
+                score += points
+                self.reason("Action", points, message)
+                self.keep(name)
+        return _clamp(score, 0, 10)
+
+    # 8. Memory (0~10) - 요약문에서 뽑은 키워드는 응답마다 달라 매처 대신 직접 검사
+    def memory(self) -> int:
+        score = 5
+        if self.control.memory_recent_summary:
+            words = _summary_keywords(self.control.memory_recent_summary)
+            matched = [w for w in words if w in self.text]
+            if matched:
+                score += 3
+                self.reason("Memory", 3, "최근 상호작용 반영(+3)")
+                self.keywords.extend(matched)
+        if self.control.memory_habit:
+            words = _summary_keywords(self.control.memory_habit)
+            if any(w in self.text for w in words):
+                score += 2
+                self.reason("Memory", 2, "습관 반영(+2)")
+        return _clamp(score, 0, 10)
+
+    # 9. AgeExpression (0~10)
+    def age_expression(self) -> int:
+        score = 5
+        age = self.control.age_level.lower()
+        points = {"child": (4, 4, "아기"), "teen": (3, 3, "청소년"), "adult": (3, 2, "성인")}.get(age)
+        if points:
+            bonus, penalty, label = points
+            if self.count(f"Age.{age}.Match"):
+                score += bonus
+                self.reason("AgeExpression", bonus, f"{label} 고양이 말투(+{bonus})")
+                self.keep(f"Age.{age}.Match")
+            if self.count(f"Age.{age}.Mismatch"):
+                score -= penalty
+                self.reason("AgeExpression", -penalty, f"{label} 고양이에 맞지 않는 말투(-{penalty})")
+        return _clamp(score, 0, 10)
+
+    # 10. EmotionCoherence (0~10)
+    def emotion_coherence(self) -> int:
+        score = 6
+        mood = self.control.mood_summary.lower()
+        group = {"stressed": "stressed", "angry": "stressed", "tired": "tired", "sleepy": "tired",
+                 "happy": "happy", "hungry": "hungry"}.get(mood)
+
+        if group == "hungry":
+            if self.count("Mood.hungry.Match"):
+                score += 4
+                self.reason("EmotionCoherence", 4, "배고픔 표현 일치(+4)")
+        elif group:
+            match_msg, mismatch_msg = {
+                "happy": ("기분 좋음과 일치(+3)", "기분 좋은데 부정적 톤(-4)"),
+                "stressed": ("스트레스/화남과 일치(+3)", "스트레스인데 긍정적 톤(-4)"),
+                "tired": ("피곤함과 일치(+3)", "피곤한데 활동적 톤(-4)"),
+            }[group]
+            if self.count(f"Mood.{group}.Match"):
+                score += 3
+                self.reason("EmotionCoherence", 3, match_msg)
+            if self.count(f"Mood.{group}.Mismatch"):
+                score -= 4
+                self.reason("EmotionCoherence", -4, mismatch_msg)
+        return _clamp(score, 0, 10)
+
+    # 11. ContextAwareness (0~10)
+    def context_awareness(self) -> int:
+        score = 5
+        hint = self.control.behavior_hint
+        if hint and f"Hint.{hint.lower()}" in KEYWORDS and self.count(f"Hint.{hint.lower()}"):
+            score += 3
+            self.reason("ContextAwareness", 3, f"BehaviorHint '{hint}' 반영(+3)")
+            self.keep(f"Hint.{hint.lower()}")
+
+        behavior = self.control.behavior_type.lower()
+        messages = {"avoiding": "회피 행동 반영(+2)", "affectionate": "애정 행동 반영(+2)",
+                    "seeking": "요구 행동 반영(+2)"}
+        if behavior in messages and self.count(f"Behavior.{behavior}"):
+            score += 2
+            self.reason("ContextAwareness", 2, messages[behavior])
+        return _clamp(score, 0, 10)
+
+    # 사람 같은 문장 감점 (키워드당 5점, 최대 15점)
+    def human_penalty(self) -> int:
+        count = self.count("HumanLike.Penalty")
+        if not count:
+            return 0
+        penalty = min(count * 5, 15)
+        self.reason("HumanLike", -penalty, f"사람 같은 문장(-{penalty})")
+        self.keep("HumanLike.Penalty")
+        return penalty
+
+
+def _clamp(value: int, low: int, high: int) -> int:
+    return max(low, min(high, value))
+
+
+def _summary_keywords(summary: str) -> list[str]:
+    """요약문에서 2글자 이상 단어 최대 5개 (C# ExtractKeywordsFromSummary와 동일)"""
+    return [w.lower() for w in summary.split(" ") if len(w) >= 2][:5]
+
+
+def _format_reason(category: str, message: str) -> str:
+    message = message.strip()
+    if message.startswith("["):
+        return message
+    prefix = REASON_PREFIX.get(category, "[Reason]")
+    return f"{prefix} {message}" if message else prefix
+
+
+def _user_reasons(reasons: list[tuple]) -> list[str]:
+    """사용자용 이유: 기본값/작은 변화(|Δ|<4) 제외, 카테고리당 2개, 전체 6개까지"""
+    result = []
+    per_category = {}
+    for category, delta, message, is_base in reasons:
+        if is_base or abs(delta) < 4:
+            continue
+        count = per_category.get(category.lower(), 0)
+        if count >= 2:
+            continue
+        if len(result) >= 6:
+            break
+        result.append(_format_reason(category, message))
+        per_category[category.lower()] = count + 1
+    return result
+
+
+def contains_english(text: str) -> bool:
+    """영어 포함 여부 확인"""
+    return any(match not in ALLOWED_ENGLISH for match in ENGLISH_PATTERN.findall(text.lower()))
+
+
+def has_cat_suffix(text: str) -> bool:
+    """고양이 어미 확인"""
+    return any(suffix in text for suffix in CAT_SUFFIXES)
+
+
+def normalize_text(text: Optional[str]) -> str:
+    """소문자 변환 + 앞뒤 공백 제거"""
+    if not text or not text.strip():
+        return ""
+    return text.lower().strip()
+
+
+def evaluate(control: ScoringControl, text: str, found: Optional[frozenset] = None) -> ScoreResult:
+    """응답 1건 채점 (found를 주면 키워드 스캔을 생략)"""
+    text = normalize_text(text)
+    if found is None:
+        found = MATCHER.find(text)
+    ev = _Evaluation(control, text, found)
+
+    breakdown = {
+        "routine": ev.routine(),
+        "need": ev.need(),
+        "trust": ev.trust(),
+        "tsundere": ev.tsundere(),
+        "sensitivity": ev.sensitivity(),
+        "monologue": ev.monologue(),
+        "action": ev.action(),
+        "memory": ev.memory(),
+        "age_expression": ev.age_expression(),
+        "emotion_coherence": ev.emotion_coherence(),
+        "context_awareness": ev.context_awareness(),
+    }
+    penalty = ev.human_penalty()
+    raw_total = sum(breakdown.values()) - penalty
+
+    return ScoreResult(
+        # C#의 (int) 변환과 같이 0 방향으로 버림
+        score_total=_clamp(int(raw_total * 100.0 / RAW_MAX), 0, 100),
+        breakdown=breakdown,
+        reasons_debug=[_format_reason(c, m) for c, _, m, _ in ev.reasons],
+        reasons_user=_user_reasons(ev.reasons),
+        matched_keywords=ev.keywords,
+    )
+
+
+def score_batch(responses: Sequence[str],
+                controls: Sequence[Union[ScoringControl, dict, None]]) -> list[ScoreResult]:
+    """
+    응답 목록 일괄 채점
+    - controls: 응답별 ScoringControl 또는 meta/CONTROL 딕셔너리 (None이면 기본값)
+    - 같은 응답 텍스트는 키워드 스캔을 한 번만 수행
+    """
+    if len(responses) != len(controls):
+        raise ValueError(f"responses({len(responses)})와 controls({len(controls)}) 길이가 다릅니다")
+
+    scans = {}
+    results = []
+    for text, control in zip(responses, controls):
+        if not isinstance(control, ScoringControl):
+            control = control_from_meta(control)
+        normalized = normalize_text(text)
+        found = scans.get(normalized)
+        if found is None:
+            found = scans[normalized] = MATCHER.find(normalized)
+        results.append(evaluate(control, normalized, found))
+    return results
+
+
+def load_responses(path: str) -> tuple[list[str], list[dict]]:
+    """
+    채점 대상 로드
+    - 테스트셋 JSONL(messages/meta): assistant 정답 응답
+    - 벤치마크 결과 JSONL(response/meta): 모델 응답 (워밍업/오류 제외)
+    """
+    responses, metas = [], []
+    with open(path, "r", encoding="utf-8-sig") as f:
+        for line_no, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                print(f"  [scorer] {path}:{line_no} 손상된 줄 건너뜀")
+                continue
+
+            if "messages" in record:
+                text = next((m.get("content", "") for m in record["messages"]
+                             if m.get("role") == "assistant"), None)
+            elif record.get("error") or record.get("is_warmup"):
+                continue
+            else:
+                text = record.get("response")
+            if text is None:
+                continue
+            responses.append(text)
+            metas.append(record.get("meta") or {})
+    return responses, metas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CatTalk2D 고양이다움 점수 (CatLikenessScorer 포팅)")
+    parser.add_argument("path", help="테스트셋 JSONL 또는 benchmark_results.jsonl")
+    parser.add_argument("--show", type=int, default=5, help="채점 근거를 출력할 응답 수 (기본: 5)")
+    args = parser.parse_args()
+
+    responses, metas = load_responses(args.path)
+    if not responses:
+        print("채점할 응답이 없습니다")
+        return
+
+    start = time.perf_counter()
+    results = score_batch(responses, metas)
+    elapsed = time.perf_counter() - start
+
+    for text, result in list(zip(responses, results))[:args.show]:
+        print(f"\n[{result.score_total}] {text[:60]}")
+        for reason in result.reasons_user:
+            print(f"    {reason}")
+
+    scores = [r.score_total for r in results]
+    print(f"\n응답 {len(scores)}건: 평균 {sum(scores) / len(scores):.1f}점"
+          f" (최저 {min(scores)} / 최고 {max(scores)})")
+    print(f"채점 시간: {elapsed * 1000:.1f}ms ({len(scores) / elapsed:,.0f}건/s)")
+
+
+if __name__ == "__main__":
+    main()
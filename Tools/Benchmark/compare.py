@@ -0,0 +1,231 @@
+"""
+CatTalk2D 벤치마크 회귀 비교
+- 기준(baseline) 실행과 후보(candidate) 실행의 benchmark_results.json을 비교
+- 모델별/프롬프트별 지연 백분위수, 디코드 속도, 한국어 응답률, 고양이 어미 사용률 변화 계산
+- 유의성 검정(지연: Mann-Whitney U, 비율: 두 비율 z-검정)을 통과한 모델 단위 회귀만 실패로 판정
+- 프롬프트별 비교는 참고용 (케이스 수 × 지표 수만큼 검정하므로 Bonferroni 보정한 유의수준으로 표시만 하고 게이트에는 미포함)
+- 두 실행의 케이스 인덱스별 프롬프트가 다르면(다른 테스트셋) 프롬프트별 비교를 하지 않고 비교 불가로 보고
+"""
+
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from bench_stats import latency_stats, mann_whitney_p, two_proportion_p
+from results_store import read_results, result_key
+
+
+@dataclass
+class CompareThresholds:
+    """회귀 판정 기준 (이 값을 넘고 통계적으로 유의하면 실패)"""
+    max_latency_increase_pct: float = 10.0   # p50/p90 지연 증가율 (%)
+    max_tps_drop_pct: float = 10.0           # 디코드 속도 감소율 (%)
+    max_rate_drop_pt: float = 5.0            # 한국어/어미 비율 하락 (%p)
+    alpha: float = 0.05                      # 유의수준
+
+
+def load_run(path: str) -> dict:
+    """
+    benchmark_results.json 로드 (디렉토리를 주면 그 안의 파일 사용)
+    - JSONL(benchmark_results.jsonl, rescore 출력)을 주면 같은 조합은 마지막 기록만 사용
+    """
+    run_path = Path(path)
+    if run_path.is_dir():
+        run_path = run_path / "benchmark_results.json"
+    if run_path.suffix == ".jsonl":
+        latest = {result_key(r): r for r in read_results(run_path) if not r.get("is_warmup")}
+        return {"results": list(latest.values())}
+    with open(run_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def group_results(run: dict) -> dict:
+    """모델별 (워밍업/오류 제외) 결과 목록"""
+    grouped = {}
+    for r in run.get("results", []):
+        if r.get("error") or r.get("is_warmup"):
+            continue
+        grouped.setdefault(r["model"], []).append(r)
+    return grouped
+
+
+def metrics_of(results: list[dict]) -> dict:
+    """비교용 지표 계산"""
+    latencies = [r["response_time_ms"] for r in results]
+    tps = [r["tokens_per_sec"] for r in results if r.get("tokens_per_sec") is not None]
+    stats = latency_stats(latencies)
+    return {
+        "n": len(results),
+        "latencies": latencies,
+        "p50": stats["p50"],
+        "p90": stats["p90"],
+        "p99": stats["p99"],
+        "tps": tps,
+        "avg_tps": sum(tps) / len(tps) if tps else None,
+        "korean": sum(1 for r in results if r.get("is_korean")),
+        "suffix": sum(1 for r in results if r.get("has_cat_suffix")),
+    }
+
+
+def pct_change(before: Optional[float], after: Optional[float]) -> Optional[float]:
+    if before is None or after is None or before == 0:
+        return None
+    return (after - before) / before * 100
+
+
+# compare_metrics가 수행하는 유의성 검정 수 (지연/디코드 속도/한국어/어미)
+TESTS_PER_ROW = 4
+
+
+def compare_metrics(base: dict, cand: dict, thresholds: CompareThresholds,
+                    alpha: Optional[float] = None) -> dict:
+    """두 지표 묶음 비교 → 변화량, p-value, 실패 사유 목록 (alpha: 보정된 유의수준, 기본 thresholds.alpha)"""
+    alpha = thresholds.alpha if alpha is None else alpha
+    latency_p = mann_whitney_p(base["latencies"], cand["latencies"])
+    tps_p = mann_whitney_p(base["tps"], cand["tps"]) if base["tps"] and cand["tps"] else None
+    korean_p = two_proportion_p(base["korean"], base["n"], cand["korean"], cand["n"])
+    suffix_p = two_proportion_p(base["suffix"], base["n"], cand["suffix"], cand["n"])
+
+    korean_delta = (cand["korean"] / cand["n"] - base["korean"] / base["n"]) * 100 if base["n"] and cand["n"] else None
+    suffix_delta = (cand["suffix"] / cand["n"] - base["suffix"] / base["n"]) * 100 if base["n"] and cand["n"] else None
+
+    row = {
+        "n": [base["n"], cand["n"]],
+        "p50_ms": [base["p50"], cand["p50"]],
+        "p50_change_pct": pct_change(base["p50"], cand["p50"]),
+        "p90_ms": [base["p90"], cand["p90"]],
+        "p90_change_pct": pct_change(base["p90"], cand["p90"]),
+        "p99_ms": [base["p99"], cand["p99"]],
+        "p99_change_pct": pct_change(base["p99"], cand["p99"]),
+        "latency_p_value": latency_p,
+        "tokens_per_sec": [base["avg_tps"], cand["avg_tps"]],
+        "tps_change_pct": pct_change(base["avg_tps"], cand["avg_tps"]),
+        "tps_p_value": tps_p,
+        "korean_rate_delta_pt": korean_delta,
+        "korean_p_value": korean_p,
+        "cat_suffix_rate_delta_pt": suffix_delta,
+        "cat_suffix_p_value": suffix_p,
+        "failures": [],
+    }
+
+    def significant(p: Optional[float]) -> bool:
+        return p is not None and p < alpha
+
+    for name in ("p50", "p90"):
+        change = row[f"{name}_change_pct"]
+        if change is not None and change > thresholds.max_latency_increase_pct and significant(latency_p):
+            row["failures"].append(f"{name} 지연 +{change:.1f}% (p={latency_p:.3g})")
+    if row["tps_change_pct"] is not None and -row["tps_change_pct"] > thresholds.max_tps_drop_pct \
+            and significant(tps_p):
+        row["failures"].append(f"디코드 속도 {row['tps_change_pct']:.1f}% (p={tps_p:.3g})")
+    if korean_delta is not None and -korean_delta > thresholds.max_rate_drop_pt and significant(korean_p):
+        row["failures"].append(f"한국어 응답률 {korean_delta:.1f}%p (p={korean_p:.3g})")
+    if suffix_delta is not None and -suffix_delta > thresholds.max_rate_drop_pt and significant(suffix_p):
+        row["failures"].append(f"고양이 어미 사용률 {suffix_delta:.1f}%p (p={suffix_p:.3g})")
+
+    return row
+
+
+def prompt_mismatches(base_results: list[dict], cand_results: list[dict]) -> list[int]:
+    """
+    같은 케이스 인덱스인데 프롬프트가 다른 인덱스 목록 (다른 테스트셋으로 실행했는지 확인)
+    - 전체 프롬프트 해시(prompt_sha)로 비교 — "prompt" 필드는 앞 50자 요약이라 뒷부분만 다른 케이스를 놓침
+    - prompt_sha가 없는 이전 결과 파일이면 요약끼리라도 비교
+    """
+    def prompts(results):
+        return {r.get("prompt_index", 0): r for r in results}
+
+    base_prompts = prompts(base_results)
+    cand_prompts = prompts(cand_results)
+    mismatched = []
+    for index in sorted(set(base_prompts) & set(cand_prompts)):
+        base, cand = base_prompts[index], cand_prompts[index]
+        field = "prompt_sha" if base.get("prompt_sha") and cand.get("prompt_sha") else "prompt"
+        if base.get(field) != cand.get(field):
+            mismatched.append(index)
+    return mismatched
+
+
+def compare_runs(baseline: dict, candidate: dict, thresholds: CompareThresholds) -> dict:
+    """
+    두 실행 비교
+    Returns: {"models": {모델: 비교 결과}, "prompts": {모델: {케이스 인덱스: 비교 결과}},
+              "failures": [...], "testset_mismatch": {모델: [케이스 인덱스]}}
+    - failures(게이트)는 모델 단위 비교만 포함
+    - 프롬프트별 비교의 failures는 Bonferroni 보정(alpha / 검정 수)한 참고용 표시
+    """
+    base_groups = group_results(baseline)
+    cand_groups = group_results(candidate)
+
+    report = {"models": {}, "prompts": {}, "failures": [], "testset_mismatch": {}}
+    for model in sorted(set(base_groups) & set(cand_groups)):
+        row = compare_metrics(metrics_of(base_groups[model]), metrics_of(cand_groups[model]), thresholds)
+        report["models"][model] = row
+        report["failures"].extend(f"{model}: {failure}" for failure in row["failures"])
+
+        mismatched = prompt_mismatches(base_groups[model], cand_groups[model])
+        if mismatched:
+            # 인덱스가 같아도 다른 케이스이므로 짝지어 비교하지 않음
+            report["testset_mismatch"][model] = mismatched
+            continue
+
+        # 프롬프트별 비교 (같은 케이스 인덱스끼리)
+        by_prompt = {}
+        for side, results in (("base", base_groups[model]), ("cand", cand_groups[model])):
+            for r in results:
+                by_prompt.setdefault(r.get("prompt_index", 0), {"base": [], "cand": []})[side].append(r)
+        pairs = {index: pair for index, pair in sorted(by_prompt.items()) if pair["base"] and pair["cand"]}
+        prompt_alpha = thresholds.alpha / (len(pairs) * TESTS_PER_ROW) if pairs else thresholds.alpha
+
+        prompt_rows = {}
+        for index, pair in pairs.items():
+            prompt_row = compare_metrics(metrics_of(pair["base"]), metrics_of(pair["cand"]), thresholds,
+                                         alpha=prompt_alpha)
+            prompt_row["prompt"] = pair["cand"][0].get("prompt")
+            prompt_rows[index] = prompt_row
+        report["prompts"][model] = prompt_rows
+
+    return report
+
+
+def print_report(report: dict):
+    """비교 결과 출력"""
+    def fmt(value: Optional[float], suffix: str = "", sign: bool = True) -> str:
+        if value is None:
+            return "-"
+        return f"{value:+.1f}{suffix}" if sign else f"{value:.0f}{suffix}"
+
+    print("\n" + "="*60)
+    print("BENCHMARK COMPARISON (baseline → candidate)")
+    print("="*60)
+
+    for model, row in report["models"].items():
+        print(f"\n{model}: n={row['n'][0]}→{row['n'][1]}")
+        p_value = f"{row['latency_p_value']:.3g}" if row['latency_p_value'] is not None else "-"
+        print(f"  p50 {fmt(row['p50_ms'][0], 'ms', False)}→{fmt(row['p50_ms'][1], 'ms', False)}"
+              f" ({fmt(row['p50_change_pct'], '%')})"
+              f"  p90 {fmt(row['p90_change_pct'], '%')}  p99 {fmt(row['p99_change_pct'], '%')}"
+              f"  [p={p_value}]")
+        print(f"  디코드 속도 {fmt(row['tps_change_pct'], '%')}"
+              f"  한국어 {fmt(row['korean_rate_delta_pt'], '%p')}"
+              f"  어미 {fmt(row['cat_suffix_rate_delta_pt'], '%p')}")
+
+        mismatched = report["testset_mismatch"].get(model)
+        if mismatched:
+            print(f"  경고: 케이스 {len(mismatched)}개의 프롬프트가 다름 (다른 테스트셋) — 프롬프트별 비교 생략")
+        slow = [(index, r) for index, r in report["prompts"].get(model, {}).items() if r["failures"]]
+        for index, r in slow:
+            label = " ".join((r["prompt"] or "").split())[:40]
+            print(f"  (참고) #{index} {label}: {', '.join(r['failures'])}")
+
+    print()
+    if report["testset_mismatch"]:
+        print("비교 불가: 두 실행의 테스트셋이 다릅니다 (같은 --testset으로 다시 실행하세요)")
+        return
+    if report["failures"]:
+        print(f"FAIL: 회귀 {len(report['failures'])}건")
+        for failure in report["failures"]:
+            print(f"  - {failure}")
+    else:
+        print("PASS: 기준을 넘는 유의한 회귀 없음")
@@ -0,0 +1,227 @@
+"""
+CatTalk2D [CONTROL] 압축 인코더/디코더
+- DevTools가 만드는 CONTROL JSON(schemaVersion/catName/.../stateSnapshot)은 요청마다 프롬프트 토큰을 많이 차지함
+- 압축 형식: 짧은 키, 고정된 순서, 0~100 상태값은 10 단위 구간(0~10)으로 표현
+    [CONTROL]{"schemaVersion":"1.0","catName":"망고","ageLevel":"Child",...}
+    → [CONTROL]v=1 n=망고 a=C m=happy t=H p=cheeky,foodLover h=3 e=7 s=2 f=8 l=9 d=8
+- 값에 들어 있는 공백/%(personalityTop2 항목은 쉼표도)는 %XX(UTF-8 바이트)로 이스케이프
+    catName "치즈 망고" → n=치즈%20망고
+- 구간화와 gameDate 생략 때문에 원래 값으로 완전히 돌아가지는 않음
+  decode_control(encode_control(c)) == canonical_control(c)이 성립하고, 압축 문자열은 그대로 왕복됨
+- 토큰 수/prefill 비교는 benchmark_models.py control 서브커맨드 (summarize_forms)
+"""
+
+import argparse
+import json
+import sys
+from typing import Optional
+from urllib.parse import unquote
+
+from bench_stats import latency_stats
+
+CONTROL_TAG = "[CONTROL]"
+USER_TAG = "[USER]"
+COMPACT_VERSION = "1"
+BUCKET_SIZE = 10
+
+# 압축 키 (이 순서대로 출력)
+AGE_CODES = {"Child": "C", "Teen": "T", "Adult": "A"}
+AFFECTION_CODES = {"low": "L", "mid": "M", "high": "H"}
+STATE_KEYS = (("hunger", "h"), ("energy", "e"), ("stress", "s"), ("fun", "f"), ("affection", "l"))
+
+
+def bucket(value: float) -> int:
+    """0~100 값을 10 단위 구간 번호(0~10)로 (반올림)"""
+    return min(100 // BUCKET_SIZE, max(0, int(float(value) / BUCKET_SIZE + 0.5)))
+
+
+def escape_value(value: str, extra: str = "") -> str:
+    """압축 값 이스케이프: 공백/%와 extra 문자를 %XX(UTF-8 바이트)로 (한글 등 나머지는 그대로 둬 토큰 수 유지)"""
+    return "".join(
+        "".join(f"%{b:02X}" for b in c.encode("utf-8")) if c.isspace() or c == "%" or c in extra else c
+        for c in str(value)
+    )
+
+
+def encode_control(control: dict) -> str:
+    """CONTROL 딕셔너리 → 압축 문자열 (없는 필드는 생략, 값의 공백은 이스케이프)"""
+    state = control.get("stateSnapshot") or {}
+    parts = [f"v={COMPACT_VERSION}"]
+    if control.get("catName"):
+        parts.append(f"n={escape_value(control['catName'])}")
+    if control.get("ageLevel"):
+        parts.append(f"a={escape_value(AGE_CODES.get(control['ageLevel'], control['ageLevel']))}")
+    if control.get("moodTag"):
+        parts.append(f"m={escape_value(control['moodTag'])}")
+    if control.get("affectionTier"):
+        parts.append(f"t={escape_value(AFFECTION_CODES.get(control['affectionTier'], control['affectionTier']))}")
+    if control.get("personalityTop2"):
+        parts.append(f"p={','.join(escape_value(p, ',') for p in control['personalityTop2'])}")
+    for name, key in STATE_KEYS:
+        if state.get(name) is not None:
+            parts.append(f"{key}={bucket(state[name])}")
+    if state.get("ageDays") is not None:
+        parts.append(f"d={int(state['ageDays'])}")
+    return " ".join(parts)
+
+
+def decode_control(text: str) -> dict:
+    """압축 문자열 → CONTROL 딕셔너리 (상태값은 구간 대표값 = 구간 번호 × 10)"""
+    fields = {}
+    for part in text.split():
+        key, sep, value = part.partition("=")
+        if not sep:
+            raise ValueError(f"압축 CONTROL 형식 오류: {part}")
+        fields[key] = value
+    if fields.get("v") != COMPACT_VERSION:
+        raise ValueError(f"지원하지 않는 압축 CONTROL 버전: {fields.get('v')}")
+
+    ages = {code: name for name, code in AGE_CODES.items()}
+    tiers = {code: name for name, code in AFFECTION_CODES.items()}
+    control = {"schemaVersion": "1.0"}
+    if "n" in fields:
+        control["catName"] = unquote(fields["n"])
+    if "a" in fields:
+        control["ageLevel"] = ages.get(fields["a"], unquote(fields["a"]))
+    if "m" in fields:
+        control["moodTag"] = unquote(fields["m"])
+    if "t" in fields:
+        control["affectionTier"] = tiers.get(fields["t"], unquote(fields["t"]))
+    if "p" in fields:
+        control["personalityTop2"] = [unquote(p) for p in fields["p"].split(",")]
+
+    state = {name: int(fields[key]) * BUCKET_SIZE for name, key in STATE_KEYS if key in fields}
+    if "d" in fields:
+        state["ageDays"] = int(fields["d"])
+    if state:
+        control["stateSnapshot"] = state
+    return control
+
+
+def canonical_control(control: dict) -> dict:
+    """압축했다 복원했을 때의 CONTROL (구간화된 상태값, gameDate 등 압축 형식에 없는 필드 제외)"""
+    return decode_control(encode_control(control))
+
+
+def roundtrip_ok(control: dict) -> bool:
+    """
+    왕복 검사: 복원한 CONTROL이 원래 값과 일치하는지 (상태값은 구간 폭의 절반 이내)
+    그리고 압축 문자열이 다시 같은 문자열로 인코딩되는지
+    """
+    encoded = encode_control(control)
+    decoded = decode_control(encoded)
+    if encode_control(decoded) != encoded:
+        return False
+    state = control.get("stateSnapshot") or {}
+    for key, value in decoded.items():
+        if key == "stateSnapshot":
+            for name, restored in value.items():
+                if name == "ageDays":
+                    if restored != int(state[name]):
+                        return False
+                elif abs(restored - min(100, max(0, float(state[name])))) > BUCKET_SIZE / 2:
+                    return False
+        elif key != "schemaVersion" and control.get(key) != value:
+            return False
+    return True
+
+
+def split_user_content(content: str) -> tuple[Optional[dict], str]:
+    """
+    user 메시지 "[CONTROL]{...}\\n[USER]텍스트"를 (CONTROL, 텍스트)로 분리
+    - CONTROL은 JSON/압축 형식 모두 허용, 없으면 (None, 원문)
+    """
+    if not content.startswith(CONTROL_TAG) or USER_TAG not in content:
+        return None, content
+    body, user_text = content[len(CONTROL_TAG):].split(USER_TAG, 1)
+    body = body.strip()
+    control = json.loads(body) if body.startswith("{") else decode_control(body)
+    return control, user_text
+
+
+def compact_messages(messages: list[dict]) -> list[dict]:
+    """메시지 목록에서 user 메시지의 CONTROL JSON을 압축 형식으로 교체 (CONTROL이 없으면 그대로)"""
+    compacted = []
+    for m in messages:
+        if m.get("role") == "user":
+            control, user_text = split_user_content(m.get("content", ""))
+            if control is not None:
+                m = {**m, "content": f"{CONTROL_TAG}{encode_control(control)}\n{USER_TAG}{user_text}"}
+        compacted.append(m)
+    return compacted
+
+
+def summarize_forms(records: list[dict]) -> dict:
+    """
+    형식(verbose/compact)별 프롬프트 토큰 수와 prefill 시간, compact의 절감률
+    - records: [{"form": "verbose"|"compact", "result": BenchmarkResult}, ...]
+    """
+    forms = {}
+    for form in ("verbose", "compact"):
+        valid = [r["result"] for r in records if r["form"] == form and not r["result"].error]
+        tokens = [r.prompt_eval_count for r in valid if r.prompt_eval_count is not None]
+        prefill = [r.prompt_eval_ms for r in valid if r.prompt_eval_ms is not None]
+        forms[form] = {
+            "count": len(valid),
+            "error_count": sum(1 for r in records if r["form"] == form and r["result"].error),
+            "avg_prompt_tokens": sum(tokens) / len(tokens) if tokens else None,
+            "avg_prompt_eval_ms": sum(prefill) / len(prefill) if prefill else None,
+            "p50_prompt_eval_ms": latency_stats(prefill)["p50"],
+        }
+
+    savings = {}
+    for field in ("avg_prompt_tokens", "avg_prompt_eval_ms", "p50_prompt_eval_ms"):
+        verbose, compact = forms["verbose"][field], forms["compact"][field]
+        if verbose and compact is not None:
+            savings[field] = (verbose - compact) / verbose * 100
+    return {"forms": forms, "savings_pct": savings}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CatTalk2D [CONTROL] 압축 변환 / 왕복 검사")
+    parser.add_argument("path", help="데이터셋/테스트셋 JSONL (예: ../../CombData/dataset.jsonl)")
+    parser.add_argument("--output", help="CONTROL을 압축한 JSONL 저장 경로 (생략하면 검사만)")
+    args = parser.parse_args()
+
+    samples = 0
+    mismatches = 0
+    verbose_chars = 0
+    compact_chars = 0
+    out = open(args.output, "w", encoding="utf-8") if args.output else None
+    try:
+        with open(args.path, "r", encoding="utf-8-sig") as f:
+            for line_no, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                sample = json.loads(line)
+                messages = sample.get("messages") or []
+                user = next((m for m in messages if m.get("role") == "user"), None)
+                control, _ = split_user_content(user["content"]) if user else (None, "")
+                if control is not None:
+                    samples += 1
+                    encoded = encode_control(control)
+                    if not roundtrip_ok(control):
+                        mismatches += 1
+                        print(f"  {args.path}:{line_no} 왕복 불일치: {encoded}")
+                    verbose_chars += len(json.dumps(control, ensure_ascii=False, separators=(",", ":")))
+                    compact_chars += len(encoded)
+                if out:
+                    out.write(json.dumps({**sample, "messages": compact_messages(messages)},
+                                         ensure_ascii=False) + "\n")
+    finally:
+        if out:
+            out.close()
+
+    if not samples:
+        print("CONTROL이 있는 샘플이 없습니다")
+        return 1
+    print(f"CONTROL {samples}건: 왕복 불일치 {mismatches}건")
+    print(f"평균 길이: JSON {verbose_chars / samples:.0f}자 → 압축 {compact_chars / samples:.0f}자"
+          f" ({(1 - compact_chars / verbose_chars) * 100:.0f}% 감소)")
+    if args.output:
+        print(f"저장: {args.output}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,138 @@
+"""
+CatTalk2D 부하 테스트
+- 동시에 대화하는 플레이어(가상 사용자) 수를 단계별로 늘리며 한 Ollama 서버의 한계 측정
+- 오픈 루프 도착 모델: 요청은 포아송 과정으로 도착하며 이전 응답 완료를 기다리지 않음
+  (응답이 느려져도 부하가 줄지 않으므로 실제 플레이어 트래픽과 같은 조건)
+"""
+
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from bench_stats import latency_stats
+
+
+@dataclass
+class LoadStepResult:
+    """부하 단계별 결과"""
+    users: int
+    target_rps: float             # 목표 도착률 (req/s)
+    offered_rps: float            # 실제 발생한 도착률 (포아송 난수 반영)
+    throughput_rps: float         # 실제 처리량 (성공 응답/s)
+    requests: int
+    errors: int
+    error_rate: float             # %
+    p50_latency_ms: Optional[float]
+    p90_latency_ms: Optional[float]
+    p99_latency_ms: Optional[float]
+    max_latency_ms: Optional[float]
+    max_in_flight: int
+    saturated: bool               # 처리량이 목표 도착률을 따라가지 못함
+
+
+def poisson_arrivals(rate: float, duration: float, rng: random.Random) -> list[float]:
+    """[0, duration) 구간의 포아송 도착 시각(초) 목록"""
+    arrivals = []
+    t = rng.expovariate(rate)
+    while t < duration:
+        arrivals.append(t)
+        t += rng.expovariate(rate)
+    return arrivals
+
+
+def run_load_step(request_fn: Callable, prompts: list[str], users: int, rate: float,
+                  duration: float, max_in_flight: int, rng: random.Random) -> LoadStepResult:
+    """
+    한 단계 실행: rate(req/s)로 duration초 동안 요청 발생 후 남은 요청이 끝날 때까지 대기
+    - 지연은 예정 도착 시각부터 측정 (클라이언트 측 대기 포함, coordinated omission 방지)
+    """
+    arrivals = poisson_arrivals(rate, duration, rng)
+    lock = threading.Lock()
+    in_flight = 0
+    peak_in_flight = 0
+
+    def timed(scheduled: float, prompt: str):
+        nonlocal in_flight, peak_in_flight
+        with lock:
+            in_flight += 1
+            peak_in_flight = max(peak_in_flight, in_flight)
+        try:
+            result = request_fn(prompt)
+        finally:
+            with lock:
+                in_flight -= 1
+        done = time.perf_counter()
+        return (done - scheduled) * 1000, result.error, done
+
+    with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+        start = time.perf_counter()
+        futures = []
+        for i, offset in enumerate(arrivals):
+            scheduled = start + offset
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            futures.append(executor.submit(timed, scheduled, prompts[i % len(prompts)]))
+        samples = [f.result() for f in futures]
+
+    latencies = [latency for latency, error, _ in samples if not error]
+    errors = sum(1 for _, error, _ in samples if error)
+    end = max((done for _, _, done in samples), default=start + duration)
+    elapsed = max(end - start, duration)
+    throughput = len(latencies) / elapsed if elapsed > 0 else 0.0
+    offered = len(samples) / duration
+    stats = latency_stats(latencies)
+
+    return LoadStepResult(
+        users=users,
+        target_rps=rate,
+        offered_rps=offered,
+        throughput_rps=throughput,
+        requests=len(samples),
+        errors=errors,
+        error_rate=errors / len(samples) * 100 if samples else 0.0,
+        p50_latency_ms=stats["p50"],
+        p90_latency_ms=stats["p90"],
+        p99_latency_ms=stats["p99"],
+        max_latency_ms=stats["max"],
+        max_in_flight=peak_in_flight,
+        # 10% 이상 밀리면 포화로 간주
+        saturated=throughput < offered * 0.9 or errors > 0
+    )
+
+
+def run_load_test(request_fn: Callable, prompts: list[str], user_steps: list[int],
+                  think_time: float, duration: float, max_in_flight: int = 256,
+                  seed: int = 42) -> list[LoadStepResult]:
+    """
+    가상 사용자 수를 단계별로 늘리며 부하 테스트
+    - 사용자 1명은 평균 think_time초마다 한 번 말을 건다고 가정 → 도착률 = users / think_time
+    """
+    rng = random.Random(seed)
+    steps = []
+
+    for users in user_steps:
+        rate = users / think_time
+        print(f"\n[load] users={users} target={rate:.2f} req/s duration={duration:.0f}s")
+        step = run_load_step(request_fn, prompts, users, rate, duration, max_in_flight, rng)
+        steps.append(step)
+
+        p99 = f"{step.p99_latency_ms:.0f}ms" if step.p99_latency_ms is not None else "-"
+        print(f"  throughput {step.throughput_rps:.2f} req/s, errors {step.error_rate:.1f}%,"
+              f" p99 {p99}, in-flight max {step.max_in_flight}"
+              f"{'  << SATURATED' if step.saturated else ''}")
+
+    return steps
+
+
+def find_knee(steps: list[LoadStepResult]) -> Optional[LoadStepResult]:
+    """포화 직전의 마지막 안정 단계 (처리 가능한 최대 동시 사용자 수)"""
+    knee = None
+    for step in steps:
+        if step.saturated:
+            break
+        knee = step
+    return knee
@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+CatTalk2D 벤치마크용 가짜 Ollama 서버
+- GPU/모델 없이 벤치마크 하네스 자체를 테스트하고 프로파일링하기 위한 대역
+- /api/generate, /api/chat (스트리밍/비스트리밍), /api/tags 지원
+- 콜드 로드, 프롬프트 처리(prefill), 토큰 생성 속도를 설정값대로 흉내내고
+  Ollama와 같은 duration 필드(ns)를 응답에 포함
+- 오류 주입(지정 확률로 HTTP 오류 응답), 동시 처리 슬롯 수 제한(OLLAMA_NUM_PARALLEL 흉내)
+- 프롬프트 prefix 캐시: 슬롯마다 직전 프롬프트를 기억하고 공통 앞부분은 prefill을 생략
+
+사용법:
+    python mock_ollama.py --port 11434 --mock-token-rate 40 --mock-error-rate 0.05
+    python benchmark_models.py --url http://localhost:11434 --models mock:cat
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import socket
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+# 망고 말투의 고정 응답 (한국어 + 고양이 어미)
+CAT_RESPONSES = [
+    "오늘 기분 최고다냥! 같이 놀자냥~",
+    "배고파서 힘이 없다냥... 밥 줘냥!",
+    "(하품) 졸려서 잠깐 눈 좀 붙일게냥.",
+    "흥, 별로 안 심심했다냥. 그래도 놀아주면 좋겠다냥~",
+    "(골골) 쓰다듬어 주니까 좋다냥!",
+    "지금은 혼자 있고 싶다냥. 나중에 와라냥.",
+    "(우다다) 산책 가자냥! 신난다냥~",
+    "창밖에 새가 있었다냥! 잡고 싶었다냥.",
+]
+
+# 규칙 위반 응답 (한국어 응답률/고양이 어미 지표 검증용)
+OFF_STYLE_RESPONSES = [
+    "Hello! I am a cat. Meow~",
+    "오늘은 날씨가 좋네요. 산책 가실래요?",
+    "I'm hungry, 밥 주세요.",
+]
+
+
+@dataclass
+class MockConfig:
+    """가짜 서버 동작 설정"""
+    load_ms: float = 1500.0            # 모델 콜드 로드 시간
+    prefill_tok_per_sec: float = 800.0  # 프롬프트 처리 속도
+    token_rate: float = 40.0           # 토큰 생성 속도 (tok/s)
+    jitter: float = 0.2                # 지연 로그정규 분포 sigma (0 = 고정 지연)
+    overhead_ms: float = 5.0           # 요청당 고정 오버헤드
+    error_rate: float = 0.0            # 오류 응답 확률
+    error_status: int = 503            # 주입할 오류 상태 코드
+    off_style_rate: float = 0.0        # 규칙 위반 응답 확률
+    parallel: int = 4                  # 동시 처리 슬롯 수 (초과 요청은 대기)
+    keep_alive_sec: float = 300.0      # 기본 모델 유지 시간
+    prefix_cache: bool = True          # 직전 프롬프트와 공통 앞부분의 prefill 생략 (llama.cpp 슬롯 캐시 흉내)
+    seed: int = 42
+
+
+def estimate_tokens(text: str) -> int:
+    """대략적인 토큰 수 (한국어 기준 약 2자 = 1토큰)"""
+    return max(1, (len(text) + 1) // 2)
+
+
+def split_tokens(text: str) -> list[str]:
+    """스트리밍용 토큰 분할 (2자 단위)"""
+    return [text[i:i + 2] for i in range(0, len(text), 2)] or [""]
+
+
+def parse_keep_alive(value, default: float) -> float:
+    """Ollama keep_alive 값("10m", "30s", -1, 0 등)을 초 단위로 변환 (음수 = 영구)"""
+    if value is None:
+        return default
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value).strip()
+    units = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+    for suffix in ("ms", "s", "m", "h"):
+        if text.endswith(suffix):
+            return float(text[:-len(suffix)]) * units[suffix]
+    return float(text)
+
+
+def model_digest(model: str) -> str:
+    """모델 이름 기반 고정 digest (/api/tags 응답용)"""
+    return hashlib.sha256(model.encode("utf-8")).hexdigest()
+
+
+class MockOllamaState:
+    """서버 전역 상태: 로드된 모델, 동시 처리 슬롯, 요청 카운터"""
+
+    def __init__(self, config: MockConfig):
+        self.config = config
+        self.lock = threading.Lock()
+        self.slots = threading.Semaphore(max(1, config.parallel))
+        self.loaded_until: dict[str, float] = {}
+        self.load_locks: dict[str, threading.Lock] = {}
+        self.request_counts: dict[str, int] = {}
+        self.recent_prompts: dict[str, deque] = {}
+
+    def rng_for(self, model: str, prompt: str, seed: Optional[int]) -> random.Random:
+        """
+        요청별 난수 생성기
+        - 같은 (모델, 프롬프트)의 n번째 요청은 항상 같은 결과 → 동시 실행 순서와 무관하게 결정적
+        - 요청 options.seed가 있으면 회차와 무관하게 같은 결과 (실제 Ollama의 seed 동작)
+        """
+        key = f"{model}|{prompt}"
+        if seed is not None:
+            return random.Random(f"{self.config.seed}|{key}|seed={seed}")
+        with self.lock:
+            n = self.request_counts.get(key, 0)
+            self.request_counts[key] = n + 1
+        return random.Random(f"{self.config.seed}|{key}|{n}")
+
+    def ensure_loaded(self, model: str, keep_alive, rng: random.Random) -> float:
+        """모델이 언로드 상태면 로드 시간만큼 대기, 실제 로드 시간(초) 반환"""
+        with self.lock:
+            load_lock = self.load_locks.setdefault(model, threading.Lock())
+
+        with load_lock:
+            now = time.monotonic()
+            load_sec = 0.0
+            if self.loaded_until.get(model, 0) < now:
+                load_sec = self.jittered(self.config.load_ms / 1000, rng)
+                time.sleep(load_sec)
+
+            keep = parse_keep_alive(keep_alive, self.config.keep_alive_sec)
+            self.loaded_until[model] = float("inf") if keep < 0 else time.monotonic() + keep
+            return load_sec
+
+    def uncached_prompt(self, model: str, prompt: str) -> str:
+        """
+        prefill이 필요한 프롬프트 뒷부분
+        - 모델별로 슬롯 수만큼 최근 프롬프트를 기억하고, 그중 가장 긴 공통 앞부분은 캐시된 것으로 간주
+        """
+        if not self.config.prefix_cache:
+            return prompt
+        with self.lock:
+            recent = self.recent_prompts.setdefault(model, deque(maxlen=max(1, self.config.parallel)))
+            cached = max((len(os.path.commonprefix([prompt, p])) for p in recent), default=0)
+            recent.append(prompt)
+        return prompt[cached:]
+
+    def jittered(self, value: float, rng: random.Random) -> float:
+        if self.config.jitter <= 0:
+            return value
+        return value * rng.lognormvariate(0, self.config.jitter)
+
+
+class MockOllamaHandler(BaseHTTPRequestHandler):
+    """Ollama API 흉내 핸들러"""
+    protocol_version = "HTTP/1.1"
+    state: MockOllamaState = None
+
+    def setup(self):
+        super().setup()
+        # 작은 스트림 청크가 Nagle 알고리즘에 묶여 TTFT가 왜곡되지 않도록
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path == "/api/tags":
+            with self.state.lock:
+                models = sorted(self.state.loaded_until)
+            self.send_json(200, {"models": [
+                {"name": m, "model": m, "digest": model_digest(m)} for m in models
+            ]})
+        else:
+            self.send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError:
+            self.send_json(400, {"error": "invalid JSON"})
+            return
+
+        if self.path == "/api/generate":
+            self.handle_generation(body, body.get("prompt", ""), chat=False)
+        elif self.path == "/api/chat":
+            prompt = "\n".join(m.get("content", "") for m in body.get("messages", []))
+            self.handle_generation(body, prompt, chat=True)
+        elif self.path == "/api/show":
+            model = body.get("model") or body.get("name", "")
+            self.send_json(200, {"details": {"family": "mock"}, "digest": model_digest(model)})
+        else:
+            self.send_json(404, {"error": "not found"})
+
+    def handle_generation(self, body: dict, prompt: str, chat: bool):
+        config = self.state.config
+        model = body.get("model", "mock")
+        options = body.get("options") or {}
+        rng = self.state.rng_for(model, prompt, options.get("seed"))
+
+        if rng.random() < config.error_rate:
+            self.send_json(config.error_status, {"error": "injected error"})
+            return
+
+        start = time.perf_counter()
+        with self.state.slots:
+            load_sec = self.state.ensure_loaded(model, body.get("keep_alive"), rng)
+
+            pool = OFF_STYLE_RESPONSES if rng.random() < config.off_style_rate else CAT_RESPONSES
+            text = rng.choice(pool)
+            tokens = split_tokens(text)
+            token_delays = [self.state.jittered(1 / config.token_rate, rng) for _ in tokens]
+
+            # Ollama와 같이 prompt_eval_count는 실제로 처리한(캐시되지 않은) 토큰 수
+            prompt_tokens = estimate_tokens(self.state.uncached_prompt(model, prompt))
+            prefill_sec = self.state.jittered(prompt_tokens / config.prefill_tok_per_sec, rng)
+            time.sleep(config.overhead_ms / 1000 + prefill_sec)
+
+            final = {
+                "done": True,
+                "done_reason": "stop",
+                "load_duration": int(load_sec * 1e9),
+                "prompt_eval_count": prompt_tokens,
+                "prompt_eval_duration": int(prefill_sec * 1e9),
+                "eval_count": len(tokens),
+                "eval_duration": int(sum(token_delays) * 1e9),
+            }
+
+            if body.get("stream", True):
+                self.send_stream(model, tokens, token_delays, final, start, chat)
+            else:
+                time.sleep(sum(token_delays))
+                final["total_duration"] = int((time.perf_counter() - start) * 1e9)
+                self.send_json(200, {**self.chunk(model, text, chat), **final})
+
+    def chunk(self, model: str, piece: str, chat: bool) -> dict:
+        data = {
+            "model": model,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "done": False,
+        }
+        if chat:
+            data["message"] = {"role": "assistant", "content": piece}
+        else:
+            data["response"] = piece
+        return data
+
+    def send_stream(self, model: str, tokens: list[str], token_delays: list[float],
+                    final: dict, start: float, chat: bool):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        for piece, delay in zip(tokens, token_delays):
+            time.sleep(delay)
+            self.write_chunk(self.chunk(model, piece, chat))
+
+        final["total_duration"] = int((time.perf_counter() - start) * 1e9)
+        self.write_chunk({**self.chunk(model, "", chat), **final})
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    def write_chunk(self, data: dict):
+        line = (json.dumps(data, ensure_ascii=False) + "\n").encode("utf-8")
+        self.wfile.write(f"{len(line):x}\r\n".encode("ascii") + line + b"\r\n")
+        self.wfile.flush()
+
+    def send_json(self, status: int, data: dict):
+        payload = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+def start_mock_server(config: Optional[MockConfig] = None, host: str = "127.0.0.1",
+                      port: int = 0) -> tuple[ThreadingHTTPServer, str]:
+    """
+    백그라운드 스레드에서 가짜 서버 시작
+    Returns: (서버, 기본 URL) — port=0이면 빈 포트를 자동 할당
+    """
+    handler = type("BoundMockOllamaHandler", (MockOllamaHandler,),
+                   {"state": MockOllamaState(config or MockConfig())})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    bound_host, bound_port = server.server_address[:2]
+    return server, f"http://{bound_host}:{bound_port}"
+
+
+def add_mock_arguments(parser: argparse.ArgumentParser):
+    """가짜 서버 설정 CLI 옵션 (benchmark_models.py --mock에서도 공유)"""
+    defaults = MockConfig()
+    parser.add_argument("--mock-load-ms", type=float, default=defaults.load_ms,
+                        help="콜드 로드 시간(ms)")
+    parser.add_argument("--mock-prefill-rate", type=float, default=defaults.prefill_tok_per_sec,
+                        help="프롬프트 처리 속도(tok/s)")
+    parser.add_argument("--mock-token-rate", type=float, default=defaults.token_rate,
+                        help="토큰 생성 속도(tok/s)")
+    parser.add_argument("--mock-jitter", type=float, default=defaults.jitter,
+                        help="지연 로그정규 sigma (0 = 고정)")
+    parser.add_argument("--mock-error-rate", type=float, default=defaults.error_rate,
+                        help="오류 응답 확률 (0~1)")
+    parser.add_argument("--mock-error-status", type=int, default=defaults.error_status,
+                        help="주입할 HTTP 오류 코드")
+    parser.add_argument("--mock-off-style-rate", type=float, default=defaults.off_style_rate,
+                        help="규칙 위반(영어/어미 누락) 응답 확률 (0~1)")
+    parser.add_argument("--mock-parallel", type=int, default=defaults.parallel,
+                        help="동시 처리 슬롯 수")
+    parser.add_argument("--mock-no-prefix-cache", action="store_true",
+                        help="프롬프트 prefix 캐시 끄기 (매 요청 전체 prefill)")
+    parser.add_argument("--mock-seed", type=int, default=defaults.seed, help="난수 시드")
+
+
+def config_from_args(args) -> MockConfig:
+    return MockConfig(
+        load_ms=args.mock_load_ms,
+        prefill_tok_per_sec=args.mock_prefill_rate,
+        token_rate=args.mock_token_rate,
+        jitter=args.mock_jitter,
+        error_rate=args.mock_error_rate,
+        error_status=args.mock_error_status,
+        off_style_rate=args.mock_off_style_rate,
+        parallel=args.mock_parallel,
+        prefix_cache=not args.mock_no_prefix_cache,
+        seed=args.mock_seed,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CatTalk2D 가짜 Ollama 서버")
+    parser.add_argument("--host", default="127.0.0.1", help="바인드 주소")
+    parser.add_argument("--port", type=int, default=11434, help="포트")
+    add_mock_arguments(parser)
+    args = parser.parse_args()
+
+    server, url = start_mock_server(config_from_args(args), args.host, args.port)
+    print(f"Mock Ollama server listening on {url} (Ctrl+C to stop)")
+
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
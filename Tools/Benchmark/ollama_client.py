@@ -0,0 +1,127 @@
+"""
+CatTalk2D 벤치마크용 Ollama HTTP 클라이언트
+- 커넥션 풀을 공유하는 requests.Session (요청마다 새 TCP 연결을 열지 않음)
+- keep_alive 설정으로 테스트 사이에 모델이 언로드되지 않도록 유지
+- 일시적 오류(연결 실패, 429/502/503/504)에 대한 지수 백오프 재시도
+- 요청별 연결 수립 시간 측정 (재사용된 연결이면 0)
+"""
+
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+# 재시도 대상 HTTP 상태 코드 (서버 과부하/게이트웨이 오류)
+RETRY_STATUS = {429, 502, 503, 504}
+
+_connect_timing = threading.local()
+
+
+def _record_connect(elapsed_ms: float):
+    _connect_timing.ms = getattr(_connect_timing, "ms", 0.0) + elapsed_ms
+    _connect_timing.count = getattr(_connect_timing, "count", 0) + 1
+
+
+class _TimedHTTPConnection(HTTPConnection):
+    def connect(self):
+        start = time.perf_counter()
+        super().connect()
+        _record_connect((time.perf_counter() - start) * 1000)
+
+
+class _TimedHTTPSConnection(HTTPSConnection):
+    def connect(self):
+        start = time.perf_counter()
+        super().connect()
+        _record_connect((time.perf_counter() - start) * 1000)
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class _TimedAdapter(HTTPAdapter):
+    """연결 수립 시간을 스레드별로 기록하는 어댑터"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _TimedHTTPConnectionPool,
+            "https": _TimedHTTPSConnectionPool,
+        }
+
+
+@dataclass
+class RequestTiming:
+    """요청 1건의 클라이언트 측 타이밍"""
+    connect_ms: float = 0.0      # TCP(/TLS) 연결 수립에 쓴 시간 (모든 시도 합계)
+    new_connections: int = 0     # 새로 연 연결 수 (0이면 풀의 연결 재사용)
+    attempts: int = 1            # 시도 횟수 (재시도 포함)
+
+
+class OllamaClient:
+    """커넥션 풀 + keep_alive + 재시도를 갖춘 Ollama 클라이언트"""
+
+    def __init__(self, keep_alive: Optional[str] = "10m", max_retries: int = 2,
+                 backoff: float = 0.5, pool_size: int = 32):
+        self.keep_alive = keep_alive
+        self.max_retries = max_retries
+        self.backoff = backoff
+
+        self.session = requests.Session()
+        adapter = _TimedAdapter(pool_connections=4, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def post(self, url: str, payload: dict, timeout: float = 30,
+             stream: bool = False) -> tuple[requests.Response, RequestTiming]:
+        """
+        JSON POST 요청 (일시적 오류 시 백오프 재시도)
+        - 마지막 시도의 응답을 반환하며, 재시도해도 실패하면 마지막 예외를 다시 발생
+          (예외의 timing 속성에 시도 횟수/연결 수립 시간을 담음)
+        """
+        if self.keep_alive is not None and "keep_alive" not in payload:
+            payload = {**payload, "keep_alive": self.keep_alive}
+
+        _connect_timing.ms = 0.0
+        _connect_timing.count = 0
+        timing = RequestTiming()
+
+        for attempt in range(self.max_retries + 1):
+            timing.attempts = attempt + 1
+            try:
+                response = self.session.post(url, json=payload, timeout=timeout, stream=stream)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt >= self.max_retries:
+                    self._finish_timing(timing)
+                    e.timing = timing
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUS or attempt >= self.max_retries:
+                    break
+                response.close()
+
+            # 지수 백오프 + 지터 (동시 요청들이 같은 순간에 재시도하지 않도록)
+            time.sleep(self.backoff * (2 ** attempt) * (0.5 + random.random()))
+
+        self._finish_timing(timing)
+        return response, timing
+
+    @staticmethod
+    def _finish_timing(timing: RequestTiming):
+        """이 스레드에서 기록한 연결 수립 시간을 timing에 반영"""
+        timing.connect_ms = _connect_timing.ms
+        timing.new_connections = _connect_timing.count
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,131 @@
+"""
+CatTalk2D 프롬프트 prefix 재사용 벤치마크
+- 같은 케이스를 두 가지 프롬프트 배치로 연속 요청해 prefill(prompt_eval_duration) 차이를 측정
+  - dynamic_first: 바뀌는 상태([CONTROL])가 앞, 고정된 페르소나/규칙이 뒤
+  - static_first: 고정된 페르소나/규칙이 앞, 바뀌는 상태가 뒤
+- Ollama(llama.cpp)는 슬롯에 남은 직전 프롬프트와 앞부분이 같은 만큼 prefill을 건너뛰므로
+  static_first에서는 요청마다 상태 이후 부분만 새로 처리함
+- 결과로 운영 프롬프트에서 [CONTROL] 블록을 어디에 둘지 판단
+"""
+
+from typing import Callable, Iterable, Optional
+
+from bench_stats import latency_stats
+
+# 비교할 레이아웃 (benchmark_models.PROMPT_LAYOUTS와 같은 이름)
+LAYOUTS = ("dynamic_first", "static_first")
+
+CONTROL_TAG = "[CONTROL]"
+USER_TAG = "[USER]"
+
+
+def chat_layout(messages: list[dict], layout: str) -> list[dict]:
+    """
+    테스트셋 메시지를 레이아웃에 맞게 재배치
+    - 게임이 보내는 원래 형식(system: 페르소나, user: [CONTROL]...[USER]...)이 static_first
+    - dynamic_first는 [CONTROL] 줄을 system 메시지 맨 앞으로 옮김 (채팅 템플릿에서 가장 앞에 옴)
+    """
+    if layout == "static_first":
+        return messages
+    if layout != "dynamic_first":
+        raise ValueError(f"알 수 없는 프롬프트 레이아웃: {layout}")
+
+    user = next((m for m in messages if m["role"] == "user"), None)
+    if user is None or not user["content"].startswith(CONTROL_TAG) or USER_TAG not in user["content"]:
+        return messages
+
+    control, user_text = user["content"].split(USER_TAG, 1)
+    reordered = []
+    has_system = any(m["role"] == "system" for m in messages)
+    if not has_system:
+        reordered.append({"role": "system", "content": control.rstrip("\n")})
+    for m in messages:
+        if m["role"] == "system":
+            reordered.append({"role": "system", "content": control + m["content"]})
+        elif m is user:
+            reordered.append({"role": "user", "content": USER_TAG + user_text})
+        else:
+            reordered.append(m)
+    return reordered
+
+
+def run_prefix_benchmark(request_fn: Callable, cases_by_layout: dict[str, list[dict]],
+                         rounds: int = 3, on_result: Optional[Callable] = None) -> list[dict]:
+    """
+    레이아웃별로 케이스 목록 전체를 순차 요청하는 블록을 rounds회 번갈아 실행
+    - 동시 요청을 하지 않아야 직전 요청이 남긴 prefix 캐시의 효과만 측정됨
+    - 라운드마다 레이아웃 순서를 바꿔 서버 상태(발열, 다른 부하 등)의 영향을 상쇄
+    - 각 블록의 첫 요청은 이전 블록(다른 레이아웃)의 캐시를 이어받으므로 priming으로 표시해 통계에서 제외
+    - request_fn(prompt) → BenchmarkResult
+    Returns: [{"layout", "round", "index", "priming", "result"}, ...]
+    """
+    records = []
+    layouts = list(cases_by_layout)
+    for round_index in range(rounds):
+        order = layouts if round_index % 2 == 0 else layouts[::-1]
+        for layout in order:
+            for index, case in enumerate(cases_by_layout[layout]):
+                record = {
+                    "layout": layout,
+                    "round": round_index,
+                    "index": index,
+                    "priming": index == 0,
+                    "result": request_fn(case["prompt"]),
+                }
+                records.append(record)
+                if on_result:
+                    on_result(record)
+    return records
+
+
+def summarize_layouts(records: list[dict]) -> dict:
+    """
+    레이아웃별 prefill 통계와 static_first의 절감률
+    - prompt_eval_count는 서버가 실제로 처리한(캐시되지 않은) 프롬프트 토큰 수
+    """
+    summary = {}
+    for layout in dict.fromkeys(r["layout"] for r in records):
+        valid = [r["result"] for r in records
+                 if r["layout"] == layout and not r["priming"] and not r["result"].error]
+        prefill = [r.prompt_eval_ms for r in valid if r.prompt_eval_ms is not None]
+        tokens = [r.prompt_eval_count for r in valid if r.prompt_eval_count is not None]
+        total = [r.response_time_ms for r in valid]
+        summary[layout] = {
+            "count": len(valid),
+            "error_count": sum(1 for r in records if r["layout"] == layout and r["result"].error),
+            "avg_prompt_eval_ms": sum(prefill) / len(prefill) if prefill else None,
+            "p50_prompt_eval_ms": latency_stats(prefill)["p50"],
+            "avg_prompt_eval_count": sum(tokens) / len(tokens) if tokens else None,
+            "p50_response_time_ms": latency_stats(total)["p50"],
+        }
+
+    base, candidate = summary.get("dynamic_first"), summary.get("static_first")
+    savings = {}
+    if base and candidate:
+        for field in ("avg_prompt_eval_ms", "p50_prompt_eval_ms", "avg_prompt_eval_count", "p50_response_time_ms"):
+            if base[field] and candidate[field] is not None:
+                savings[field] = (base[field] - candidate[field]) / base[field] * 100
+    return {"layouts": summary, "savings_pct": savings}
+
+
+def print_prefix_report(model: str, report: dict):
+    """레이아웃 비교표 출력"""
+    def fmt(value: Optional[float], spec: str) -> str:
+        return format(value, spec) if value is not None else "-"
+
+    print(f"\n{model}:")
+    print(f"  {'레이아웃':<14} {'n':>4} {'prefill 평균':>12} {'p50':>8} {'처리 토큰':>9} {'응답 p50':>9}")
+    for layout, s in report["layouts"].items():
+        print(f"  {layout:<14} {s['count']:>4} {fmt(s['avg_prompt_eval_ms'], '10.1f')}ms"
+              f" {fmt(s['p50_prompt_eval_ms'], '6.1f')}ms {fmt(s['avg_prompt_eval_count'], '9.1f')}"
+              f" {fmt(s['p50_response_time_ms'], '7.0f')}ms"
+              + (f" (오류 {s['error_count']})" if s['error_count'] else ""))
+    savings = report["savings_pct"]
+    if "avg_prompt_eval_ms" in savings:
+        print(f"  → static_first prefill 절감: 평균 {savings['avg_prompt_eval_ms']:+.1f}%"
+              f", 처리 토큰 {fmt(savings.get('avg_prompt_eval_count'), '+.1f')}%")
+
+
+def layout_cases(cases: Iterable[dict], layout: str) -> list[dict]:
+    """테스트셋 케이스(메시지 목록 prompt)를 레이아웃에 맞게 변환"""
+    return [{**case, "prompt": chat_layout(case["prompt"], layout)} for case in cases]
@@ -0,0 +1,184 @@
+"""
+CatTalk2D 오프라인 재채점
+- 채점 규칙이 바뀌었을 때 모델을 다시 돌리지 않고 기존 응답의 품질 지표를 다시 계산
+- 입력: 벤치마크 결과(benchmark_results.jsonl / .json / 출력 디렉토리) 또는 데이터셋 JSONL(messages/meta)
+- 입력을 청크 단위로 스트리밍하며 프로세스 풀(기본: CPU 코어 수)에 채점을 분산
+- 출력: 채점된 JSONL(입력 순서 유지) + meta 필드(ageLevel/moodTag/affectionTier 등)별 집계
+"""
+
+import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+from typing import Iterator, Optional
+
+from cat_scorer import contains_english, has_cat_suffix, score_batch
+from results_store import ResultsWriter
+
+# 기본 집계 기준 meta 필드
+RESCORE_GROUP_FIELDS = ("ageLevel", "moodTag", "affectionTier")
+
+
+def iter_records(path: Path) -> Iterator[dict]:
+    """
+    재채점 입력 레코드 스트리밍
+    - 디렉토리면 그 안의 benchmark_results.jsonl (없으면 benchmark_results.json)
+    - .json은 벤치마크 요약 파일의 "results" 목록 (파일 전체를 한 번 읽음)
+    - 그 외에는 JSONL로 한 줄씩 읽음 (BOM 허용, 손상된 줄은 줄 번호와 함께 건너뜀)
+    """
+    path = Path(path)
+    if path.is_dir():
+        jsonl = path / "benchmark_results.jsonl"
+        path = jsonl if jsonl.exists() else path / "benchmark_results.json"
+
+    if path.suffix == ".json":
+        with open(path, "r", encoding="utf-8-sig") as f:
+            yield from json.load(f).get("results", [])
+        return
+
+    with open(path, "r", encoding="utf-8-sig") as f:
+        for line_no, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                print(f"  [rescore] {path}:{line_no} 손상된 줄 건너뜀")
+
+
+def response_of(record: dict) -> Optional[str]:
+    """채점할 응답 (데이터셋이면 assistant 메시지, 벤치마크 결과면 response; 워밍업/오류는 None)"""
+    if "messages" in record:
+        return next((m.get("content", "") for m in record["messages"] if m.get("role") == "assistant"), None)
+    if record.get("error") or record.get("is_warmup"):
+        return None
+    return record.get("response")
+
+
+def score_chunk(items: list[tuple[str, dict]]) -> list[dict]:
+    """워커 프로세스: (응답, meta) 목록을 채점해 품질 지표 목록 반환"""
+    scores = score_batch([text for text, _ in items], [meta for _, meta in items])
+    return [
+        {
+            "is_korean": not contains_english(text),
+            "has_cat_suffix": has_cat_suffix(text),
+            "response_length": len(text),
+            "cat_score": score.score_total,
+            "cat_breakdown": score.breakdown,
+        }
+        for (text, _), score in zip(items, scores)
+    ]
+
+
+def apply_quality(record: dict, quality: dict) -> dict:
+    """
+    레코드에 새 품질 지표 반영
+    - 벤치마크 결과: 기존 필드를 덮어써서 compare 등 다른 도구가 그대로 읽을 수 있게 함
+    - 데이터셋 샘플: 스키마를 건드리지 않도록 "quality" 필드로 추가
+    """
+    if "messages" in record:
+        return {**record, "quality": quality}
+    return {**record, **quality}
+
+
+class GroupAggregator:
+    """(모델, meta 필드, 값)별 품질 지표 누적 (레코드를 메모리에 모으지 않고 합계만 유지)"""
+
+    def __init__(self, group_by: tuple[str, ...]):
+        self.group_by = group_by
+        self.totals = {}
+
+    def add(self, model: str, meta: dict, quality: dict):
+        keys = [("전체", "all")] + [(field, meta.get(field)) for field in self.group_by]
+        for field, value in keys:
+            if value is None:
+                continue
+            total = self.totals.setdefault(model, {}).setdefault(field, {}).setdefault(
+                str(value), {"count": 0, "korean": 0, "suffix": 0, "score": 0})
+            total["count"] += 1
+            total["korean"] += quality["is_korean"]
+            total["suffix"] += quality["has_cat_suffix"]
+            total["score"] += quality["cat_score"]
+
+    def tables(self) -> dict:
+        """{모델: {필드: {값: {count, korean_rate, cat_suffix_rate, avg_cat_score}}}}"""
+        return {
+            model: {
+                field: {
+                    value: {
+                        "count": t["count"],
+                        "korean_rate": t["korean"] / t["count"] * 100,
+                        "cat_suffix_rate": t["suffix"] / t["count"] * 100,
+                        "avg_cat_score": t["score"] / t["count"],
+                    }
+                    for value, t in sorted(values.items())
+                }
+                for field, values in fields.items()
+            }
+            for model, fields in self.totals.items()
+        }
+
+
+def rescore_file(input_path: str, output_path: str, group_by: tuple[str, ...] = RESCORE_GROUP_FIELDS,
+                 workers: Optional[int] = None, chunk_size: int = 1000) -> dict:
+    """
+    입력 파일 재채점
+    - chunk_size개씩 끊어 프로세스 풀에 제출하고, 진행 중인 청크는 워커 수의 2배로 제한
+    - 채점 대상이 아닌 레코드(워밍업/오류)도 그대로 출력해 입력과 줄 순서를 맞춤
+    Returns: {"records": 전체 수, "scored": 채점 수, "groups": 집계 표}
+    """
+    workers = workers or os.cpu_count() or 1
+    aggregator = GroupAggregator(tuple(group_by))
+    counts = {"records": 0, "scored": 0}
+    records = iter_records(Path(input_path))
+
+    def chunks():
+        while True:
+            chunk = list(islice(records, chunk_size))
+            if not chunk:
+                return
+            yield chunk
+
+    def finish(chunk: list[dict], future, writer: ResultsWriter):
+        qualities = iter(future.result()) if future else iter(())
+        for record in chunk:
+            counts["records"] += 1
+            text = response_of(record)
+            if text is None:
+                writer.write(record)
+                continue
+            quality = next(qualities)
+            counts["scored"] += 1
+            meta = record.get("meta") or {}
+            aggregator.add(record.get("model", "dataset"), meta, quality)
+            writer.write(apply_quality(record, quality))
+
+    def submit(executor, chunk: list[dict]):
+        items = [(text, record.get("meta") or {})
+                 for record in chunk if (text := response_of(record)) is not None]
+        return executor.submit(score_chunk, items) if items else None
+
+    with ResultsWriter(Path(output_path), append=False) as writer, \
+            ProcessPoolExecutor(max_workers=workers) as executor:
+        window = deque()
+        for chunk in chunks():
+            window.append((chunk, submit(executor, chunk)))
+            if len(window) >= workers * 2:
+                finish(*window.popleft(), writer)
+        while window:
+            finish(*window.popleft(), writer)
+
+    return {**counts, "groups": aggregator.tables()}
+
+
+def print_groups(groups: dict):
+    """집계 표 출력"""
+    for model, fields in groups.items():
+        print(f"\n{model}:")
+        for field, table in fields.items():
+            print(f"  [{field}별]" if field != "전체" else "  [전체]")
+            for value, g in table.items():
+                print(f"    {value:<20} n={g['count']:<6} 한국어 {g['korean_rate']:>5.1f}%"
+                      f"  어미 {g['cat_suffix_rate']:>5.1f}%  점수 {g['avg_cat_score']:>5.1f}")
@@ -0,0 +1,151 @@
+"""
+CatTalk2D 벤치마크 응답 캐시 (내용 주소 기반, SQLite)
+- 키: (모델 digest, 엔드포인트, 프롬프트, 샘플링 옵션(seed 포함), 스트리밍 여부, 샘플 번호)의 SHA-256
+  모델 이름이 같아도 다시 학습/pull해서 digest가 바뀌면 다른 키가 됨
+- 크기 제한: 전체 크기가 max_bytes를 넘으면 가장 오래 사용하지 않은 항목부터 삭제(LRU)
+  전체 크기는 트리거가 갱신하는 cache_meta 행에 유지 (저장할 때마다 테이블 전체를 합산하지 않음, 다른 프로세스와도 일치)
+- 여러 스레드에서 동시에 사용 가능 (연결 1개 + 잠금), WAL 모드로 다른 프로세스와도 공유
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+# --cache-mode 값
+CACHE_MODES = ("off", "read", "write", "refresh")
+
+
+def cache_key(digest: str, endpoint: str, prompt, options: dict, stream: bool, sample: int) -> str:
+    """요청 내용으로 캐시 키 계산 (dict 키 순서와 무관하도록 정렬해 직렬화)"""
+    payload = json.dumps({
+        "digest": digest,
+        "endpoint": endpoint,
+        "prompt": prompt,
+        "options": options,
+        "stream": stream,
+        "sample": sample,
+    }, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    응답 캐시
+    - mode: read(적중 시 사용, 새 결과는 저장 안 함) / write(적중 시 사용, 새 결과 저장)
+            / refresh(기존 항목 무시하고 새로 생성해 덮어씀)
+    """
+
+    def __init__(self, path: Path, mode: str = "write", max_bytes: int = 512 * 1024 * 1024):
+        if mode not in CACHE_MODES or mode == "off":
+            raise ValueError(f"잘못된 캐시 모드: {mode}")
+        self.path = Path(path)
+        self.mode = mode
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, model TEXT, value TEXT NOT NULL,"
+            " size INTEGER NOT NULL, created REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_lru ON responses (last_access)")
+        self._init_total_bytes()
+
+    def _init_total_bytes(self):
+        """전체 크기 행 + 갱신 트리거 생성 (기존 캐시 파일은 처음 한 번만 합산)"""
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            self._db.execute("CREATE TABLE IF NOT EXISTS cache_meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            self._db.execute("INSERT OR IGNORE INTO cache_meta (name, value)"
+                             " SELECT 'total_bytes', COALESCE(SUM(size), 0) FROM responses")
+            self._db.execute(
+                "CREATE TRIGGER IF NOT EXISTS responses_size_insert AFTER INSERT ON responses BEGIN"
+                " UPDATE cache_meta SET value = value + NEW.size WHERE name = 'total_bytes'; END")
+            self._db.execute(
+                "CREATE TRIGGER IF NOT EXISTS responses_size_delete AFTER DELETE ON responses BEGIN"
+                " UPDATE cache_meta SET value = value - OLD.size WHERE name = 'total_bytes'; END")
+            self._db.execute(
+                "CREATE TRIGGER IF NOT EXISTS responses_size_update AFTER UPDATE OF size ON responses BEGIN"
+                " UPDATE cache_meta SET value = value + NEW.size - OLD.size WHERE name = 'total_bytes'; END")
+            self._db.execute("COMMIT")
+        except sqlite3.Error:
+            self._db.execute("ROLLBACK")
+            raise
+
+    @property
+    def reads(self) -> bool:
+        return self.mode in ("read", "write")
+
+    @property
+    def writes(self) -> bool:
+        return self.mode in ("write", "refresh")
+
+    def contains(self, key: str) -> bool:
+        """적중 여부만 확인 (접근 시각은 갱신하지 않음)"""
+        if not self.reads:
+            return False
+        with self._lock:
+            return self._db.execute("SELECT 1 FROM responses WHERE key = ?", (key,)).fetchone() is not None
+
+    def get(self, key: str) -> Optional[dict]:
+        """캐시된 결과 (없거나 읽기 모드가 아니면 None)"""
+        if not self.reads:
+            return None
+        with self._lock:
+            row = self._db.execute("SELECT value FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._db.execute("UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key))
+        return json.loads(row[0])
+
+    def put(self, key: str, model: str, value: dict):
+        """결과 저장 후 크기 제한을 넘으면 LRU 순으로 삭제"""
+        if not self.writes:
+            return
+        data = json.dumps(value, ensure_ascii=False)
+        now = time.time()
+        with self._lock:
+            # INSERT OR REPLACE는 기존 행 삭제 트리거가 돌지 않으므로 UPSERT로 크기 변화를 반영
+            self._db.execute(
+                "INSERT INTO responses (key, model, value, size, created, last_access)"
+                " VALUES (?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT (key) DO UPDATE SET model = excluded.model, value = excluded.value,"
+                " size = excluded.size, created = excluded.created, last_access = excluded.last_access",
+                (key, model, data, len(data.encode("utf-8")), now, now)
+            )
+            self._evict()
+
+    def _evict(self):
+        total = self._db.execute("SELECT value FROM cache_meta WHERE name = 'total_bytes'").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        freed = 0
+        victims = []
+        for key, size in self._db.execute("SELECT key, size FROM responses ORDER BY last_access"):
+            victims.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        self._db.executemany("DELETE FROM responses WHERE key = ?", victims)
+
+    def stats(self) -> dict:
+        with self._lock:
+            count = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            size = self._db.execute("SELECT value FROM cache_meta WHERE name = 'total_bytes'").fetchone()[0]
+        return {"entries": count, "bytes": size, "hits": self.hits, "misses": self.misses}
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,71 @@
+"""
+CatTalk2D 벤치마크 결과 저장소 (append-only JSONL)
+- 결과가 하나 끝날 때마다 한 줄씩 기록해 중간에 중단되어도 이미 측정한 데이터는 보존
+- 마지막 줄이 잘린 파일(강제 종료 등)도 읽을 수 있고, 이어쓰기 전에 줄바꿈을 복구
+"""
+
+import json
+from pathlib import Path
+from typing import Iterator
+
+
+class ResultsWriter:
+    """결과 JSONL에 한 줄씩 추가하는 기록기 (with 문으로 사용)"""
+
+    def __init__(self, path: Path, append: bool = True):
+        self.path = Path(path)
+        self.append = append
+        self._file = None
+
+    def __enter__(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self.append and self.path.exists() and self.path.stat().st_size > 0:
+            # 마지막 줄이 중간에 끊겼으면 새 줄에서 이어 쓰도록 줄바꿈 추가
+            with open(self.path, "rb") as f:
+                f.seek(-1, 2)
+                needs_newline = f.read(1) != b"\n"
+            self._file = open(self.path, "a", encoding="utf-8")
+            if needs_newline:
+                self._file.write("\n")
+        else:
+            self._file = open(self.path, "w", encoding="utf-8")
+        return self
+
+    def write(self, record: dict):
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        # 줄 단위로 flush해서 프로세스가 죽어도 완료된 결과는 디스크에 남김
+        self._file.flush()
+
+    def __exit__(self, exc_type, exc, tb):
+        self._file.close()
+        self._file = None
+
+
+def read_results(path: Path) -> Iterator[dict]:
+    """결과 JSONL을 한 줄씩 읽음 (손상된 줄은 줄 번호와 함께 경고 후 건너뜀)"""
+    path = Path(path)
+    if not path.exists():
+        return
+
+    # 바이트로 읽고 줄마다 디코딩 (한글 중간에서 잘린 마지막 줄도 손상된 줄로 처리)
+    with open(path, "rb") as f:
+        for line_no, raw in enumerate(f, start=1):
+            if not raw.strip():
+                continue
+            try:
+                yield json.loads(raw.decode("utf-8"))
+            except (UnicodeDecodeError, json.JSONDecodeError):
+                print(f"  [results] {path}:{line_no} 손상된 줄 건너뜀")
+
+
+def result_key(record: dict) -> tuple:
+    """결과를 식별하는 (모델, 케이스 인덱스, 회차) 키"""
+    return record["model"], record.get("prompt_index", 0), record.get("trial", 0)
+
+
+def completed_keys(path: Path) -> set[tuple]:
+    """이미 성공적으로 기록된 (모델, 케이스, 회차) 조합 (--resume 시 건너뛸 대상)"""
+    return {
+        result_key(record) for record in read_results(path)
+        if not record.get("error") and not record.get("is_warmup")
+    }
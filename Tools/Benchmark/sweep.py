@@ -0,0 +1,193 @@
+"""
+CatTalk2D 모델 × 샘플링 옵션 스윕
+- 탐색 공간(JSON)에서 격자(grid) 또는 무작위(random) 방식으로 옵션 조합 생성
+- 모든 (모델, 옵션, 프롬프트, 회차) 작업을 하나의 동시 실행 큐로 처리
+  작업은 모델별로 묶어 보내고 모델이 바뀔 때는 진행 중인 요청이 끝난 뒤 넘어가므로
+  서버에 두 모델이 번갈아 올라가며 재로드되는 일이 없음
+- 설정별 품질(고양이다움 점수, 한국어/어미 비율)과 지연을 모아 순위표 작성
+"""
+
+import itertools
+import json
+import random
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Iterator, Optional
+
+from bench_stats import latency_stats
+
+DEFAULT_OPTIONS_PATH = Path(__file__).with_name("sampling_options.json")
+
+
+def load_default_options(path: Path = DEFAULT_OPTIONS_PATH) -> dict:
+    """기본 샘플링 옵션 (벤치마크와 LoRA Modelfile이 같은 파일을 사용)"""
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_space(path: str) -> dict:
+    """
+    탐색 공간 로드
+    - {"옵션": [후보, ...]}: 격자/무작위 모두 후보 중에서 선택
+    - {"옵션": {"min": a, "max": b}}: 무작위 탐색 전용 균등 분포 (a, b가 정수면 정수)
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        space = json.load(f)
+    for name, values in space.items():
+        if isinstance(values, dict):
+            if "min" not in values or "max" not in values:
+                raise ValueError(f"탐색 공간 '{name}': 범위는 min/max가 필요합니다")
+        elif not isinstance(values, list) or not values:
+            raise ValueError(f"탐색 공간 '{name}': 후보 목록 또는 min/max 범위여야 합니다")
+    return space
+
+
+def grid_configs(space: dict, base: dict) -> list[dict]:
+    """모든 후보 조합 (base 옵션에 덮어씀)"""
+    ranges = [name for name, values in space.items() if isinstance(values, dict)]
+    if ranges:
+        raise ValueError(f"격자 탐색은 후보 목록만 지원합니다 (범위 지정: {', '.join(ranges)})")
+    names = list(space)
+    return [{**base, **dict(zip(names, combo))} for combo in itertools.product(*(space[n] for n in names))]
+
+
+def random_configs(space: dict, base: dict, samples: int, seed: int = 0) -> list[dict]:
+    """탐색 공간에서 samples개 무작위 추출 (중복 조합은 제외)"""
+    rng = random.Random(seed)
+    configs = []
+    seen = set()
+    for _ in range(samples * 20):
+        if len(configs) >= samples:
+            break
+        override = {}
+        for name, values in space.items():
+            if isinstance(values, dict):
+                low, high = values["min"], values["max"]
+                if isinstance(low, int) and isinstance(high, int):
+                    override[name] = rng.randint(low, high)
+                else:
+                    override[name] = round(rng.uniform(low, high), 3)
+            else:
+                override[name] = rng.choice(values)
+        key = json.dumps(override, sort_keys=True)
+        if key not in seen:
+            seen.add(key)
+            configs.append({**base, **override})
+    return configs
+
+
+def config_label(options: dict, base: dict) -> str:
+    """기본값과 다른 옵션만 표시 (예: temperature=0.9 top_p=0.8)"""
+    diff = [f"{k}={v}" for k, v in options.items() if base.get(k) != v and k != "seed"]
+    return " ".join(diff) or "(기본값)"
+
+
+def iter_jobs(models: list[str], configs: list[dict], cases: list[dict],
+              repeat: int) -> Iterator[tuple[str, int, int, int]]:
+    """(모델, 설정 인덱스, 케이스 인덱스, 회차) 작업 — 모델 단위로 연속 배치"""
+    for model in models:
+        for config_index in range(len(configs)):
+            for trial in range(repeat):
+                for case_index in range(len(cases)):
+                    yield model, config_index, case_index, trial
+
+
+def run_sweep(request_fn: Callable, jobs: Iterator[tuple], concurrency: int,
+              on_model_start: Optional[Callable[[str], None]] = None) -> Iterator[tuple]:
+    """
+    작업을 하나의 스레드 풀에서 최대 concurrency개 동시 실행하고 (작업, 결과)를 제출 순서대로 반환(yield)
+    - request_fn(model, config_index, case_index, trial) → 결과
+    - 모델이 바뀌면 이전 모델의 요청이 모두 끝난 뒤 on_model_start(model)(워밍업 등)를 호출하고 진행
+    """
+    current_model = None
+    with ThreadPoolExecutor(max_workers=max(concurrency, 1)) as executor:
+        window = deque()
+        for job in jobs:
+            if job[0] != current_model:
+                while window:
+                    done_job, future = window.popleft()
+                    yield done_job, future.result()
+                current_model = job[0]
+                if on_model_start:
+                    on_model_start(current_model)
+            window.append((job, executor.submit(request_fn, *job)))
+            # 제출 대기열은 concurrency의 2배로 제한 (작업 목록을 끝까지 미리 제출하지 않음)
+            if len(window) >= max(concurrency, 1) * 2:
+                done_job, future = window.popleft()
+                yield done_job, future.result()
+        while window:
+            done_job, future = window.popleft()
+            yield done_job, future.result()
+
+
+def rank_configs(records: list[dict], configs: list[dict], base: dict) -> list[dict]:
+    """
+    (모델, 설정)별 품질/지연 집계 후 순위 매김
+    - 정렬: 평균 고양이다움 점수 내림차순, 같으면 p50 지연 오름차순
+    - pareto: 점수가 같거나 높으면서 p50 지연이 같거나 낮은(하나는 엄격히 나은) 다른 설정이 없음
+    """
+    groups = {}
+    for r in records:
+        groups.setdefault((r["model"], r["config"]), []).append(r)
+
+    rows = []
+    for (model, config_index), group in groups.items():
+        valid = [r for r in group if not r.get("error")]
+        latency = latency_stats([r["response_time_ms"] for r in valid])
+        scores = [r["cat_score"] for r in valid if r.get("cat_score") is not None]
+        tps = [r["tokens_per_sec"] for r in valid if r.get("tokens_per_sec") is not None]
+        rows.append({
+            "model": model,
+            "config": config_index,
+            "label": config_label(configs[config_index], base),
+            "options": configs[config_index],
+            "count": len(group),
+            "error_count": len(group) - len(valid),
+            "avg_cat_score": sum(scores) / len(scores) if scores else None,
+            "korean_rate": sum(1 for r in valid if r.get("is_korean")) / len(valid) * 100 if valid else None,
+            "cat_suffix_rate": sum(1 for r in valid if r.get("has_cat_suffix")) / len(valid) * 100 if valid else None,
+            "p50_response_time_ms": latency["p50"],
+            "p90_response_time_ms": latency["p90"],
+            "avg_tokens_per_sec": sum(tps) / len(tps) if tps else None,
+        })
+
+    def measured(row: dict) -> bool:
+        return row["avg_cat_score"] is not None and row["p50_response_time_ms"] is not None
+
+    scored = [row for row in rows if measured(row)]
+    for row in rows:
+        row["pareto"] = measured(row) and not any(
+            other is not row
+            and other["avg_cat_score"] >= row["avg_cat_score"]
+            and other["p50_response_time_ms"] <= row["p50_response_time_ms"]
+            and (other["avg_cat_score"] > row["avg_cat_score"]
+                 or other["p50_response_time_ms"] < row["p50_response_time_ms"])
+            for other in scored
+        )
+
+    # 점수 높은 순 → 지연 낮은 순, 측정값이 없는 행은 뒤로 (0.0은 실제 값으로 취급)
+    rows.sort(key=lambda row: (
+        row["avg_cat_score"] is None, -(row["avg_cat_score"] or 0.0),
+        row["p50_response_time_ms"] is None, row["p50_response_time_ms"] or 0.0,
+    ))
+    for rank, row in enumerate(rows, start=1):
+        row["rank"] = rank
+    return rows
+
+
+def print_ranking(rows: list[dict]):
+    """순위표 출력 (* = 품질/지연 파레토 최적)"""
+    def fmt(value: Optional[float], spec: str) -> str:
+        return format(value, spec) if value is not None else "-"
+
+    print("\n" + "="*60)
+    print("SWEEP RANKING (품질 vs 지연, * = 파레토 최적)")
+    print("="*60)
+    print(f"{'#':>3}  {'모델':<16} {'점수':>5} {'한국어':>6} {'어미':>6} {'p50':>7} {'p90':>7} {'tok/s':>6}  설정")
+    for row in rows:
+        print(f"{row['rank']:>3}{'*' if row['pareto'] else ' '} {row['model']:<16}"
+              f" {fmt(row['avg_cat_score'], '5.1f')} {fmt(row['korean_rate'], '5.0f')}%"
+              f" {fmt(row['cat_suffix_rate'], '5.0f')}% {fmt(row['p50_response_time_ms'], '5.0f')}ms"
+              f" {fmt(row['p90_response_time_ms'], '5.0f')}ms {fmt(row['avg_tokens_per_sec'], '6.1f')}"
+              f"  {row['label']}" + (f" (오류 {row['error_count']})" if row['error_count'] else ""))
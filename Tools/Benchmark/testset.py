@@ -0,0 +1,47 @@
+"""
+CatTalk2D 테스트셋 로더
+- DevTools가 생성한 JSONL(dataset_schema.md 형식)을 한 줄씩 스트리밍으로 읽음
+- 게임이 실제로 보내는 system/user 메시지를 그대로 벤치마크에 사용
+"""
+
+import json
+from typing import Iterator
+
+# 벤치마크 결과를 묶을 수 있는 meta 필드
+GROUP_FIELDS = ("caseKey", "category", "ageLevel", "moodTag", "affectionTier", "careProfile")
+
+
+def iter_testset(path: str) -> Iterator[dict]:
+    """
+    테스트셋 JSONL을 케이스 단위로 스트리밍
+    - 각 케이스: {"prompt": [system, user 메시지], "meta": {...}, "expected": 정답 응답}
+    - 형식이 잘못된 줄은 줄 번호와 함께 경고하고 건너뜀
+    """
+    # DevTools 출력은 UTF-8 BOM으로 시작하므로 utf-8-sig로 읽음
+    with open(path, "r", encoding="utf-8-sig") as f:
+        for line_no, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+
+            try:
+                sample = json.loads(line)
+            except json.JSONDecodeError as e:
+                print(f"  [testset] {path}:{line_no} JSON 파싱 실패: {e}")
+                continue
+
+            messages = sample.get("messages") or []
+            prompt = [
+                {"role": m["role"], "content": m.get("content", "")}
+                for m in messages if m.get("role") in ("system", "user")
+            ]
+            if not any(m["role"] == "user" for m in prompt):
+                print(f"  [testset] {path}:{line_no} user 메시지가 없어 건너뜀")
+                continue
+
+            expected = next((m.get("content", "") for m in messages if m.get("role") == "assistant"), None)
+
+            yield {
+                "prompt": prompt,
+                "meta": sample.get("meta") or {},
+                "expected": expected,
+            }
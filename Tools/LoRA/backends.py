@@ -0,0 +1,205 @@
+"""
+CatTalk2D LoRA 학습 백엔드
+- unsloth: CUDA 전용, 4-bit 로드 + Unsloth 커널/gradient checkpointing (가장 빠름)
+- peft: transformers + PEFT (Windows/CPU 포함 어디서나 동작, bitsandbytes가 있으면 4-bit)
+- select_backend("auto"): 하드웨어와 설치된 패키지를 보고 고름
+  CUDA + unsloth → unsloth / 그 외 → peft
+"""
+
+import importlib.util
+import platform
+from dataclasses import dataclass
+from typing import Optional
+
+# 모든 백엔드가 같은 LoRA 대상 모듈 사용
+TARGET_MODULES = ["q_proj", "k_proj", "v_proj", "o_proj",
+                  "gate_proj", "up_proj", "down_proj"]
+
+BACKEND_NAMES = ("auto", "unsloth", "peft")
+
+
+def _installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+@dataclass
+class Hardware:
+    """학습 환경 (torch가 없으면 cuda=False)"""
+    system: str
+    torch_version: Optional[str] = None
+    cuda: bool = False
+    cuda_version: Optional[str] = None
+    gpu: Optional[str] = None
+    vram_gb: float = 0.0
+    bf16: bool = False
+
+    @property
+    def precision(self) -> str:
+        """혼합 정밀도: bf16 지원 GPU → bf16 / 그 외 GPU → fp16 / CPU → fp32"""
+        if not self.cuda:
+            return "fp32"
+        return "bf16" if self.bf16 else "fp16"
+
+    def print_summary(self):
+        if self.torch_version is None:
+            print("PyTorch가 설치되지 않았습니다. (설치: pip install torch)")
+            return
+        print(f"PyTorch 버전: {self.torch_version}")
+        print(f"CUDA 사용 가능: {self.cuda}")
+        if self.cuda:
+            print(f"CUDA 버전: {self.cuda_version}")
+            print(f"GPU: {self.gpu} ({self.vram_gb:.1f} GB)")
+        print(f"정밀도: {self.precision}")
+
+
+def detect_hardware() -> Hardware:
+    """torch로 GPU/정밀도 지원 확인"""
+    hw = Hardware(system=platform.system())
+    try:
+        import torch
+    except ImportError:
+        return hw
+    hw.torch_version = torch.__version__
+    hw.cuda = torch.cuda.is_available()
+    if hw.cuda:
+        hw.cuda_version = torch.version.cuda
+        hw.gpu = torch.cuda.get_device_name(0)
+        hw.vram_gb = torch.cuda.get_device_properties(0).total_memory / 1e9
+        hw.bf16 = torch.cuda.is_bf16_supported()
+    return hw
+
+
+class UnslothBackend:
+    """Unsloth FastLanguageModel (CUDA 전용)"""
+    name = "unsloth"
+    optim = "adamw_8bit"
+    install_hint = "pip install 'unsloth[colab-new] @ git+https://github.com/unslothai/unsloth.git'"
+
+    @staticmethod
+    def available(hw: Hardware) -> bool:
+        return hw.cuda and _installed("unsloth")
+
+    @staticmethod
+    def default_4bit(hw: Hardware) -> bool:
+        return True
+
+    def load(self, args, hw: Hardware):
+        """기본 모델 + LoRA 어댑터 → (model, tokenizer)"""
+        from unsloth import FastLanguageModel
+
+        model, tokenizer = FastLanguageModel.from_pretrained(
+            model_name=args.base_model,
+            max_seq_length=args.max_seq_length,
+            load_in_4bit=args.load_in_4bit,
+            dtype=None,  # 자동 감지
+        )
+        model = FastLanguageModel.get_peft_model(
+            model,
+            r=args.lora_r,
+            target_modules=TARGET_MODULES,
+            lora_alpha=args.lora_alpha,
+            lora_dropout=args.lora_dropout,
+            bias="none",
+            use_gradient_checkpointing="unsloth",
+            random_state=args.seed,
+        )
+        return model, tokenizer
+
+    @staticmethod
+    def for_inference(model):
+        from unsloth import FastLanguageModel
+
+        FastLanguageModel.for_inference(model)
+
+
+def flash_attention_available(hw: Hardware) -> bool:
+    """flash_attention_2 사용 가능 여부 (CUDA + flash-attn 패키지)"""
+    return hw.cuda and _installed("flash_attn")
+
+
+class PeftBackend:
+    """transformers + PEFT (bitsandbytes가 있으면 4-bit, CPU에서도 동작)"""
+    name = "peft"
+    install_hint = "pip install torch transformers peft accelerate trl"
+
+    @staticmethod
+    def available(hw: Hardware) -> bool:
+        return hw.torch_version is not None and _installed("peft") and _installed("transformers")
+
+    @staticmethod
+    def default_4bit(hw: Hardware) -> bool:
+        return hw.cuda and _installed("bitsandbytes")
+
+    @property
+    def optim(self) -> str:
+        return "adamw_8bit" if _installed("bitsandbytes") else "adamw_torch"
+
+    def load(self, args, hw: Hardware):
+        """기본 모델 + LoRA 어댑터 → (model, tokenizer)"""
+        import torch
+        from peft import LoraConfig, get_peft_model, prepare_model_for_kbit_training
+        from transformers import AutoModelForCausalLM, AutoTokenizer
+
+        dtype = {"bf16": torch.bfloat16, "fp16": torch.float16, "fp32": torch.float32}[hw.precision]
+        kwargs = {"trust_remote_code": True, "torch_dtype": dtype}
+        if hw.cuda:
+            kwargs["device_map"] = "auto"
+        if getattr(args, "batching", None) == "pack" and getattr(args, "pack_attention", None) == "position_ids":
+            # position_ids로 샘플 경계를 나누는 것은 flash_attention_2뿐 (main에서 설치 여부 확인)
+            kwargs["attn_implementation"] = "flash_attention_2"
+        if args.load_in_4bit:
+            from transformers import BitsAndBytesConfig
+
+            kwargs["quantization_config"] = BitsAndBytesConfig(
+                load_in_4bit=True,
+                bnb_4bit_use_double_quant=True,
+                bnb_4bit_quant_type="nf4",
+                bnb_4bit_compute_dtype=torch.bfloat16 if hw.bf16 else torch.float16,
+            )
+        model = AutoModelForCausalLM.from_pretrained(args.base_model, **kwargs)
+        if args.load_in_4bit:
+            model = prepare_model_for_kbit_training(model)
+
+        tokenizer = AutoTokenizer.from_pretrained(args.base_model, trust_remote_code=True)
+        if tokenizer.pad_token is None:
+            tokenizer.pad_token = tokenizer.eos_token
+        tokenizer.padding_side = "right"
+
+        lora_config = LoraConfig(
+            r=args.lora_r,
+            lora_alpha=args.lora_alpha,
+            target_modules=TARGET_MODULES,
+            lora_dropout=args.lora_dropout,
+            bias="none",
+            task_type="CAUSAL_LM",
+        )
+        model = get_peft_model(model, lora_config)
+        model.print_trainable_parameters()
+        return model, tokenizer
+
+    @staticmethod
+    def for_inference(model):
+        model.eval()
+
+
+BACKENDS = {
+    "unsloth": UnslothBackend,
+    "peft": PeftBackend,
+}
+
+
+def select_backend(name: str, hw: Hardware):
+    """
+    백엔드 인스턴스 반환
+    - auto: CUDA + unsloth 설치 → unsloth / 그 외 → peft
+    - 지정한 백엔드를 쓸 수 없으면 RuntimeError (설치 안내 포함)
+    """
+    if name == "auto":
+        name = "unsloth" if UnslothBackend.available(hw) else "peft"
+    if name not in BACKENDS:
+        raise ValueError(f"알 수 없는 백엔드: {name} ({', '.join(BACKEND_NAMES)})")
+    backend = BACKENDS[name]()
+    if not backend.available(hw):
+        reason = "CUDA GPU가 필요합니다" if name == "unsloth" and not hw.cuda else "패키지가 설치되지 않았습니다"
+        raise RuntimeError(f"{name} 백엔드를 사용할 수 없습니다: {reason}\n설치: {backend.install_hint}")
+    return backend
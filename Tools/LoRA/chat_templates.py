@@ -0,0 +1,72 @@
+"""
+CatTalk2D 학습용 채팅 템플릿
+- 데이터셋 messages(system/user/assistant)를 모델별 학습 텍스트로 변환
+- 템플릿마다 학습용 format 함수, 추론용 프롬프트, assistant 전용 loss 마스크를 함께 묶음
+- 새 모델 계열은 format/prompt 함수를 만들고 TEMPLATES에 등록
+"""
+
+from dataclasses import dataclass
+from typing import Callable
+
+from loss_mask import gemma_assistant_mask, llama3_assistant_mask
+
+
+def _split_messages(messages: list[dict]) -> tuple[str, str, str]:
+    system = next((m['content'] for m in messages if m['role'] == 'system'), '')
+    user = next((m['content'] for m in messages if m['role'] == 'user'), '')
+    assistant = next((m['content'] for m in messages if m['role'] == 'assistant'), '')
+    return system, user, assistant
+
+
+def gemma_prompt(system: str, user: str) -> str:
+    """Gemma 생성 프롬프트 (system 역할이 없어 user 턴 앞에 붙임)"""
+    return f"<start_of_turn>user\n{system}\n\n{user}<end_of_turn>\n<start_of_turn>model\n"
+
+
+def gemma_format(sample: dict) -> dict:
+    """Gemma 학습 텍스트"""
+    system, user, assistant = _split_messages(sample['messages'])
+    return {'text': f"{gemma_prompt(system, user)}{assistant}<end_of_turn>"}
+
+
+def llama3_prompt(system: str, user: str) -> str:
+    """Llama 3 Chat 생성 프롬프트"""
+    return f"""<|begin_of_text|><|start_header_id|>system<|end_header_id|>
+
+{system}<|eot_id|><|start_header_id|>user<|end_header_id|>
+
+{user}<|eot_id|><|start_header_id|>assistant<|end_header_id|>
+
+"""
+
+
+def llama3_format(sample: dict) -> dict:
+    """Llama 3 Chat 학습 텍스트"""
+    system, user, assistant = _split_messages(sample['messages'])
+    return {'text': f"{llama3_prompt(system, user)}{assistant}<|eot_id|>"}
+
+
+@dataclass(frozen=True)
+class ChatTemplate:
+    name: str
+    format: Callable[[dict], dict]           # 샘플 → {"text": 학습 텍스트}
+    prompt: Callable[[str, str], str]        # (system, user) → 생성 프롬프트
+    assistant_mask: Callable                 # token_cache mask_fn (assistant 응답만 1)
+    end_of_turn: str
+
+
+TEMPLATES = {
+    "gemma": ChatTemplate("gemma", gemma_format, gemma_prompt, gemma_assistant_mask, "<end_of_turn>"),
+    "llama3": ChatTemplate("llama3", llama3_format, llama3_prompt, llama3_assistant_mask, "<|eot_id|>"),
+}
+
+
+def template_for_model(base_model: str) -> ChatTemplate:
+    """기본 모델 이름으로 템플릿 추정 (gemma / llama-3), 알 수 없으면 ValueError"""
+    name = base_model.lower()
+    if "gemma" in name:
+        return TEMPLATES["gemma"]
+    if "llama-3" in name or "llama3" in name:
+        return TEMPLATES["llama3"]
+    raise ValueError(f"'{base_model}'의 채팅 템플릿을 알 수 없습니다. --template으로 지정하세요 "
+                     f"({', '.join(TEMPLATES)})")
@@ -0,0 +1,268 @@
+"""
+CatTalk2D 비동기 체크포인트 / 이어서 학습
+- Trainer 기본 저장은 전체 모델 상태를 학습 루프 안에서 디스크에 쓰므로 저장 스텝마다 학습이 멈춤
+- AsyncCheckpointCallback: LoRA 어댑터 + 옵티마이저/스케줄러 + RNG + TrainerState만
+  메인 스레드에서 CPU로 복사하고, 디스크 쓰기는 백그라운드 스레드에서 수행
+- 쓰기는 checkpoint-<스텝>.tmp에 한 뒤 완료 표시(checkpoint_complete.json)까지 쓰고 이름을 바꿈(os.replace)
+  → 중간에 프로세스가 죽어도 checkpoint-<스텝> 디렉토리는 항상 완전한 상태
+- 파일 구성은 transformers 체크포인트와 같으므로 trainer.train(resume_from_checkpoint=...)가
+  옵티마이저/스케줄러/RNG/global_step을 복원하고 이미 학습한 배치를 건너뜀 (데이터 로더 위치)
+- SIGTERM(선점/중단 요청)을 받으면 현재 스텝에서 체크포인트를 저장하고 학습을 멈춤
+
+사용법 (체크포인트 확인):
+    python checkpoint.py cheese_cat_lora
+"""
+
+import argparse
+import dataclasses
+import glob
+import json
+import os
+import random
+import re
+import shutil
+import signal
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional
+
+try:
+    from transformers import TrainerCallback
+except ImportError:  # 체크포인트 확인 CLI만 사용하는 환경
+    TrainerCallback = object
+
+COMPLETE_MARKER = "checkpoint_complete.json"
+CHECKPOINT_PATTERN = re.compile(r"^checkpoint-(\d+)$")
+
+# 이어서 학습할 때 바뀌면 데이터 로더 위치가 어긋나는 설정
+RESUME_KEYS = ("dataset", "batch_size", "gradient_accumulation", "seed", "batching", "max_seq_length")
+
+
+def _to_cpu(obj):
+    """state_dict 안의 텐서를 CPU로 복사 (백그라운드 스레드가 쓰는 동안 학습이 값을 바꾸지 않도록)"""
+    import torch
+
+    if isinstance(obj, torch.Tensor):
+        return obj.detach().to("cpu", copy=True)
+    if isinstance(obj, dict):
+        return {k: _to_cpu(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(_to_cpu(v) for v in obj)
+    return obj
+
+
+def _rng_state() -> dict:
+    """transformers rng_state.pth 형식 (단일 프로세스)"""
+    import numpy as np
+    import torch
+
+    state = {
+        "python": random.getstate(),
+        "numpy": np.random.get_state(),
+        "cpu": torch.random.get_rng_state(),
+    }
+    if torch.cuda.is_available():
+        state["cuda"] = torch.cuda.random.get_rng_state_all()
+    return state
+
+
+def is_valid_checkpoint(path: str) -> bool:
+    """
+    완료 표시와 어댑터/옵티마이저 파일이 모두 있는지
+    - Trainer 기본 저장(--no-async-checkpoint)은 완료 표시가 없으므로 마지막에 쓰는 trainer_state.json으로 판단
+    """
+    marker = os.path.join(path, COMPLETE_MARKER)
+    if not os.path.isfile(marker):
+        return os.path.isfile(os.path.join(path, "trainer_state.json")) and any(
+            os.path.isfile(os.path.join(path, name))
+            for name in ("adapter_model.safetensors", "adapter_model.bin"))
+    try:
+        with open(marker, "r", encoding="utf-8") as f:
+            files = json.load(f)["files"]
+    except (OSError, ValueError, KeyError):
+        return False
+    return all(os.path.isfile(os.path.join(path, name)) for name in files)
+
+
+def list_checkpoints(output_dir: str) -> list[tuple[int, str]]:
+    """output_dir 안의 checkpoint-<스텝> 목록 (스텝 오름차순, .tmp 제외)"""
+    found = []
+    if not os.path.isdir(output_dir):
+        return found
+    for name in os.listdir(output_dir):
+        match = CHECKPOINT_PATTERN.match(name)
+        if match:
+            found.append((int(match.group(1)), os.path.join(output_dir, name)))
+    return sorted(found)
+
+
+def find_latest_checkpoint(output_dir: str) -> Optional[str]:
+    """가장 최근의 유효한 체크포인트 (없으면 None, 손상된 것은 건너뜀)"""
+    for step, path in reversed(list_checkpoints(output_dir)):
+        if is_valid_checkpoint(path):
+            return path
+        print(f"  [checkpoint] 불완전한 체크포인트 건너뜀: {path}")
+    return None
+
+
+def find_latest_run(root: str, prefix: str = "cattalk2d_lora_") -> Optional[str]:
+    """타임스탬프 출력 디렉토리 중 유효한 체크포인트가 있는 가장 최근 실행"""
+    runs = sorted(glob.glob(os.path.join(root, f"{prefix}*")), reverse=True)
+    for run in runs:
+        if find_latest_checkpoint(run):
+            return run
+    return None
+
+
+def check_resume_config(checkpoint: str, run_config: dict) -> list[str]:
+    """체크포인트를 만든 설정과 지금 설정이 다른 항목 (데이터 로더 위치가 어긋날 수 있음)"""
+    marker = os.path.join(checkpoint, COMPLETE_MARKER)
+    if not os.path.isfile(marker):
+        return []
+    with open(marker, "r", encoding="utf-8") as f:
+        saved = json.load(f).get("config", {})
+    return [f"{key}: {saved[key]!r} → {run_config.get(key)!r}"
+            for key in RESUME_KEYS if key in saved and saved[key] != run_config.get(key)]
+
+
+class AsyncCheckpointCallback(TrainerCallback):
+    """
+    save_steps마다 비동기 체크포인트 저장 (TrainingArguments.save_strategy="no"와 함께 사용)
+    - 메인 스레드: 어댑터/옵티마이저 상태를 CPU로 복사 (LoRA 파라미터만이라 수십 MB)
+    - 백그라운드: safetensors/torch.save → 완료 표시 → os.replace → 오래된 체크포인트 정리
+    - 이전 저장이 아직 진행 중이면 끝날 때까지 기다림 (CPU 복사본이 쌓이지 않도록)
+    - run_config: 완료 표시에 기록할 학습 설정 (이어서 학습할 때 비교)
+    """
+
+    def __init__(self, save_steps: int, save_total_limit: Optional[int] = None,
+                 run_config: Optional[dict] = None, handle_sigterm: bool = True):
+        self.save_steps = save_steps
+        self.save_total_limit = save_total_limit
+        self.run_config = run_config or {}
+        self.handle_sigterm = handle_sigterm
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="checkpoint")
+        self._pending: Optional[Future] = None
+        self._stop_requested = threading.Event()
+        self._previous_handler = None
+        self.snapshot_seconds = 0.0   # 메인 스레드가 쓴 시간 (CPU 복사 + 이전 저장 대기)
+        self.write_seconds = 0.0      # 백그라운드 쓰기 시간
+        self.saved: list[str] = []
+        self.stopped = False          # 종료 요청으로 체크포인트 저장 후 학습을 멈췄는지 (호출 측에서 확인)
+
+    # --- 시그널 ---
+    def _on_sigterm(self, signum, frame):
+        print("\n  [checkpoint] 종료 요청 수신: 현재 스텝에서 체크포인트 저장 후 중단")
+        self._stop_requested.set()
+
+    def on_train_begin(self, args, state, control, **kwargs):
+        if self.handle_sigterm and threading.current_thread() is threading.main_thread():
+            self._previous_handler = signal.signal(signal.SIGTERM, self._on_sigterm)
+
+    # --- 저장 ---
+    def on_step_end(self, args, state, control, model=None, optimizer=None, lr_scheduler=None, **kwargs):
+        stop = self._stop_requested.is_set()
+        if not stop and (self.save_steps <= 0 or state.global_step % self.save_steps != 0):
+            return
+        if state.is_world_process_zero:
+            self.save(args.output_dir, state, model, optimizer, lr_scheduler)
+        if stop:
+            self.wait()
+            self.stopped = True
+            control.should_training_stop = True
+
+    def save(self, output_dir, state, model, optimizer, lr_scheduler):
+        """현재 상태를 CPU로 복사하고 쓰기는 백그라운드로 넘김"""
+        from peft import get_peft_model_state_dict
+
+        start = time.perf_counter()
+        self.wait()
+        snapshot = {
+            "adapter": _to_cpu(get_peft_model_state_dict(model)),
+            "peft_config": model.peft_config,
+            "optimizer": _to_cpu(optimizer.state_dict()) if optimizer is not None else None,
+            "scheduler": lr_scheduler.state_dict() if lr_scheduler is not None else None,
+            "rng": _rng_state(),
+            "trainer_state": json.dumps(dataclasses.asdict(state), indent=2, sort_keys=True) + "\n",
+        }
+        self.snapshot_seconds += time.perf_counter() - start
+        final = os.path.join(output_dir, f"checkpoint-{state.global_step}")
+        self._pending = self._executor.submit(self._write, final, state.global_step, snapshot)
+
+    def _write(self, final: str, step: int, snapshot: dict):
+        import torch
+        from safetensors.torch import save_file
+
+        start = time.perf_counter()
+        tmp = final + ".tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+
+        files = ["adapter_model.safetensors", "adapter_config.json", "trainer_state.json", "rng_state.pth"]
+        save_file(snapshot["adapter"], os.path.join(tmp, "adapter_model.safetensors"), metadata={"format": "pt"})
+        snapshot["peft_config"]["default"].save_pretrained(tmp)
+        with open(os.path.join(tmp, "trainer_state.json"), "w", encoding="utf-8") as f:
+            f.write(snapshot["trainer_state"])
+        torch.save(snapshot["rng"], os.path.join(tmp, "rng_state.pth"))
+        if snapshot["optimizer"] is not None:
+            torch.save(snapshot["optimizer"], os.path.join(tmp, "optimizer.pt"))
+            files.append("optimizer.pt")
+        if snapshot["scheduler"] is not None:
+            torch.save(snapshot["scheduler"], os.path.join(tmp, "scheduler.pt"))
+            files.append("scheduler.pt")
+
+        # 완료 표시를 마지막에 쓰고 이름을 바꿔, checkpoint-<스텝>은 항상 완전한 상태
+        with open(os.path.join(tmp, COMPLETE_MARKER), "w", encoding="utf-8") as f:
+            json.dump({"step": step, "files": files, "config": self.run_config,
+                       "saved_at": time.strftime("%Y-%m-%dT%H:%M:%S")}, f, ensure_ascii=False, indent=2)
+        if os.path.exists(final):
+            shutil.rmtree(final)
+        os.replace(tmp, final)
+
+        self._rotate(os.path.dirname(final))
+        self.write_seconds += time.perf_counter() - start
+        self.saved.append(final)
+        print(f"  [checkpoint] 저장 완료: {final} ({time.perf_counter() - start:.2f}s, 백그라운드)")
+
+    def _rotate(self, output_dir: str):
+        """save_total_limit개를 넘는 오래된 체크포인트 삭제 (유효한 것만 개수에 포함)"""
+        if not self.save_total_limit:
+            return
+        valid = [path for _, path in list_checkpoints(output_dir) if is_valid_checkpoint(path)]
+        for path in valid[:-self.save_total_limit]:
+            shutil.rmtree(path, ignore_errors=True)
+
+    def wait(self):
+        """진행 중인 저장이 끝날 때까지 대기 (쓰기 오류는 여기서 다시 발생)"""
+        if self._pending is not None:
+            pending, self._pending = self._pending, None
+            pending.result()
+
+    def on_train_end(self, args, state, control, **kwargs):
+        self.wait()
+        self._executor.shutdown(wait=True)
+        if self._previous_handler is not None:
+            signal.signal(signal.SIGTERM, self._previous_handler)
+            self._previous_handler = None
+        if self.saved:
+            print(f"  [checkpoint] {len(self.saved)}회 저장: 학습 루프 정지 {self.snapshot_seconds:.2f}s"
+                  f" / 백그라운드 쓰기 {self.write_seconds:.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CatTalk2D 체크포인트 확인")
+    parser.add_argument("output", help="학습 출력 디렉토리")
+    args = parser.parse_args()
+
+    checkpoints = list_checkpoints(args.output)
+    if not checkpoints:
+        print(f"{args.output}: 체크포인트 없음")
+        return
+    for step, path in checkpoints:
+        print(f"  {'OK ' if is_valid_checkpoint(path) else '불완전'} 스텝 {step:>6}  {path}")
+    latest = find_latest_checkpoint(args.output)
+    print(f"이어서 학습할 체크포인트: {latest or '없음'}")
+
+
+if __name__ == "__main__":
+    main()
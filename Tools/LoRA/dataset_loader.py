@@ -0,0 +1,184 @@
+"""
+CatTalk2D 학습 데이터셋 로더 (모든 학습 스크립트 공용)
+- JSONL을 한 줄씩 스트리밍으로 읽고 messages 역할/meta 필드를 검사
+- 잘못된 줄은 줄 번호와 함께 보고하고 건너뜀 (오류가 max_errors를 넘으면 중단)
+- 학습용 Dataset은 제너레이터에서 Arrow 파일로 바로 기록되고 메모리 매핑으로 읽힘
+  (전체 샘플을 파이썬 리스트로 만들지 않으므로 수백만 줄이어도 메모리 사용량이 일정)
+
+사용법 (검사만):
+    python dataset_loader.py ../../LoraData/dataset.jsonl --require-meta
+"""
+
+import argparse
+import hashlib
+import json
+import sys
+from dataclasses import dataclass, field
+from typing import Callable, Iterator, Optional
+
+# messages에 허용되는 역할과 학습에 반드시 필요한 역할
+ALLOWED_ROLES = ("system", "user", "assistant")
+REQUIRED_ROLES = ("user", "assistant")
+
+# dataset_schema.md의 meta 필드와 허용 값 (None = 값 제한 없음)
+META_FIELDS = {
+    "ageLevel": ("Child", "Teen", "Adult"),
+    "moodTag": ("happy", "hungry", "stressed", "tired", "bored"),
+    "affectionTier": ("low", "mid", "high"),
+    "category": None,
+    "personality": None,
+    "careProfile": None,
+    "caseKey": None,
+}
+
+
+class DatasetError(Exception):
+    """데이터셋 검사 실패 (잘못된 줄이 너무 많음 / 유효한 샘플 없음)"""
+
+
+@dataclass
+class LoadReport:
+    """로드 결과 요약"""
+    path: str
+    lines: int = 0
+    valid: int = 0
+    errors: list[tuple[int, str]] = field(default_factory=list)   # (줄 번호, 사유)
+
+    def print_summary(self, limit: int = 10):
+        print(f"  {self.path}: 유효 {self.valid}개 / 잘못된 줄 {len(self.errors)}개")
+        for line_no, reason in self.errors[:limit]:
+            print(f"    {line_no}행: {reason}")
+        if len(self.errors) > limit:
+            print(f"    ... 외 {len(self.errors) - limit}개")
+
+
+def validate_sample(sample, require_meta: bool = False) -> Optional[str]:
+    """샘플 1개 검사 (문제가 없으면 None, 있으면 사유)"""
+    if not isinstance(sample, dict):
+        return "JSON 객체가 아님"
+
+    messages = sample.get("messages")
+    if not isinstance(messages, list) or not messages:
+        return "messages가 없거나 목록이 아님"
+    for i, m in enumerate(messages):
+        if not isinstance(m, dict):
+            return f"messages[{i}]가 객체가 아님"
+        if m.get("role") not in ALLOWED_ROLES:
+            return f"messages[{i}] 알 수 없는 역할: {m.get('role')!r}"
+        if not isinstance(m.get("content"), str) or not m["content"].strip():
+            return f"messages[{i}] ({m['role']}) 내용이 비어 있음"
+    roles = [m["role"] for m in messages]
+    for role in REQUIRED_ROLES:
+        if role not in roles:
+            return f"{role} 메시지가 없음"
+    if roles[-1] != "assistant":
+        return "마지막 메시지가 assistant가 아님"
+
+    meta = sample.get("meta")
+    if meta is None:
+        return "meta가 없음" if require_meta else None
+    if not isinstance(meta, dict):
+        return "meta가 객체가 아님"
+    for name, allowed in META_FIELDS.items():
+        value = meta.get(name)
+        if value is None:
+            if require_meta:
+                return f"meta.{name}이 없음"
+        elif allowed is not None and value not in allowed:
+            return f"meta.{name} 허용되지 않는 값: {value!r}"
+    return None
+
+
+def iter_samples(path: str, require_meta: bool = False, max_errors: Optional[int] = 100,
+                 report: Optional[LoadReport] = None) -> Iterator[dict]:
+    """
+    JSONL을 한 줄씩 읽어 유효한 샘플만 반환(yield)
+    - DevTools 출력은 UTF-8 BOM으로 시작하므로 utf-8-sig로 읽음
+    - report를 주면 줄 수/오류를 기록 (제너레이터가 끝까지 소비된 뒤 완성됨)
+    - 잘못된 줄이 max_errors개를 넘으면 DatasetError (None이면 제한 없음)
+    """
+    report = report if report is not None else LoadReport(path)
+    with open(path, "r", encoding="utf-8-sig") as f:
+        for line_no, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            report.lines += 1
+            try:
+                sample = json.loads(line)
+            except json.JSONDecodeError as e:
+                reason = f"JSON 파싱 실패: {e}"
+            else:
+                reason = validate_sample(sample, require_meta)
+
+            if reason is None:
+                report.valid += 1
+                yield sample
+                continue
+
+            report.errors.append((line_no, reason))
+            print(f"  [dataset] {path}:{line_no} {reason}")
+            if max_errors is not None and len(report.errors) > max_errors:
+                raise DatasetError(f"{path}: 잘못된 줄이 {max_errors}개를 넘었습니다")
+
+    if report.valid == 0:
+        raise DatasetError(f"{path}: 유효한 샘플이 없습니다")
+
+
+def file_digest(path: str) -> str:
+    """데이터셋 파일 내용 해시 (1MB씩 읽음)"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _generate_records(path: str, format_fn: Callable[[dict], dict], require_meta: bool,
+                      max_errors: Optional[int], content_digest: str) -> Iterator[dict]:
+    """
+    Dataset.from_generator용 제너레이터 (캐시 지문 계산을 위해 모듈 최상위 함수로 둠)
+    - content_digest는 쓰지 않지만 gen_kwargs에 들어가 datasets 캐시 지문이 파일 내용을 따르게 함
+    """
+    report = LoadReport(path)
+    for sample in iter_samples(path, require_meta, max_errors, report):
+        yield format_fn(sample)
+    report.print_summary()
+
+
+def build_dataset(path: str, format_fn: Callable[[dict], dict], require_meta: bool = False,
+                  max_errors: Optional[int] = 100, streaming: bool = False):
+    """
+    학습용 Hugging Face Dataset 생성
+    - format_fn(샘플) → 레코드 (예: {"text": 채팅 템플릿 적용 문자열})
+    - streaming=False: Arrow 파일로 기록 후 메모리 매핑
+      (파일 내용/format_fn/옵션이 같으면 datasets 캐시 재사용, 같은 경로라도 내용이 바뀌면 다시 기록)
+    - streaming=True: IterableDataset (디스크에도 쓰지 않음, 학습 시 max_steps 지정 필요)
+    """
+    from datasets import Dataset, IterableDataset
+
+    gen_kwargs = {"path": path, "format_fn": format_fn, "require_meta": require_meta, "max_errors": max_errors,
+                  "content_digest": file_digest(path)}
+    if streaming:
+        return IterableDataset.from_generator(_generate_records, gen_kwargs=gen_kwargs)
+    return Dataset.from_generator(_generate_records, gen_kwargs=gen_kwargs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CatTalk2D 학습 데이터셋 검사")
+    parser.add_argument("path", help="데이터셋 JSONL 경로")
+    parser.add_argument("--require-meta", action="store_true", help="meta 필드 필수")
+    args = parser.parse_args()
+
+    report = LoadReport(args.path)
+    try:
+        for _ in iter_samples(args.path, args.require_meta, max_errors=None, report=report):
+            pass
+    except DatasetError as e:
+        print(f"ERROR: {e}")
+        return 1
+    report.print_summary()
+    return 1 if report.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,397 @@
+"""
+CatTalk2D GGUF 내보내기 / 양자화 (Windows/Linux/macOS 공통)
+1. merge: 기본 모델 + LoRA 어댑터 병합 → merged/ (HuggingFace 형식, fp16)
+2. convert: llama.cpp convert_hf_to_gguf.py → cattalk2d-f16.gguf
+3. quantize: llama-quantize로 여러 양자화를 병렬 생성 → cattalk2d-<양자화>.gguf
+4. modelfile: Modelfile.template + 벤치마크 샘플링 옵션 → Modelfile.<양자화>
+5. bench: 양자화별로 ollama create 후 파일 크기 / 콜드 로드 시간 / 디코드 속도 측정
+결과 요약은 export_report.json (크기와 지연 시간을 비교해 배포할 양자화 선택)
+
+- 단계마다 실패하면 원인과 함께 ExportError (조용히 넘어가지 않음)
+- 같은 어댑터(가중치/설정 해시)로 만든 merged/와 f16 GGUF가 있으면 재사용 (--force로 다시 생성)
+- llama.cpp 위치: --llama-cpp 또는 환경변수 LLAMA_CPP_PATH (llama-quantize는 PATH에서도 찾음)
+
+사용법:
+    python export_gguf.py cheese_cat_lora/lora_adapter --llama-cpp ~/llama.cpp
+    python export_gguf.py cheese_cat_lora/lora_adapter --quants q4_k_m,q8_0 --no-bench
+"""
+
+import argparse
+import dataclasses
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Optional
+
+from dataset_loader import file_digest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# 배포 후보 양자화 (크기 작은 순)
+DEFAULT_QUANTS = ("q4_k_m", "q5_k_m", "q8_0")
+
+# 모든 Modelfile이 공유하는 템플릿 ({model_path}, {parameters})
+MODELFILE_TEMPLATE_PATH = os.path.join(HERE, "Modelfile.template")
+
+# 벤치마크와 공유하는 기본 샘플링 옵션 (Modelfile PARAMETER로 기록)
+SAMPLING_OPTIONS_PATH = os.path.join(HERE, '..', 'Benchmark', 'sampling_options.json')
+
+OLLAMA_HOST = "http://localhost:11434"
+
+# merged/, f16 GGUF가 어떤 어댑터로 만들어졌는지 기록 (다르면 다시 병합/변환)
+SOURCE_FILE = "export_source.json"
+
+# 로드/디코드 측정용 프롬프트 (testset 첫 케이스와 같은 형식)
+BENCH_PROMPT = ('[CONTROL]{"schemaVersion":"1.0","catName":"망고","ageLevel":"Child","moodTag":"happy",'
+                '"affectionTier":"high","personalityTop2":["cheeky","foodLover"],"stateSnapshot":'
+                '{"hunger":30,"energy":70,"stress":20,"fun":75,"affection":85,"ageDays":8}}\n[USER]안녕 망고야!')
+BENCH_NUM_PREDICT = 64
+
+
+class ExportError(Exception):
+    """GGUF 내보내기 단계 실패"""
+
+
+@dataclass
+class QuantResult:
+    """양자화 1개의 결과"""
+    quant: str
+    path: str
+    size_mb: float
+    quantize_seconds: float
+    modelfile: Optional[str] = None
+    ollama_model: Optional[str] = None
+    load_ms: Optional[float] = None          # 콜드 로드 시간 (중앙값)
+    decode_tok_s: Optional[float] = None     # 생성 속도 (중앙값)
+    prompt_tok_s: Optional[float] = None     # 프롬프트 처리 속도 (중앙값)
+
+
+def load_sampling_options(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def find_llama_cpp(path: Optional[str] = None) -> tuple[str, str]:
+    """llama.cpp 변환 스크립트와 llama-quantize 실행 파일 경로 → (convert, quantize)"""
+    root = path or os.environ.get("LLAMA_CPP_PATH")
+    exe = "llama-quantize.exe" if os.name == "nt" else "llama-quantize"
+    convert = quantize = None
+    if root:
+        root = os.path.expanduser(root)
+        for name in ("convert_hf_to_gguf.py", "convert-hf-to-gguf.py"):
+            if os.path.isfile(os.path.join(root, name)):
+                convert = os.path.join(root, name)
+                break
+        for sub in (("build", "bin"), ("build", "bin", "Release"), ("bin",), ()):
+            candidate = os.path.join(root, *sub, exe)
+            if os.path.isfile(candidate):
+                quantize = candidate
+                break
+    quantize = quantize or shutil.which("llama-quantize")
+
+    missing = [name for name, found in (("convert_hf_to_gguf.py", convert), (exe, quantize)) if not found]
+    if missing:
+        raise ExportError(
+            f"llama.cpp를 찾을 수 없습니다 ({', '.join(missing)}, 경로: {root or '지정 안 됨'})\n"
+            "  설치:\n"
+            "    git clone https://github.com/ggerganov/llama.cpp\n"
+            "    cd llama.cpp && pip install -r requirements.txt\n"
+            "    cmake -B build && cmake --build build --config Release --target llama-quantize\n"
+            "  그 후 --llama-cpp <경로> 또는 환경변수 LLAMA_CPP_PATH 지정")
+    return convert, quantize
+
+
+def full_precision_base(base_model: str) -> str:
+    """4-bit로 미리 양자화된 Unsloth 모델은 병합 품질을 위해 원본 정밀도 모델 사용"""
+    if base_model.endswith("-bnb-4bit"):
+        return base_model[:-len("-bnb-4bit")]
+    return base_model
+
+
+def merge_adapter(adapter_dir: str, merged_dir: str, base_model: Optional[str] = None) -> str:
+    """기본 모델에 LoRA 어댑터를 병합해 HuggingFace 형식(fp16)으로 저장"""
+    import torch
+    from peft import PeftModel
+    from transformers import AutoModelForCausalLM, AutoTokenizer
+
+    config_path = os.path.join(adapter_dir, "adapter_config.json")
+    if not os.path.isfile(config_path):
+        raise ExportError(f"LoRA 어댑터가 아닙니다 (adapter_config.json 없음): {adapter_dir}")
+    if base_model is None:
+        with open(config_path, "r", encoding="utf-8") as f:
+            base_model = full_precision_base(json.load(f)["base_model_name_or_path"])
+    print(f"  기본 모델: {base_model}")
+
+    kwargs = {"torch_dtype": torch.float16, "low_cpu_mem_usage": True}
+    if torch.cuda.is_available():
+        kwargs["device_map"] = "auto"
+    model = AutoModelForCausalLM.from_pretrained(base_model, **kwargs)
+    model = PeftModel.from_pretrained(model, adapter_dir).merge_and_unload()
+
+    # 학습에 쓴 토크나이저(패딩 설정 포함)는 어댑터와 함께 저장되어 있음
+    tokenizer_dir = adapter_dir if os.path.isfile(os.path.join(adapter_dir, "tokenizer_config.json")) else base_model
+    tokenizer = AutoTokenizer.from_pretrained(tokenizer_dir)
+
+    tmp = merged_dir + ".tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    model.save_pretrained(tmp, safe_serialization=True)
+    tokenizer.save_pretrained(tmp)
+    shutil.rmtree(merged_dir, ignore_errors=True)
+    os.replace(tmp, merged_dir)
+    return merged_dir
+
+
+def adapter_source(adapter_dir: str, base_model: Optional[str] = None) -> dict:
+    """병합 결과를 결정하는 입력 → 어댑터 가중치/설정 내용 해시 + 기본 모델 지정"""
+    weights = next((os.path.join(adapter_dir, name) for name in ("adapter_model.safetensors", "adapter_model.bin")
+                    if os.path.isfile(os.path.join(adapter_dir, name))), None)
+    if weights is None:
+        raise ExportError(f"LoRA 어댑터 가중치가 없습니다: {adapter_dir}")
+    return {
+        "adapter_weights": file_digest(weights),
+        "adapter_config": file_digest(os.path.join(adapter_dir, "adapter_config.json")),
+        "base_model": base_model,
+    }
+
+
+def _source_matches(path: str, source: dict) -> bool:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f) == source
+    except (OSError, ValueError):
+        return False
+
+
+def _write_source(path: str, source: dict):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(source, f, ensure_ascii=False, indent=2)
+
+
+def _run(cmd: list[str], stage: str, cwd: Optional[str] = None) -> float:
+    """외부 명령 실행 (실패 시 stderr 끝부분과 함께 ExportError) → 소요 시간(초)"""
+    start = time.perf_counter()
+    result = subprocess.run(cmd, cwd=cwd, capture_output=True, text=True, encoding="utf-8", errors="replace")
+    if result.returncode != 0:
+        tail = "\n".join((result.stderr or result.stdout).strip().splitlines()[-15:])
+        raise ExportError(f"{stage} 실패 (exit {result.returncode}): {' '.join(cmd)}\n{tail}")
+    return time.perf_counter() - start
+
+
+def convert_to_gguf(convert_script: str, merged_dir: str, f16_path: str) -> float:
+    """HuggingFace 모델 → f16 GGUF (llama.cpp 변환 스크립트를 같은 파이썬으로 실행)"""
+    tmp = f16_path + ".tmp"
+    seconds = _run([sys.executable, convert_script, merged_dir, "--outfile", tmp, "--outtype", "f16"], "GGUF 변환")
+    os.replace(tmp, f16_path)
+    return seconds
+
+
+def quantize_all(quantize_bin: str, f16_path: str, quants: list[str], output_dir: str,
+                 prefix: str, jobs: int) -> dict[str, tuple[str, float]]:
+    """
+    양자화 병렬 실행 → {양자화: (경로, 소요 초)}
+    - CPU 코어를 작업 수로 나눠 각 llama-quantize에 스레드 수 지정
+    - 일부가 실패해도 나머지는 끝까지 실행한 뒤 실패 목록으로 ExportError
+    """
+    threads = max(1, (os.cpu_count() or 1) // jobs)
+    results: dict[str, tuple[str, float]] = {}
+    errors = []
+
+    def one(quant: str):
+        if quant == "f16":
+            return quant, f16_path, 0.0
+        path = os.path.join(output_dir, f"{prefix}-{quant}.gguf")
+        tmp = path + ".tmp"
+        seconds = _run([quantize_bin, f16_path, tmp, quant.upper(), str(threads)], f"양자화 {quant}")
+        os.replace(tmp, path)
+        return quant, path, seconds
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(one, quant) for quant in quants]
+        for future in futures:
+            try:
+                quant, path, seconds = future.result()
+            except ExportError as e:
+                errors.append(str(e))
+                continue
+            results[quant] = (path, seconds)
+            print(f"  {quant}: {os.path.basename(path)} ({os.path.getsize(path) / 2**20:,.0f} MB, {seconds:.1f}s)")
+    if errors:
+        raise ExportError("\n".join(errors))
+    return results
+
+
+def render_modelfile(model_path: str, sampling_options: dict,
+                     template_path: str = MODELFILE_TEMPLATE_PATH) -> str:
+    """공유 템플릿 + 샘플링 옵션 → Modelfile 내용"""
+    with open(template_path, "r", encoding="utf-8") as f:
+        template = f.read()
+    parameters = "\n".join(f"PARAMETER {name} {value}" for name, value in sampling_options.items())
+    return template.format(model_path=model_path, parameters=parameters)
+
+
+def write_modelfiles(results: list[QuantResult], output_dir: str, sampling_options: dict):
+    """양자화별 Modelfile.<양자화> + 첫 번째 양자화용 Modelfile (GGUF는 상대 경로)"""
+    for i, result in enumerate(results):
+        content = render_modelfile(f"./{os.path.basename(result.path)}", sampling_options)
+        result.modelfile = os.path.join(output_dir, f"Modelfile.{result.quant}")
+        names = [result.modelfile] + ([os.path.join(output_dir, "Modelfile")] if i == 0 else [])
+        for name in names:
+            with open(name, "w", encoding="utf-8") as f:
+                f.write(content)
+
+
+def register_models(results: list[QuantResult], output_dir: str, name: str):
+    """ollama create <이름>:<양자화>"""
+    ollama = shutil.which("ollama")
+    if ollama is None:
+        raise ExportError("ollama CLI를 찾을 수 없습니다 (설치 후 다시 실행하거나 --no-bench로 측정 생략)")
+    for result in results:
+        result.ollama_model = f"{name}:{result.quant}"
+        seconds = _run([ollama, "create", result.ollama_model, "-f", os.path.basename(result.modelfile)],
+                       f"ollama create {result.ollama_model}", cwd=output_dir)
+        print(f"  등록: {result.ollama_model} ({seconds:.1f}s)")
+
+
+def bench_models(results: list[QuantResult], host: str, runs: int, sampling_options: dict):
+    """
+    양자화별 콜드 로드 / 디코드 속도 측정 (Ollama /api/generate 응답의 서버 측 시간)
+    - 매 회 keep_alive=0 요청으로 모델을 내린 뒤 생성해 load_duration을 콜드 로드로 측정
+    """
+    import requests
+
+    url = f"{host.rstrip('/')}/api/generate"
+    session = requests.Session()
+    options = {**sampling_options, "num_predict": BENCH_NUM_PREDICT, "seed": 42}
+    for result in results:
+        loads, decodes, prompts = [], [], []
+        for _ in range(runs):
+            session.post(url, json={"model": result.ollama_model, "keep_alive": 0}, timeout=120)
+            response = session.post(url, json={"model": result.ollama_model, "prompt": BENCH_PROMPT,
+                                               "stream": False, "options": options}, timeout=600)
+            if response.status_code != 200:
+                raise ExportError(f"{result.ollama_model} 생성 실패 (HTTP {response.status_code}): {response.text[:200]}")
+            data = response.json()
+            loads.append(data.get("load_duration", 0) / 1e6)
+            if data.get("eval_duration"):
+                decodes.append(data["eval_count"] / (data["eval_duration"] / 1e9))
+            if data.get("prompt_eval_duration"):
+                prompts.append(data["prompt_eval_count"] / (data["prompt_eval_duration"] / 1e9))
+        result.load_ms = round(statistics.median(loads), 1)
+        result.decode_tok_s = round(statistics.median(decodes), 1) if decodes else None
+        result.prompt_tok_s = round(statistics.median(prompts), 1) if prompts else None
+    session.close()
+
+
+def print_report(results: list[QuantResult]):
+    print(f"\n  {'양자화':<8} {'크기(MB)':>9} {'양자화(s)':>9} {'로드(ms)':>9} {'디코드(tok/s)':>13} {'프롬프트(tok/s)':>14}")
+
+    def fmt(value, spec):
+        return format(value, spec) if value is not None else "-"
+
+    for r in sorted(results, key=lambda r: r.size_mb):
+        print(f"  {r.quant:<8} {r.size_mb:>9,.0f} {r.quantize_seconds:>9.1f} {fmt(r.load_ms, '>9,.0f'):>9}"
+              f" {fmt(r.decode_tok_s, '>13.1f'):>13} {fmt(r.prompt_tok_s, '>14.1f'):>14}")
+
+
+def run_export(adapter_dir: str, output_dir: str, quants=DEFAULT_QUANTS, llama_cpp: Optional[str] = None,
+               base_model: Optional[str] = None, jobs: Optional[int] = None,
+               sampling_options_path: str = SAMPLING_OPTIONS_PATH, name: str = "cattalk2d-mango",
+               prefix: str = "cattalk2d", bench: bool = True, bench_runs: int = 3, host: str = OLLAMA_HOST,
+               keep_merged: bool = False, force: bool = False) -> list[QuantResult]:
+    """어댑터 → 병합 → f16 GGUF → 양자화(병렬) → Modelfile → (등록 + 측정) → export_report.json"""
+    quants = [q.strip().lower() for q in quants if q.strip()]
+    if not quants:
+        raise ExportError("양자화 목록이 비어 있습니다")
+    # 병합/변환에 시간을 쓰기 전에 도구와 설정부터 확인
+    convert_script, quantize_bin = find_llama_cpp(llama_cpp)
+    sampling_options = load_sampling_options(sampling_options_path)
+    os.makedirs(output_dir, exist_ok=True)
+
+    f16_path = os.path.join(output_dir, f"{prefix}-f16.gguf")
+    merged_dir = os.path.join(output_dir, "merged")
+    # 같은 출력 디렉토리에서 다시 학습한 경우 이전 어댑터로 만든 결과를 쓰지 않도록 어댑터 내용으로 확인
+    source = adapter_source(adapter_dir, base_model)
+    f16_source = f16_path + ".source.json"
+    merged_source = os.path.join(merged_dir, SOURCE_FILE)
+    if force or not (os.path.isfile(f16_path) and _source_matches(f16_source, source)):
+        if force or not _source_matches(merged_source, source):
+            print("\n[1/5] 어댑터 병합")
+            start = time.perf_counter()
+            merge_adapter(adapter_dir, merged_dir, base_model)
+            _write_source(merged_source, source)
+            print(f"  병합 완료: {merged_dir} ({time.perf_counter() - start:.1f}s)")
+        else:
+            print(f"\n[1/5] 병합된 모델 재사용: {merged_dir}")
+        print("\n[2/5] f16 GGUF 변환")
+        seconds = convert_to_gguf(convert_script, merged_dir, f16_path)
+        _write_source(f16_source, source)
+        print(f"  {f16_path} ({os.path.getsize(f16_path) / 2**20:,.0f} MB, {seconds:.1f}s)")
+    else:
+        print(f"\n[1-2/5] 같은 어댑터의 f16 GGUF 재사용: {f16_path}")
+    if not keep_merged:
+        shutil.rmtree(merged_dir, ignore_errors=True)
+
+    print(f"\n[3/5] 양자화 ({', '.join(quants)})")
+    quantized = quantize_all(quantize_bin, f16_path, quants, output_dir, prefix, jobs or len(quants))
+    results = [QuantResult(quant=q, path=quantized[q][0], size_mb=round(os.path.getsize(quantized[q][0]) / 2**20, 1),
+                           quantize_seconds=round(quantized[q][1], 1)) for q in quants]
+
+    print("\n[4/5] Modelfile 생성")
+    write_modelfiles(results, output_dir, sampling_options)
+    print(f"  {os.path.join(output_dir, 'Modelfile')} ({results[0].quant}) + Modelfile.<양자화>")
+
+    if bench:
+        print("\n[5/5] Ollama 등록 / 로드·디코드 측정")
+        register_models(results, output_dir, name)
+        bench_models(results, host, bench_runs, sampling_options)
+    else:
+        print("\n[5/5] 측정 생략")
+
+    with open(os.path.join(output_dir, "export_report.json"), "w", encoding="utf-8") as f:
+        json.dump([dataclasses.asdict(r) for r in results], f, ensure_ascii=False, indent=2)
+    print_report(results)
+    print("\nOllama 등록:")
+    print(f"  cd {output_dir}")
+    print(f"  ollama create {name} -f Modelfile")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CatTalk2D GGUF 내보내기 / 양자화")
+    parser.add_argument("adapter", help="LoRA 어댑터 디렉토리 (학습 결과의 lora_adapter)")
+    parser.add_argument("--output", help="출력 디렉토리 (기본: 어댑터 옆 gguf/)")
+    parser.add_argument("--base-model", help="병합할 기본 모델 (기본: adapter_config.json, -bnb-4bit는 원본 정밀도로)")
+    parser.add_argument("--llama-cpp", help="llama.cpp 디렉토리 (기본: 환경변수 LLAMA_CPP_PATH)")
+    parser.add_argument("--quants", default=",".join(DEFAULT_QUANTS),
+                        help="양자화 목록 (쉼표 구분, f16 포함 가능)")
+    parser.add_argument("--jobs", type=int, help="동시 양자화 수 (기본: 양자화 개수)")
+    parser.add_argument("--name", default="cattalk2d-mango", help="Ollama 모델 이름 (<이름>:<양자화>로 등록)")
+    parser.add_argument("--sampling-options", default=SAMPLING_OPTIONS_PATH,
+                        help="벤치마크와 공유하는 샘플링 옵션 JSON (Modelfile PARAMETER로 기록)")
+    parser.add_argument("--no-bench", action="store_true", help="Ollama 등록/로드·디코드 측정 생략")
+    parser.add_argument("--bench-runs", type=int, default=3, help="양자화별 측정 횟수 (중앙값 보고)")
+    parser.add_argument("--ollama-host", default=OLLAMA_HOST, help="Ollama 주소")
+    parser.add_argument("--keep-merged", action="store_true", help="병합된 HuggingFace 모델(merged/) 유지")
+    parser.add_argument("--force", action="store_true", help="어댑터가 같아도 병합/f16 변환을 다시 수행")
+    args = parser.parse_args()
+
+    output = args.output or os.path.join(os.path.dirname(os.path.abspath(args.adapter)), "gguf")
+    try:
+        run_export(args.adapter, output, args.quants.split(","), llama_cpp=args.llama_cpp,
+                   base_model=args.base_model, jobs=args.jobs, sampling_options_path=args.sampling_options,
+                   name=args.name, bench=not args.no_bench, bench_runs=args.bench_runs,
+                   host=args.ollama_host, keep_merged=args.keep_merged, force=args.force)
+    except ExportError as e:
+        print(f"\nERROR: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+"""
+CatTalk2D assistant 응답 전용 loss 마스크
+- 모든 샘플이 같은 시스템 프롬프트와 긴 [CONTROL] 블록을 반복하므로 전체 대화에 loss를 걸면
+  학습 신호 대부분이 망고의 대답이 아닌 반복 토큰에 쓰임
+- assistant 턴(응답 + 턴 종료 토큰)만 학습 대상으로 남기고 나머지는 labels = -100
+- 토큰 캐시 경로: mask_fn(text, offsets)로 토큰화할 때 마스크 계산 (token_cache.build_cache)
+- SFTTrainer 경로: TRL DataCollatorForCompletionOnlyLM에 같은 응답 시작 표시 사용
+"""
+
+# 템플릿별 (assistant 응답 시작 표시, 턴 종료 토큰)
+ASSISTANT_MARKERS = {
+    "gemma": ("<start_of_turn>model\n", "<end_of_turn>"),
+    "llama3": ("<|start_header_id|>assistant<|end_header_id|>\n\n", "<|eot_id|>"),
+}
+
+
+def assistant_spans(text: str, template: str) -> list[tuple[int, int]]:
+    """assistant 응답의 문자 구간 목록 (응답 시작 표시 다음부터 턴 종료 토큰 끝까지)"""
+    start_marker, end_marker = ASSISTANT_MARKERS[template]
+    spans = []
+    pos = text.find(start_marker)
+    while pos != -1:
+        begin = pos + len(start_marker)
+        end = text.find(end_marker, begin)
+        end = len(text) if end == -1 else end + len(end_marker)
+        spans.append((begin, end))
+        pos = text.find(start_marker, end)
+    return spans
+
+
+def _assistant_mask(text: str, offsets: list[tuple[int, int]], template: str) -> list[int]:
+    """토큰별 (시작, 끝) 문자 위치로 assistant 구간과 겹치는 토큰만 1 (BOS 등 위치가 없는 특수 토큰은 0)"""
+    spans = assistant_spans(text, template)
+    mask = []
+    for start, end in offsets:
+        mask.append(int(end > start and any(start < span_end and end > span_begin
+                                            for span_begin, span_end in spans)))
+    return mask
+
+
+def gemma_assistant_mask(text: str, offsets: list[tuple[int, int]]) -> list[int]:
+    """Gemma 템플릿 (<start_of_turn>model) mask_fn"""
+    return _assistant_mask(text, offsets, "gemma")
+
+
+def llama3_assistant_mask(text: str, offsets: list[tuple[int, int]]) -> list[int]:
+    """Llama 3 템플릿 (<|start_header_id|>assistant) mask_fn"""
+    return _assistant_mask(text, offsets, "llama3")
+
+
+MASK_FUNCTIONS = {
+    "gemma": gemma_assistant_mask,
+    "llama3": llama3_assistant_mask,
+}
+
+
+def completion_only_collator(tokenizer, template: str):
+    """SFTTrainer용 응답 전용 collator (TRL DataCollatorForCompletionOnlyLM)"""
+    from trl import DataCollatorForCompletionOnlyLM
+
+    start_marker, _ = ASSISTANT_MARKERS[template]
+    # 응답 시작 표시를 단독으로 토큰화하면 문맥 속 토큰화와 달라질 수 있어 ID로 전달
+    response_ids = tokenizer.encode(start_marker, add_special_tokens=False)
+    return DataCollatorForCompletionOnlyLM(response_template=response_ids, tokenizer=tokenizer)
+
+
+class TokenCountingCollator:
+    """
+    2D attention_mask를 만드는 collator(TRL 등)를 감싸 배치의 토큰 수를 누적
+    (PadCollator/PackedCollator는 같은 카운터를 직접 가짐)
+    - real_tokens: attention_mask가 1인 토큰, padded_tokens: 패딩 포함 전체
+    - loss_tokens: labels != -100 (실제로 loss를 계산하는 토큰 = 망고의 대답)
+    """
+
+    def __init__(self, collator):
+        self.collator = collator
+        self.real_tokens = 0
+        self.padded_tokens = 0
+        self.loss_tokens = 0
+
+    def __call__(self, batch):
+        out = self.collator(batch)
+        labels = out["labels"]
+        self.padded_tokens += labels.numel()
+        self.real_tokens += int(out["attention_mask"].sum())
+        self.loss_tokens += int((labels != -100).sum())
+        return out
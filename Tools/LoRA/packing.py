@@ -0,0 +1,186 @@
+"""
+CatTalk2D 시퀀스 패킹 / 길이별 배치
+- 샘플이 매우 짧아(시스템 1줄 + CONTROL/대사 + 1~2문장 답변) max_seq_length 2048로 패딩하면 배치 대부분이 패딩
+- pack: 여러 샘플을 max_seq_length 안에 이어 붙임 (best-fit decreasing)
+  샘플 간 어텐션은 블록 대각 마스크(또는 샘플별로 0부터 다시 시작하는 position_ids)로 차단하고
+  각 샘플의 첫 토큰은 이전 샘플에서 예측하지 않도록 label을 -100으로 둠
+- bucket: 비슷한 길이끼리 배치 (transformers의 group_by_length와 같은 방식: 50배치 묶음 안에서 정렬)
+- 배치 방식별 패딩 비율은 토큰 캐시의 길이만으로 미리 계산 가능
+
+사용법 (배치 방식별 패딩 비율 비교):
+    python packing.py token_cache/<키> --batch-size 2 --max-seq-length 2048
+"""
+
+import argparse
+import bisect
+import random
+from typing import Optional
+
+from token_cache import TokenCache
+
+# --batching 값
+BATCHING_MODES = ("pad", "bucket", "pack")
+
+# transformers LengthGroupedSampler와 같은 묶음 크기 (배치 크기 × 50)
+MEGABATCH_MULT = 50
+
+
+def pack_bins(lengths: list[int], max_seq_length: int) -> list[list[int]]:
+    """
+    샘플 인덱스를 max_seq_length 이하의 묶음으로 나눔 (긴 샘플부터 남은 공간이 가장 작은 묶음에 넣음)
+    - max_seq_length보다 긴 샘플은 토큰 캐시에서 이미 잘려 있으므로 항상 들어감
+    """
+    bins: list[list[int]] = []
+    free = []   # (남은 공간, 묶음 번호) 정렬 목록
+    for index in sorted(range(len(lengths)), key=lambda i: -lengths[i]):
+        length = lengths[index]
+        pos = bisect.bisect_left(free, (length, -1))
+        if pos < len(free):
+            space, bin_id = free.pop(pos)
+        else:
+            space, bin_id = max_seq_length, len(bins)
+            bins.append([])
+        bins[bin_id].append(index)
+        if space - length > 0:
+            bisect.insort(free, (space - length, bin_id))
+    return bins
+
+
+def bucket_batches(lengths: list[int], batch_size: int, seed: int = 42) -> list[list[int]]:
+    """무작위로 섞은 뒤 batch_size × 50개씩 묶어 길이순 정렬 후 배치로 자름"""
+    rng = random.Random(seed)
+    order = list(range(len(lengths)))
+    rng.shuffle(order)
+    megabatch = batch_size * MEGABATCH_MULT
+    batches = []
+    for start in range(0, len(order), megabatch):
+        group = sorted(order[start:start + megabatch], key=lambda i: -lengths[i])
+        batches.extend(group[i:i + batch_size] for i in range(0, len(group), batch_size))
+    return batches
+
+
+def batching_stats(lengths: list[int], mode: str, batch_size: int, max_seq_length: int,
+                   seed: int = 42) -> dict:
+    """
+    1 에폭 기준 배치 방식별 실제 토큰 / 패딩 포함 토큰 (패딩은 배치 안 가장 긴 시퀀스에 맞춤)
+    Returns: {"mode", "batches", "real_tokens", "padded_tokens", "padding_ratio"}
+    """
+    if mode == "pad":
+        order = list(range(len(lengths)))
+        random.Random(seed).shuffle(order)
+        widths = [[lengths[i] for i in order[s:s + batch_size]] for s in range(0, len(order), batch_size)]
+    elif mode == "bucket":
+        widths = [[lengths[i] for i in batch] for batch in bucket_batches(lengths, batch_size, seed)]
+    elif mode == "pack":
+        rows = [sum(lengths[i] for i in b) for b in pack_bins(lengths, max_seq_length)]
+        random.Random(seed).shuffle(rows)
+        widths = [rows[s:s + batch_size] for s in range(0, len(rows), batch_size)]
+    else:
+        raise ValueError(f"알 수 없는 배치 방식: {mode}")
+
+    real = sum(lengths)
+    padded = sum(max(batch) * len(batch) for batch in widths)
+    return {
+        "mode": mode,
+        "batches": len(widths),
+        "real_tokens": real,
+        "padded_tokens": padded,
+        "padding_ratio": 1 - real / padded if padded else 0.0,
+    }
+
+
+class PackedDataset:
+    """TokenCache 샘플을 묶음 단위로 돌려주는 map 스타일 데이터셋 (item: {"samples": [캐시 샘플, ...]})"""
+
+    def __init__(self, cache: TokenCache, max_seq_length: int):
+        self.cache = cache
+        self.bins = pack_bins(cache.lengths(), max_seq_length)
+
+    def __len__(self) -> int:
+        return len(self.bins)
+
+    def __getitem__(self, i: int) -> dict:
+        return {"samples": [self.cache[j] for j in self.bins[i]]}
+
+
+class PackedCollator:
+    """
+    PackedDataset 묶음 → 배치 텐서
+    - block_attention=True: 4D 어텐션 마스크 (샘플 안에서만 causal, 0 = 허용 / dtype 최솟값 = 차단)
+      transformers의 sdpa/eager 어텐션은 4D 마스크를 그대로 사용
+    - block_attention=False: attention_mask 없이 샘플마다 0부터 다시 시작하는 position_ids만 전달
+      (flash_attention_2는 attention_mask가 없을 때만 position_ids로 샘플 경계를 나눔 — 모델을
+       attn_implementation="flash_attention_2"로 불러야 함, 다른 어텐션은 샘플 간 어텐션을 막지 못함)
+    - real_tokens/padded_tokens/loss_tokens: 지금까지 만든 배치의 실제/패딩 포함/loss 대상 토큰 수
+    """
+
+    def __init__(self, pad_token_id: int, block_attention: bool = True, dtype=None):
+        self.pad_token_id = pad_token_id
+        self.block_attention = block_attention
+        self.dtype = dtype
+        self.real_tokens = 0
+        self.padded_tokens = 0
+        self.loss_tokens = 0
+
+    def __call__(self, batch: list[dict]) -> dict:
+        import torch
+
+        rows = [sum(len(s["input_ids"]) for s in item["samples"]) for item in batch]
+        width = max(rows)
+        input_ids = torch.full((len(batch), width), self.pad_token_id, dtype=torch.long)
+        labels = torch.full((len(batch), width), -100, dtype=torch.long)
+        position_ids = torch.zeros((len(batch), width), dtype=torch.long)
+        dtype = self.dtype or torch.float32
+        if self.block_attention:
+            attention_mask = torch.full((len(batch), 1, width, width), torch.finfo(dtype).min, dtype=dtype)
+
+        for row, item in enumerate(batch):
+            start = 0
+            for sample in item["samples"]:
+                ids = torch.tensor(sample["input_ids"].tolist(), dtype=torch.long)
+                mask = torch.tensor(sample["loss_mask"].tolist(), dtype=torch.bool)
+                end = start + len(ids)
+                input_ids[row, start:end] = ids
+                sample_labels = torch.where(mask, ids, torch.full_like(ids, -100))
+                sample_labels[0] = -100   # 이전 샘플의 마지막 토큰에서 예측하지 않음
+                labels[row, start:end] = sample_labels
+                position_ids[row, start:end] = torch.arange(len(ids))
+                if self.block_attention:
+                    causal = torch.tril(torch.ones((len(ids), len(ids)), dtype=torch.bool))
+                    attention_mask[row, 0, start:end, start:end].masked_fill_(causal, 0)
+                start = end
+
+        self.loss_tokens += int((labels != -100).sum())
+        self.real_tokens += sum(rows)
+        self.padded_tokens += width * len(batch)
+        features = {"input_ids": input_ids, "position_ids": position_ids, "labels": labels}
+        if self.block_attention:
+            features["attention_mask"] = attention_mask
+        return features
+
+
+def print_batching_stats(lengths: list[int], batch_size: int, max_seq_length: int,
+                         current: Optional[str] = None):
+    """배치 방식별 패딩 비율 표 (* = 현재 방식)"""
+    print(f"  {'방식':<7} {'배치 수':>8} {'실제 토큰':>11} {'패딩 포함':>11} {'패딩 비율':>8}")
+    for mode in BATCHING_MODES:
+        s = batching_stats(lengths, mode, batch_size, max_seq_length)
+        print(f"  {mode:<7} {s['batches']:>8} {s['real_tokens']:>11,} {s['padded_tokens']:>11,}"
+              f" {s['padding_ratio'] * 100:>7.1f}%" + ("  *" if mode == current else ""))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CatTalk2D 배치 방식별 패딩 비율 비교")
+    parser.add_argument("cache", help="토큰 캐시 디렉토리 (token_cache/<키>)")
+    parser.add_argument("--batch-size", type=int, default=2, help="배치 사이즈")
+    parser.add_argument("--max-seq-length", type=int, default=2048, help="최대 시퀀스 길이 (pack 묶음 크기)")
+    args = parser.parse_args()
+
+    cache = TokenCache(args.cache)
+    lengths = cache.lengths()
+    print(f"샘플 {len(lengths)}개, 평균 {sum(lengths) / len(lengths):.1f}토큰 (최대 {max(lengths)})")
+    print_batching_stats(lengths, args.batch_size, args.max_seq_length)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+CatTalk2D CPU 스모크 학습용 초소형 모델
+- 네트워크/GPU 없이 학습 파이프라인 전체(로드 → 템플릿 → 토큰화 → LoRA 학습 → 저장 → 생성)를 돌리기 위한 모델
+- 토크나이저: 데이터셋 텍스트로 바로 학습한 작은 byte-level BPE (템플릿 특수 토큰 포함)
+- 모델: 무작위 초기화한 2층 Llama (LoRA 대상 모듈 q/k/v/o/gate/up/down_proj가 실제 모델과 같음)
+- 한 번 만든 모델은 <출력>/<템플릿>/에 저장해 다음 실행부터 재사용 (일반 HuggingFace 모델 디렉토리와 동일하게 로드)
+  템플릿/최대 길이/모델 설정을 smoke.json에 기록하고, 다르면 다시 생성 (템플릿 특수 토큰이 없는 토크나이저 재사용 방지)
+- 생성 결과는 의미 없는 문자열이며, 속도/메모리/체크포인트 동작 확인과 회귀 테스트 용도
+
+사용법 (모델만 생성):
+    python smoke.py ../../CombData/dataset.jsonl --template gemma --output smoke_model   # → smoke_model/gemma
+"""
+
+import argparse
+import json
+import os
+
+from chat_templates import TEMPLATES
+from dataset_loader import iter_samples
+
+# 템플릿별 특수 토큰 (bos, eos = 턴 종료 토큰, 그 외 마커)
+SPECIAL_TOKENS = {
+    "gemma": {"bos": "<bos>", "eos": "<end_of_turn>",
+              "extra": ["<eos>", "<start_of_turn>"]},
+    "llama3": {"bos": "<|begin_of_text|>", "eos": "<|eot_id|>",
+               "extra": ["<|end_of_text|>", "<|start_header_id|>", "<|end_header_id|>"]},
+}
+PAD_TOKEN = "<pad>"
+
+# 모델 생성 조건 기록 파일 (재사용 여부 판단)
+SPEC_FILE = "smoke.json"
+
+# 초소형 Llama 설정 (임베딩 제외 파라미터 약 7만 개)
+MODEL_CONFIG = {
+    "hidden_size": 64,
+    "intermediate_size": 128,
+    "num_hidden_layers": 2,
+    "num_attention_heads": 4,
+    "num_key_value_heads": 2,
+}
+
+
+def smoke_spec(template_name: str, max_seq_length: int) -> dict:
+    """스모크 모델을 결정하는 설정 (smoke.json과 비교)"""
+    return {"template": template_name, "max_seq_length": max_seq_length, "model_config": MODEL_CONFIG}
+
+
+def is_smoke_model(path: str, spec: dict) -> bool:
+    """같은 설정으로 만든 스모크 모델이 있는지"""
+    if not (os.path.isfile(os.path.join(path, "config.json")) and
+            os.path.isfile(os.path.join(path, "tokenizer.json"))):
+        return False
+    try:
+        with open(os.path.join(path, SPEC_FILE), "r", encoding="utf-8") as f:
+            return json.load(f) == spec
+    except (OSError, ValueError):
+        return False
+
+
+def build_tokenizer(dataset_path: str, template, vocab_size: int = 2000):
+    """데이터셋 학습 텍스트로 byte-level BPE 토크나이저 학습 → PreTrainedTokenizerFast"""
+    from tokenizers import Tokenizer, decoders, models, pre_tokenizers, trainers
+    from transformers import PreTrainedTokenizerFast
+
+    special = SPECIAL_TOKENS[template.name]
+    special_tokens = [PAD_TOKEN, special["bos"], special["eos"], *special["extra"]]
+
+    tokenizer = Tokenizer(models.BPE())
+    tokenizer.pre_tokenizer = pre_tokenizers.ByteLevel(add_prefix_space=False)
+    tokenizer.decoder = decoders.ByteLevel()
+    trainer = trainers.BpeTrainer(vocab_size=vocab_size, special_tokens=special_tokens,
+                                  initial_alphabet=pre_tokenizers.ByteLevel.alphabet())
+    texts = (template.format(sample)["text"] for sample in iter_samples(dataset_path, max_errors=None))
+    tokenizer.train_from_iterator(texts, trainer=trainer)
+
+    return PreTrainedTokenizerFast(
+        tokenizer_object=tokenizer,
+        bos_token=special["bos"],
+        eos_token=special["eos"],
+        pad_token=PAD_TOKEN,
+        additional_special_tokens=special["extra"],
+        model_input_names=["input_ids", "attention_mask"],   # Llama는 token_type_ids를 받지 않음
+    )
+
+
+def build_model(tokenizer, max_seq_length: int, seed: int = 42):
+    """무작위 초기화 초소형 Llama"""
+    import torch
+    from transformers import LlamaConfig, LlamaForCausalLM
+
+    torch.manual_seed(seed)
+    config = LlamaConfig(
+        vocab_size=len(tokenizer),
+        max_position_embeddings=max_seq_length,
+        bos_token_id=tokenizer.bos_token_id,
+        eos_token_id=tokenizer.eos_token_id,
+        pad_token_id=tokenizer.pad_token_id,
+        tie_word_embeddings=True,
+        **MODEL_CONFIG,
+    )
+    return LlamaForCausalLM(config)
+
+
+def prepare_smoke_model(dataset_path: str, template_name: str, output: str,
+                        max_seq_length: int = 512, seed: int = 42) -> str:
+    """
+    스모크 모델 디렉토리 준비 → <output>/<템플릿> 경로
+    - 같은 템플릿/최대 길이/모델 설정으로 만든 모델이 있으면 재사용, 아니면 다시 생성
+    """
+    model_dir = os.path.join(output, template_name)
+    spec = smoke_spec(template_name, max_seq_length)
+    if is_smoke_model(model_dir, spec):
+        print(f"  스모크 모델 재사용: {model_dir}")
+        return model_dir
+
+    template = TEMPLATES[template_name]
+    print(f"  스모크 모델 생성: {model_dir} ({template.name} 템플릿, 최대 길이 {max_seq_length}, 무작위 초기화)")
+    tokenizer = build_tokenizer(dataset_path, template)
+    model = build_model(tokenizer, max_seq_length, seed)
+    os.makedirs(model_dir, exist_ok=True)
+    model.save_pretrained(model_dir)
+    tokenizer.save_pretrained(model_dir)
+    # 설정 기록은 마지막에 (저장 도중 중단되면 다음 실행에서 다시 생성)
+    with open(os.path.join(model_dir, SPEC_FILE), "w", encoding="utf-8") as f:
+        json.dump(spec, f, ensure_ascii=False, indent=2)
+    params = sum(p.numel() for p in model.parameters())
+    print(f"  어휘 {len(tokenizer)}개, 파라미터 {params:,}개")
+    return model_dir
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CatTalk2D 스모크 학습용 초소형 모델 생성")
+    parser.add_argument("dataset", help="토크나이저 학습에 쓸 데이터셋 JSONL")
+    parser.add_argument("--template", choices=list(TEMPLATES), default="gemma", help="채팅 템플릿")
+    parser.add_argument("--output", default="smoke_model", help="모델 저장 디렉토리 (템플릿별 하위 디렉토리에 생성)")
+    parser.add_argument("--max-seq-length", type=int, default=512, help="최대 시퀀스 길이")
+    args = parser.parse_args()
+
+    prepare_smoke_model(args.dataset, args.template, args.output, args.max_seq_length)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+"""
+CatTalk2D 학습 처리량 기록
+- Trainer 콜백으로 스텝마다 시간/토큰 처리 속도/데이터 대기/메모리를 기록
+- 체크포인트와 같은 디렉토리에 throughput.jsonl / throughput.csv (스텝마다 flush, 학습 중에도 확인 가능)
+  학습이 끝나면 throughput_summary.json (스텝 시간 백분위수, 평균 tok/s, 데이터 대기 비율)
+- 스텝 시간: 이전 스텝 종료 → 이번 스텝 종료 (로깅/저장 시간 포함)
+  compute: 스텝 시작 → 종료, data_wait: 이전 스텝(로깅/저장 포함) 종료 → 스텝 시작 (다음 배치를 기다린 시간)
+- 토큰 수는 collator 카운터(real_tokens/padded_tokens)의 스텝별 증가분
+  (collator가 메인 프로세스에서 실행될 때만 집계, dataloader_num_workers=0 기본값)
+
+사용법 (기록된 타임라인 요약):
+    python throughput.py cheese_cat_lora/throughput.jsonl
+"""
+
+import argparse
+import csv
+import json
+import math
+import os
+import sys
+import time
+from typing import Optional
+
+try:
+    from transformers import TrainerCallback
+except ImportError:  # 타임라인 요약 CLI만 사용하는 환경
+    TrainerCallback = object
+
+TIMELINE_FIELDS = [
+    "step", "elapsed", "step_time", "compute_time", "data_wait",
+    "real_tokens", "padded_tokens", "tokens_per_sec", "padded_tokens_per_sec",
+    "peak_rss_mb", "accel_peak_mb",
+]
+
+
+def peak_rss_mb() -> Optional[float]:
+    """프로세스 최대 RSS (MB) — Linux/macOS는 resource, Windows는 psutil이 있을 때만"""
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil
+            return psutil.Process().memory_info().peak_wset / 2**20
+        except (ImportError, AttributeError):
+            return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS는 바이트, Linux는 KB 단위
+    return peak / 2**20 if sys.platform == "darwin" else peak / 1024
+
+
+def accelerator_peak_mb() -> Optional[float]:
+    """직전 측정 이후 GPU 최대 할당 메모리 (MB, 측정 후 최댓값 초기화) — CUDA/MPS가 없으면 None"""
+    try:
+        import torch
+    except ImportError:
+        return None
+    if torch.cuda.is_available():
+        peak = torch.cuda.max_memory_allocated() / 2**20
+        torch.cuda.reset_peak_memory_stats()
+        return peak
+    mps = getattr(torch, "mps", None)
+    if mps is not None and torch.backends.mps.is_available():
+        return mps.driver_allocated_memory() / 2**20
+    return None
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return None if value is None else round(value, 1)
+
+
+def _percentile(sorted_values: list[float], q: float) -> Optional[float]:
+    """정렬된 값의 q 백분위수 (선형 보간)"""
+    if not sorted_values:
+        return None
+    pos = (len(sorted_values) - 1) * q / 100
+    lower, upper = math.floor(pos), math.ceil(pos)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (pos - lower)
+
+
+def summarize_timeline(records: list[dict], skip_first: int = 1) -> dict:
+    """
+    스텝 기록 요약
+    - skip_first: 워밍업(CUDA 커널 컴파일/캐시 로드 등) 스텝은 백분위수에서 제외
+    """
+    steady = records[skip_first:] if len(records) > skip_first else records
+    step_times = sorted(r["step_time"] for r in steady)
+    total_time = sum(r["step_time"] for r in steady)
+    total_wait = sum(r["data_wait"] for r in steady)
+    real = [r["real_tokens"] for r in steady if r["real_tokens"] is not None]
+    padded = [r["padded_tokens"] for r in steady if r["padded_tokens"] is not None]
+
+    def _max(field):
+        values = [r[field] for r in records if r[field] is not None]
+        return max(values) if values else None
+
+    return {
+        "steps": len(records),
+        "measured_steps": len(steady),
+        "step_time": {
+            "mean": total_time / len(steady) if steady else None,
+            "p50": _percentile(step_times, 50),
+            "p90": _percentile(step_times, 90),
+            "p99": _percentile(step_times, 99),
+            "max": step_times[-1] if step_times else None,
+        },
+        "tokens_per_sec": sum(real) / total_time if real and total_time else None,
+        "padded_tokens_per_sec": sum(padded) / total_time if padded and total_time else None,
+        "padding_ratio": 1 - sum(real) / sum(padded) if real and sum(padded) else None,
+        # 1에 가까울수록 GPU가 데이터를 기다림 (dataloader_num_workers/토큰 캐시 검토)
+        "data_wait_ratio": total_wait / total_time if total_time else None,
+        "peak_rss_mb": _max("peak_rss_mb"),
+        "accel_peak_mb": _max("accel_peak_mb"),
+    }
+
+
+def print_summary(summary: dict):
+    st = summary["step_time"]
+    if st["mean"] is None:
+        print("  기록된 스텝 없음")
+        return
+    print(f"  스텝 {summary['steps']}개 (첫 스텝 제외 {summary['measured_steps']}개 기준)")
+    print(f"  스텝 시간: 평균 {st['mean']:.3f}s / p50 {st['p50']:.3f}s / p90 {st['p90']:.3f}s"
+          f" / p99 {st['p99']:.3f}s / 최대 {st['max']:.3f}s")
+    if summary["tokens_per_sec"] is not None:
+        print(f"  토큰 처리 속도: {summary['tokens_per_sec']:,.0f} tok/s"
+              f" (패딩 포함 {summary['padded_tokens_per_sec']:,.0f} tok/s)")
+    print(f"  데이터 대기 비율: {summary['data_wait_ratio'] * 100:.1f}%")
+    if summary["peak_rss_mb"] is not None:
+        print(f"  최대 RSS: {summary['peak_rss_mb']:,.0f} MB")
+    if summary["accel_peak_mb"] is not None:
+        print(f"  최대 GPU 메모리: {summary['accel_peak_mb']:,.0f} MB")
+
+
+class ThroughputCallback(TrainerCallback):
+    """
+    스텝별 처리량 타임라인 기록 (trainer.add_callback으로 등록)
+    - collator: real_tokens/padded_tokens 카운터를 가진 collator (None이면 토큰 열은 비워 둠)
+    """
+
+    def __init__(self, collator=None):
+        self.collator = collator
+        self.records: list[dict] = []
+        self._jsonl = None
+        self._csv_file = None
+        self._csv = None
+
+    def _now(self) -> float:
+        return time.perf_counter()
+
+    def _counters(self):
+        if self.collator is None:
+            return None, None
+        return self.collator.real_tokens, self.collator.padded_tokens
+
+    def on_train_begin(self, args, state, control, **kwargs):
+        self._start = self._idle_since = self._prev_end = self._now()
+        self._prev_tokens = self._counters()
+        accelerator_peak_mb()   # 모델 로드 시점 최댓값 초기화
+        if not state.is_world_process_zero:
+            return
+        os.makedirs(args.output_dir, exist_ok=True)
+        self._jsonl = open(os.path.join(args.output_dir, "throughput.jsonl"), "w", encoding="utf-8")
+        self._csv_file = open(os.path.join(args.output_dir, "throughput.csv"), "w", encoding="utf-8", newline="")
+        self._csv = csv.DictWriter(self._csv_file, fieldnames=TIMELINE_FIELDS)
+        self._csv.writeheader()
+
+    def on_step_begin(self, args, state, control, **kwargs):
+        self._step_begin = self._now()
+
+    def on_step_end(self, args, state, control, **kwargs):
+        end = self._now()
+        real, padded = self._counters()
+        step_time = end - self._prev_end
+        record = {
+            "step": state.global_step,
+            "elapsed": round(end - self._start, 4),
+            "step_time": round(step_time, 4),
+            "compute_time": round(end - self._step_begin, 4),
+            "data_wait": round(max(self._step_begin - self._idle_since, 0.0), 4),
+            "real_tokens": None,
+            "padded_tokens": None,
+            "tokens_per_sec": None,
+            "padded_tokens_per_sec": None,
+            "peak_rss_mb": _round(peak_rss_mb()),
+            "accel_peak_mb": _round(accelerator_peak_mb()),
+        }
+        if real is not None:
+            prev_real, prev_padded = self._prev_tokens
+            record["real_tokens"] = real - prev_real
+            record["padded_tokens"] = padded - prev_padded
+            record["tokens_per_sec"] = round(record["real_tokens"] / step_time, 1) if step_time else None
+            record["padded_tokens_per_sec"] = round(record["padded_tokens"] / step_time, 1) if step_time else None
+            self._prev_tokens = (real, padded)
+        self.records.append(record)
+        if self._jsonl is not None:
+            self._jsonl.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._jsonl.flush()
+            self._csv.writerow(record)
+            self._csv_file.flush()
+        self._prev_end = self._idle_since = end
+
+    def _mark_idle(self):
+        # 스텝 종료 후 로깅/평가/저장이 끝난 시점부터 데이터 대기로 계산
+        self._idle_since = self._now()
+
+    def on_log(self, args, state, control, **kwargs):
+        self._mark_idle()
+
+    def on_evaluate(self, args, state, control, **kwargs):
+        self._mark_idle()
+
+    def on_save(self, args, state, control, **kwargs):
+        self._mark_idle()
+
+    def on_train_end(self, args, state, control, **kwargs):
+        if self._jsonl is None:
+            return
+        self._jsonl.close()
+        self._csv_file.close()
+        self._jsonl = None
+        summary = summarize_timeline(self.records)
+        with open(os.path.join(args.output_dir, "throughput_summary.json"), "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        print("\n=== 처리량 ===")
+        print_summary(summary)
+        print(f"  타임라인: {os.path.join(args.output_dir, 'throughput.jsonl')} (.csv)")
+
+
+def load_timeline(path: str) -> list[dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CatTalk2D 학습 처리량 타임라인 요약")
+    parser.add_argument("timeline", help="throughput.jsonl 경로")
+    parser.add_argument("--skip-first", type=int, default=1, help="요약에서 제외할 처음 스텝 수 (워밍업)")
+    args = parser.parse_args()
+
+    records = load_timeline(args.timeline)
+    print(f"{args.timeline}")
+    print_summary(summarize_timeline(records, args.skip_first))
+
+
+if __name__ == "__main__":
+    main()
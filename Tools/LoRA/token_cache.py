@@ -0,0 +1,318 @@
+"""
+CatTalk2D 사전 토큰화 캐시 (메모리 매핑 바이너리 샤드)
+- 채팅 템플릿 적용 + 토큰화를 한 번만 하고 결과를 디스크에 저장
+- 캐시 키: 데이터셋 파일 내용 + 토크나이저(어휘/특수 토큰) + 템플릿 출력 + 최대 길이 + 마스크 출력
+  + require_meta (메타 없는 샘플 제외 여부)
+  (템플릿/마스크는 고정 샘플에 적용한 결과로 비교하므로 보조 함수나 표시 문자열만 바꿔도 반영)
+  하나라도 바뀌면 새 캐시를 만들고, 같으면 토큰화 없이 바로 학습 시작
+- 샤드 형식 (샤드당 최대 SHARD_SAMPLES개 샘플, 네이티브 바이트 순서):
+    NNNNN.tokens   int32 토큰 ID를 샘플 순서대로 이어 붙임
+    NNNNN.mask     uint8 loss 마스크 (1 = 학습 대상 토큰)
+    NNNNN.offsets  uint64 샘플 시작 위치 (샘플 수 + 1개)
+    index.json     샤드 목록, 캐시 키 구성 요소, 통계
+  attention mask는 패딩 없이 저장하므로 전부 1이며, 배치를 만들 때 패딩 위치만 0으로 채움
+- 읽기는 mmap + memoryview로 복사 없이 샘플 슬라이스를 반환
+"""
+
+import array
+import bisect
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+from dataset_loader import file_digest, iter_samples
+
+CACHE_VERSION = 2
+SHARD_SAMPLES = 100_000
+TOKENIZE_BATCH = 1000
+
+# mask_fn(text, offsets) → 토큰별 0/1 (offsets: 토큰별 (시작, 끝) 문자 위치), None이면 전체 학습
+MaskFn = Callable[[str, list[tuple[int, int]]], list[int]]
+
+# 템플릿/마스크 지문 계산용 고정 샘플 (역할 3개 + 한국어/[CONTROL] 포함)
+PROBE_SAMPLE = {"messages": [
+    {"role": "system", "content": "너는 주황색 치즈냥이 캐릭터다."},
+    {"role": "user", "content": '[CONTROL]{"moodTag":"happy"}\n[USER]안녕 망고야!'},
+    {"role": "assistant", "content": "(골골) 안녕냥!"},
+]}
+
+
+def tokenizer_fingerprint(tokenizer) -> str:
+    """토크나이저 식별 해시 (fast 토크나이저는 직렬화 전체, 아니면 어휘 + 특수 토큰)"""
+    backend = getattr(tokenizer, "backend_tokenizer", None)
+    if backend is not None:
+        content = backend.to_str()
+    else:
+        content = json.dumps(tokenizer.get_vocab(), sort_keys=True)
+    content += json.dumps(getattr(tokenizer, "special_tokens_map", {}), sort_keys=True, default=str)
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def format_fingerprint(format_fn: Callable) -> str:
+    """템플릿 식별 해시 (고정 샘플에 적용한 학습 텍스트 기준)"""
+    record = format_fn(PROBE_SAMPLE)
+    return hashlib.sha256(json.dumps(record, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def mask_fingerprint(mask_fn: Optional[MaskFn], format_fn: Callable) -> str:
+    """
+    마스크 식별 해시 (고정 샘플 텍스트의 마스크 결과 기준)
+    - 글자마다 토큰 하나로 보고 끝에 위치 없는 특수 토큰(0, 0)을 붙여 구간 경계/특수 토큰 처리까지 반영
+    """
+    if mask_fn is None:
+        return "none"
+    text = format_fn(PROBE_SAMPLE)["text"]
+    offsets = [(i, i + 1) for i in range(len(text))] + [(0, 0)]
+    mask = "".join(str(bit) for bit in mask_fn(text, offsets))
+    return hashlib.sha256(mask.encode("utf-8")).hexdigest()
+
+
+def cache_key(dataset_path: str, tokenizer, format_fn: Callable, max_seq_length: int,
+              mask_fn: Optional[MaskFn] = None, require_meta: bool = False) -> tuple[str, dict]:
+    """(캐시 키, 구성 요소) — 구성 요소는 index.json에 기록해 어떤 조합의 캐시인지 확인 가능"""
+    parts = {
+        "version": CACHE_VERSION,
+        "dataset": file_digest(dataset_path),
+        "tokenizer": tokenizer_fingerprint(tokenizer),
+        "template": format_fingerprint(format_fn),
+        "mask": mask_fingerprint(mask_fn, format_fn),
+        "max_seq_length": max_seq_length,
+        "require_meta": require_meta,
+    }
+    key = hashlib.sha256(json.dumps(parts, sort_keys=True).encode("utf-8")).hexdigest()[:24]
+    return key, parts
+
+
+class _ShardWriter:
+    """샤드 파일 3개에 샘플을 이어 씀"""
+
+    def __init__(self, directory: Path, index: int):
+        self.name = f"{index:05d}"
+        self.tokens = open(directory / f"{self.name}.tokens", "wb")
+        self.mask = open(directory / f"{self.name}.mask", "wb")
+        self.offsets = array.array("Q", [0])
+
+    def add(self, input_ids: list[int], loss_mask: list[int]):
+        array.array("i", input_ids).tofile(self.tokens)
+        self.mask.write(bytes(loss_mask))
+        self.offsets.append(self.offsets[-1] + len(input_ids))
+
+    @property
+    def samples(self) -> int:
+        return len(self.offsets) - 1
+
+    def close(self, directory: Path) -> dict:
+        self.tokens.close()
+        self.mask.close()
+        with open(directory / f"{self.name}.offsets", "wb") as f:
+            self.offsets.tofile(f)
+        return {"name": self.name, "samples": self.samples, "tokens": self.offsets[-1]}
+
+
+def _encode_batch(tokenizer, texts: list[str], max_seq_length: int, mask_fn: Optional[MaskFn]):
+    """
+    텍스트 묶음을 한 번에 토큰화 (fast 토크나이저는 내부적으로 병렬 처리)
+    - 템플릿 문자열이 이미 BOS 토큰으로 시작하면 특수 토큰을 다시 붙이지 않음 (Llama 3 형식)
+    """
+    bos = getattr(tokenizer, "bos_token", None)
+    add_special = not (bos and texts and texts[0].startswith(bos))
+    encoded = tokenizer(texts, add_special_tokens=add_special, truncation=True,
+                        max_length=max_seq_length, return_offsets_mapping=mask_fn is not None)
+    for i, text in enumerate(texts):
+        input_ids = encoded["input_ids"][i]
+        if mask_fn is None:
+            loss_mask = [1] * len(input_ids)
+        else:
+            loss_mask = mask_fn(text, encoded["offset_mapping"][i])
+        yield input_ids, loss_mask
+
+
+def build_cache(dataset_path: str, tokenizer, format_fn: Callable, cache_root: str,
+                max_seq_length: int = 2048, mask_fn: Optional[MaskFn] = None,
+                require_meta: bool = False) -> tuple[Path, bool]:
+    """
+    데이터셋을 토큰화해 cache_root/<키>/에 샤드로 기록
+    Returns: (캐시 경로, 새로 만들었는지) — 같은 키의 캐시가 이미 있으면 토큰화하지 않음
+    - 임시 디렉토리에 다 쓴 뒤 이름을 바꾸므로 중간에 중단돼도 깨진 캐시가 남지 않음
+    - format_fn(샘플)은 {"text": ...}를 반환 (dataset_loader.build_dataset과 같은 함수 사용)
+    """
+    key, parts = cache_key(dataset_path, tokenizer, format_fn, max_seq_length, mask_fn, require_meta)
+    final_dir = Path(cache_root) / key
+    if (final_dir / "index.json").exists():
+        return final_dir, False
+    print(f"  토큰 캐시 생성 중: {final_dir}")
+
+    tmp_dir = Path(cache_root) / f"{key}.tmp-{os.getpid()}"
+    if tmp_dir.exists():
+        shutil.rmtree(tmp_dir)
+    tmp_dir.mkdir(parents=True)
+
+    start = time.perf_counter()
+    shards = []
+    writer = _ShardWriter(tmp_dir, 0)
+    masked_tokens = 0
+    truncated = 0
+    texts = []
+
+    def flush():
+        nonlocal writer, masked_tokens, truncated
+        for input_ids, loss_mask in _encode_batch(tokenizer, texts, max_seq_length, mask_fn):
+            if writer.samples >= SHARD_SAMPLES:
+                shards.append(writer.close(tmp_dir))
+                writer = _ShardWriter(tmp_dir, len(shards))
+            writer.add(input_ids, loss_mask)
+            masked_tokens += sum(loss_mask)
+            truncated += len(input_ids) >= max_seq_length
+        texts.clear()
+
+    for sample in iter_samples(dataset_path, require_meta):
+        texts.append(format_fn(sample)["text"])
+        if len(texts) >= TOKENIZE_BATCH:
+            flush()
+    if texts:
+        flush()
+    shards.append(writer.close(tmp_dir))
+
+    index = {
+        "key": key,
+        **parts,
+        "dataset_path": str(dataset_path),
+        "tokenizer_name": getattr(tokenizer, "name_or_path", type(tokenizer).__name__),
+        "byteorder": sys.byteorder,
+        "samples": sum(s["samples"] for s in shards),
+        "tokens": sum(s["tokens"] for s in shards),
+        "loss_tokens": masked_tokens,
+        "truncated": truncated,
+        "shards": shards,
+        "build_sec": time.perf_counter() - start,
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    with open(tmp_dir / "index.json", "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, indent=2)
+
+    try:
+        os.replace(tmp_dir, final_dir)
+    except OSError:
+        # 다른 프로세스가 같은 캐시를 먼저 완성한 경우
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return final_dir, True
+
+
+class TokenCache:
+    """
+    사전 토큰화 캐시 읽기 (torch Dataset과 같은 map 스타일: len / 인덱싱)
+    - cache[i] → {"input_ids": memoryview(int32), "loss_mask": memoryview(uint8)} (복사 없음)
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with open(self.path / "index.json", "r", encoding="utf-8") as f:
+            self.index = json.load(f)
+        if self.index["version"] != CACHE_VERSION:
+            raise ValueError(f"캐시 버전이 다릅니다: {self.index['version']} (현재 {CACHE_VERSION})")
+        if self.index["byteorder"] != sys.byteorder:
+            raise ValueError(f"캐시 바이트 순서({self.index['byteorder']})가 이 시스템과 다릅니다")
+
+        self._files = []
+        self._shards = []
+        self._starts = []
+        total = 0
+        for shard in self.index["shards"]:
+            views = {}
+            for suffix, fmt in (("tokens", "i"), ("mask", "B"), ("offsets", "Q")):
+                f = open(self.path / f"{shard['name']}.{suffix}", "rb")
+                self._files.append(f)
+                if os.fstat(f.fileno()).st_size == 0:
+                    views[suffix] = memoryview(b"").cast(fmt)
+                else:
+                    views[suffix] = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)).cast(fmt)
+            self._shards.append(views)
+            self._starts.append(total)
+            total += shard["samples"]
+        self._length = total
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, i: int) -> dict:
+        if i < 0:
+            i += self._length
+        if not 0 <= i < self._length:
+            raise IndexError(i)
+        shard_index = bisect.bisect_right(self._starts, i) - 1
+        views = self._shards[shard_index]
+        local = i - self._starts[shard_index]
+        begin, end = views["offsets"][local], views["offsets"][local + 1]
+        return {"input_ids": views["tokens"][begin:end], "loss_mask": views["mask"][begin:end]}
+
+    def lengths(self) -> list[int]:
+        """샘플별 토큰 수 (오프셋 차이로 계산, 토큰은 읽지 않음)"""
+        result = []
+        for views in self._shards:
+            offsets = views["offsets"]
+            result.extend(offsets[j + 1] - offsets[j] for j in range(len(offsets) - 1))
+        return result
+
+    def close(self):
+        self._shards = []
+        for f in self._files:
+            f.close()
+        self._files = []
+
+
+def load_or_build(dataset_path: str, tokenizer, format_fn: Callable, cache_root: str,
+                  max_seq_length: int = 2048, mask_fn: Optional[MaskFn] = None,
+                  require_meta: bool = False) -> TokenCache:
+    """캐시가 있으면 바로 열고, 없으면 토큰화해서 만든 뒤 엶"""
+    path, built = build_cache(dataset_path, tokenizer, format_fn, cache_root, max_seq_length, mask_fn,
+                              require_meta)
+    if not built:
+        print(f"  토큰 캐시 사용: {path}")
+    cache = TokenCache(path)
+    index = cache.index
+    print(f"  샘플 {index['samples']}개, 토큰 {index['tokens']:,}개"
+          f" (학습 대상 {index['loss_tokens']:,}개, 잘림 {index['truncated']}개)")
+    return cache
+
+
+class PadCollator:
+    """
+    TokenCache 샘플 목록 → 패딩된 배치 텐서 (input_ids / attention_mask / labels)
+    - labels는 loss 마스크가 0인 토큰과 패딩을 -100으로 채움
+    - real_tokens/padded_tokens/loss_tokens: 지금까지 만든 배치의 실제/패딩 포함/loss 대상 토큰 수
+    """
+
+    def __init__(self, pad_token_id: int, pad_to_multiple_of: Optional[int] = None):
+        self.pad_token_id = pad_token_id
+        self.pad_to_multiple_of = pad_to_multiple_of
+        self.real_tokens = 0
+        self.padded_tokens = 0
+        self.loss_tokens = 0
+
+    def __call__(self, batch: list[dict]) -> dict:
+        import torch
+
+        width = max(len(item["input_ids"]) for item in batch)
+        if self.pad_to_multiple_of:
+            width = -(-width // self.pad_to_multiple_of) * self.pad_to_multiple_of
+
+        input_ids = torch.full((len(batch), width), self.pad_token_id, dtype=torch.long)
+        attention_mask = torch.zeros((len(batch), width), dtype=torch.long)
+        labels = torch.full((len(batch), width), -100, dtype=torch.long)
+        for row, item in enumerate(batch):
+            ids = torch.tensor(item["input_ids"].tolist(), dtype=torch.long)
+            mask = torch.tensor(item["loss_mask"].tolist(), dtype=torch.bool)
+            n = len(ids)
+            input_ids[row, :n] = ids
+            attention_mask[row, :n] = 1
+            labels[row, :n] = torch.where(mask, ids, torch.full_like(ids, -100))
+            self.real_tokens += n
+            self.loss_tokens += int(mask.sum())
+        self.padded_tokens += width * len(batch)
+        return {"input_ids": input_ids, "attention_mask": attention_mask, "labels": labels}
@@ -1,198 +1,417 @@
 """
-CatTalk2D LoRA 튜닝 스크립트
-- Unsloth 기반 빠른 LoRA 학습
+CatTalk2D LoRA 튜닝 스크립트 (모든 학습 경로의 단일 진입점)
+- 백엔드: unsloth(CUDA, 가장 빠름) / peft(Windows/CPU 포함) — 기본값 auto는 하드웨어를 보고 선택
+- 채팅 템플릿: gemma / llama3 — 기본값 auto는 기본 모델 이름으로 선택
 - 데이터셋: DevTools에서 생성한 JSONL 파일 사용
+- LoraData/train_lora.py, LoraData/train_lora_windows.py는 기존 기본값으로 이 스크립트를 호출
 
 사용법:
     python train_lora.py --dataset ../../LoraData/dataset.jsonl --output cheese_cat_lora
+    python train_lora.py --dataset ../../LoraData/dataset.jsonl --backend peft --base-model google/gemma-2-2b-it --epochs 3
+    python train_lora.py --dataset ../../CombData/dataset.jsonl --smoke --threads 4   # CPU 스모크 학습
 """
 
 import argparse
+import dataclasses
 import json
 import os
-
-def check_dependencies():
-    """의존성 확인"""
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from backends import BACKEND_NAMES, detect_hardware, flash_attention_available, select_backend
+from chat_templates import TEMPLATES, template_for_model
+from checkpoint import (RESUME_KEYS, AsyncCheckpointCallback, check_resume_config, find_latest_checkpoint,
+                        find_latest_run)
+from dataset_loader import build_dataset
+from export_gguf import (DEFAULT_QUANTS, SAMPLING_OPTIONS_PATH, ExportError, find_llama_cpp,
+                         load_sampling_options, run_export)
+from loss_mask import TokenCountingCollator, completion_only_collator
+from packing import BATCHING_MODES, PackedCollator, PackedDataset, batching_stats, print_batching_stats
+from smoke import prepare_smoke_model
+from throughput import ThroughputCallback
+from token_cache import PadCollator, load_or_build
+
+# 학습 후 테스트 / inference.py 기본 시스템 프롬프트 (데이터셋과 동일)
+SYSTEM_PROMPT = "너는 주황색 치즈냥이 캐릭터다. 한국어로 1~2문장으로 답한다."
+
+# --smoke: 초소형 무작위 모델로 CPU에서 파이프라인 전체를 몇 스텝만 실행
+# (직접 지정하지 않은 옵션만 덮어씀)
+SMOKE_DEFAULTS = {
+    'backend': 'peft',
+    'load_in_4bit': False,
+    'max_seq_length': 512,
+    'epochs': None,
+    'max_steps': 5,
+    'batch_size': 2,
+    'gradient_accumulation': 1,
+    'warmup_steps': 0,
+    'logging_steps': 1,
+    'save_steps': 5,
+    'output': 'smoke_output',
+    'timestamp_output': False,
+    'gguf': False,
+    'test': '안녕 망고야!',
+}
+
+
+def check_dependencies(backend_name='auto', cpu=False):
+    """의존성 확인 (하드웨어 요약 + 사용할 백엔드, cpu=True면 GPU가 있어도 CPU로 학습)"""
+    hw = detect_hardware()
+    if cpu:
+        hw = dataclasses.replace(hw, cuda=False, bf16=False)
+    hw.print_summary()
+    if hw.torch_version is None:
+        return None, None
     try:
-        import torch
-        print(f"PyTorch 버전: {torch.__version__}")
-        print(f"CUDA 사용 가능: {torch.cuda.is_available()}")
-        if torch.cuda.is_available():
-            print(f"CUDA 버전: {torch.version.cuda}")
-            print(f"GPU: {torch.cuda.get_device_name(0)}")
-    except ImportError:
-        print("PyTorch가 설치되지 않았습니다.")
-        print("설치: pip install torch")
-        return False
-
+        backend = select_backend(backend_name, hw)
+    except RuntimeError as e:
+        print(e)
+        return hw, None
+    print(f"백엔드: {backend.name}")
+    return hw, backend
+
+
+@contextmanager
+def stage(timings, name):
+    """단계별 소요 시간 기록 (run_report.json)"""
+    start = time.perf_counter()
+    yield
+    timings[name] = round(time.perf_counter() - start, 3)
+
+
+def apply_smoke_defaults(args, parser):
+    """--smoke 기본값 적용 (명령행에서 직접 지정한 값은 유지)"""
+    for name, value in SMOKE_DEFAULTS.items():
+        if getattr(args, name) == parser.get_default(name):
+            setattr(args, name, value)
+    args.cpu = True
+
+
+def set_threads(threads):
+    """CPU 스레드 수 고정 (torch intra-op / OpenMP / MKL / tokenizers)"""
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "RAYON_NUM_THREADS"):
+        os.environ[var] = str(threads)
     try:
-        from unsloth import FastLanguageModel
-        print("Unsloth 설치됨")
+        import torch
     except ImportError:
-        print("Unsloth가 설치되지 않았습니다.")
-        print("설치: pip install 'unsloth[colab-new] @ git+https://github.com/unslothai/unsloth.git'")
-        return False
+        return
+    torch.set_num_threads(threads)
 
-    return True
 
+def release_memory():
+    """학습 모델을 내린 뒤 Python/CUDA 메모리 회수"""
+    import gc
 
-def load_dataset(dataset_path):
-    """JSONL 데이터셋 로드 및 Chat 형식으로 변환"""
-    samples = []
+    import torch
 
-    with open(dataset_path, 'r', encoding='utf-8') as f:
-        for line in f:
-            if not line.strip():
-                continue
-            data = json.loads(line)
+    gc.collect()
+    if torch.cuda.is_available():
+        torch.cuda.empty_cache()
 
-            # messages 형식을 텍스트로 변환
-            messages = data.get('messages', [])
-            if len(messages) >= 3:
-                system_msg = messages[0].get('content', '')
-                user_msg = messages[1].get('content', '')
-                assistant_msg = messages[2].get('content', '')
 
-                # Llama 3 Chat 형식
-                text = f"""<|begin_of_text|><|start_header_id|>system<|end_header_id|>
+def resolve_template(args):
+    """--template auto면 기본 모델 이름으로 추정"""
+    if args.template == 'auto':
+        return template_for_model(args.base_model)
+    return TEMPLATES[args.template]
 
-{system_msg}<|eot_id|><|start_header_id|>user<|end_header_id|>
 
-{user_msg}<|eot_id|><|start_header_id|>assistant<|end_header_id|>
+def load_dataset(dataset_path, template, require_meta=False):
+    """
+    JSONL 데이터셋 로드 및 채팅 템플릿 적용
+    - 한 줄씩 검사하며 Arrow 파일로 기록 (전체를 메모리에 올리지 않음)
+    """
+    dataset = build_dataset(dataset_path, template.format, require_meta=require_meta)
+    print(f"로드된 샘플 수: {len(dataset)}")
+    return dataset
 
-{assistant_msg}<|eot_id|>"""
 
-                samples.append({'text': text})
+def training_arguments(args, hw, backend, output_dir):
+    """TrainingArguments (정밀도/옵티마이저/저장 주기를 한곳에서 결정)"""
+    from transformers import TrainingArguments
 
-    print(f"로드된 샘플 수: {len(samples)}")
-    return samples
+    schedule = ({'num_train_epochs': args.epochs} if args.epochs
+                else {'max_steps': args.max_steps})
+    return TrainingArguments(
+        output_dir=output_dir,
+        per_device_train_batch_size=args.batch_size,
+        gradient_accumulation_steps=args.gradient_accumulation,
+        warmup_steps=args.warmup_steps,
+        learning_rate=args.learning_rate,
+        fp16=hw.precision == 'fp16',
+        bf16=hw.precision == 'bf16',
+        logging_steps=args.logging_steps,
+        # bitsandbytes 8-bit 옵티마이저는 GPU 전용
+        optim=backend.optim if hw.cuda else "adamw_torch",
+        use_cpu=args.cpu,
+        weight_decay=0.01,
+        lr_scheduler_type=args.lr_scheduler,
+        seed=args.seed,
+        # 비동기 체크포인트를 쓰면 Trainer 자체 저장(학습 루프 정지)은 끔
+        save_strategy="no" if args.async_checkpoint else "steps",
+        save_steps=args.save_steps,
+        save_total_limit=args.save_total_limit,
+        report_to="none",
+        # bucket: 비슷한 길이끼리 배치 (transformers LengthGroupedSampler)
+        group_by_length=args.batching == "bucket",
+        # 토큰 캐시 샘플의 loss_mask/samples 키는 collator가 쓰므로 Trainer가 지우지 않게 함
+        remove_unused_columns=not args.token_cache,
+        **schedule,
+    )
 
 
-def train(args):
-    """LoRA 학습 실행"""
-    from unsloth import FastLanguageModel
+def build_trainer(args, model, tokenizer, template, training_args):
+    """
+    Trainer 구성 → (trainer, collator, lengths)
+    - 토큰 캐시: 사전 토큰화 샤드 + PadCollator/PackedCollator
+    - 그 외: SFTTrainer (assistant-only면 응답 전용 collator)
+    - collator는 항상 토큰 카운터를 가짐 (처리량 기록용)
+    """
     import torch
-    from datasets import Dataset
+    from transformers import DataCollatorForLanguageModeling, Trainer
     from trl import SFTTrainer
-    from transformers import TrainingArguments
 
-    print("\n=== 모델 로드 중 ===")
-    model, tokenizer = FastLanguageModel.from_pretrained(
-        model_name=args.base_model,
-        max_seq_length=args.max_seq_length,
-        load_in_4bit=True,
-        dtype=None,  # 자동 감지
-    )
-
-    print("\n=== LoRA 어댑터 추가 ===")
-    model = FastLanguageModel.get_peft_model(
-        model,
-        r=args.lora_r,
-        target_modules=["q_proj", "k_proj", "v_proj", "o_proj",
-                       "gate_proj", "up_proj", "down_proj"],
-        lora_alpha=args.lora_alpha,
-        lora_dropout=0,
-        bias="none",
-        use_gradient_checkpointing="unsloth",
-        random_state=42,
-    )
-
-    print("\n=== 데이터셋 로드 ===")
-    samples = load_dataset(args.dataset)
-    dataset = Dataset.from_list(samples)
+    collator = None
+    lengths = None
+    if args.token_cache:
+        # 사전 토큰화 캐시: 같은 데이터셋/토크나이저/템플릿이면 토큰화 없이 바로 시작
+        mask_fn = template.assistant_mask if args.assistant_only else None
+        dataset = load_or_build(args.dataset, tokenizer, template.format, args.token_cache,
+                                args.max_seq_length, mask_fn, args.require_meta)
+        lengths = dataset.lengths()
+        print_batching_stats(lengths, args.batch_size, args.max_seq_length, args.batching)
+        pad_id = tokenizer.pad_token_id if tokenizer.pad_token_id is not None else tokenizer.eos_token_id
+        if args.batching == "pack":
+            dataset = PackedDataset(dataset, args.max_seq_length)
+            dtype = (torch.bfloat16 if training_args.bf16
+                     else torch.float16 if training_args.fp16 else torch.float32)
+            collator = PackedCollator(pad_id, block_attention=args.pack_attention == "mask", dtype=dtype)
+            print(f"  패킹: 샘플 {len(lengths)}개 → 시퀀스 {len(dataset)}개")
+        else:
+            collator = PadCollator(pad_id)
+        trainer = Trainer(
+            model=model,
+            args=training_args,
+            train_dataset=dataset,
+            data_collator=collator,
+        )
+    else:
+        dataset = load_dataset(args.dataset, template, require_meta=args.require_meta)
+        if args.assistant_only:
+            collator = TokenCountingCollator(completion_only_collator(tokenizer, template.name))
+        else:
+            # SFTTrainer 기본 collator와 동일 (토큰 수 집계를 위해 직접 생성)
+            collator = TokenCountingCollator(DataCollatorForLanguageModeling(tokenizer, mlm=False))
+        trainer = SFTTrainer(
+            model=model,
+            tokenizer=tokenizer,
+            train_dataset=dataset,
+            dataset_text_field="text",
+            max_seq_length=args.max_seq_length,
+            dataset_num_proc=2,
+            packing=False,
+            data_collator=collator,
+            args=training_args,
+        )
+    return trainer, collator, lengths
+
+
+def write_batching_stats(args, output_dir, collator, lengths, trainer_stats):
+    """배치 방식끼리 비교할 수 있도록 실제 토큰 처리 속도와 패딩 비율 기록"""
+    runtime = trainer_stats.metrics['train_runtime']
+    stats = {
+        "batching": args.batching,
+        "train_runtime": runtime,
+        "real_tokens": collator.real_tokens,
+        "padded_tokens": collator.padded_tokens,
+        "real_tokens_per_sec": collator.real_tokens / runtime,
+        "padded_tokens_per_sec": collator.padded_tokens / runtime,
+        "padding_ratio": 1 - collator.real_tokens / collator.padded_tokens,
+        "assistant_only": args.assistant_only,
+        "loss_tokens": collator.loss_tokens,
+        # 스텝당 실제로 loss를 계산한 토큰 (assistant-only면 망고의 대답에 쓰인 연산량)
+        "effective_tokens_per_step": collator.loss_tokens / max(trainer_stats.global_step, 1),
+    }
+    if lengths is not None:
+        stats["expected"] = batching_stats(lengths, args.batching, args.batch_size, args.max_seq_length)
+    print(f"토큰 처리 속도: {stats['real_tokens_per_sec']:,.0f} tok/s"
+          f" (패딩 포함 {stats['padded_tokens_per_sec']:,.0f} tok/s, 패딩 비율 {stats['padding_ratio'] * 100:.1f}%)")
+    print(f"스텝당 학습 대상 토큰: {stats['effective_tokens_per_step']:,.0f}"
+          f" (전체 토큰의 {collator.loss_tokens / collator.real_tokens * 100:.1f}%)")
+    with open(os.path.join(output_dir, "batching_stats.json"), "w", encoding="utf-8") as f:
+        json.dump(stats, f, ensure_ascii=False, indent=2)
+
+
+def write_inference_script(output_dir, base_model, lora_path, template):
+    """PEFT 어댑터를 불러 대답을 생성하는 inference.py 저장 (peft 백엔드)"""
+    prompt_template = template.prompt("{system}", "{user}")
+    script = f'''"""
+CatTalk2D Inference Script ({template.name} 템플릿)
+"""
+import torch
+from transformers import AutoModelForCausalLM, AutoTokenizer
+from peft import PeftModel
+
+# 모델 로드
+base_model = {base_model!r}
+lora_path = {os.path.abspath(lora_path)!r}
+SYSTEM = {SYSTEM_PROMPT!r}
+PROMPT_TEMPLATE = {prompt_template!r}
+END_OF_TURN = {template.end_of_turn!r}
+
+device = "cuda" if torch.cuda.is_available() else "cpu"
+tokenizer = AutoTokenizer.from_pretrained(lora_path)
+model = AutoModelForCausalLM.from_pretrained(
+    base_model, torch_dtype=torch.float16 if device == "cuda" else torch.float32).to(device)
+model = PeftModel.from_pretrained(model, lora_path)
+
+def generate(user_input, control_json="", system=SYSTEM):
+    prompt = PROMPT_TEMPLATE.format(system=system, user=f"[CONTROL]{{control_json}}\\n[USER]{{user_input}}")
+    inputs = tokenizer(prompt, return_tensors="pt", add_special_tokens=False).to(model.device)
+
+    with torch.no_grad():
+        outputs = model.generate(
+            **inputs,
+            max_new_tokens=100,
+            temperature=0.7,
+            top_p=0.9,
+            do_sample=True,
+        )
+
+    response = tokenizer.decode(outputs[0][inputs["input_ids"].shape[1]:], skip_special_tokens=False)
+    return response.split(END_OF_TURN)[0].strip()
+
+# 테스트
+if __name__ == "__main__":
+    print(generate("안녕?", '{{"moodTag":"happy","affectionTier":"high"}}'))
+'''
+    inference_path = os.path.join(output_dir, "inference.py")
+    with open(inference_path, 'w', encoding='utf-8') as f:
+        f.write(script)
+    print(f"  추론 스크립트 저장 위치: {inference_path}")
+    print(f"  테스트: python {inference_path}")
+
+
+def train(args, hw, backend, template, output_dir, timings, resume_from=None):
+    """
+    LoRA 학습 실행 (timings에 단계별 소요 시간 기록, resume_from: 이어서 학습할 체크포인트)
+    - 종료 요청으로 중단되면 어댑터를 저장하지 않고 lora_path=None 반환
+    """
+    print(f"\n=== 모델 로드 중 ({backend.name}, 4-bit={args.load_in_4bit}, {hw.precision}) ===")
+    with stage(timings, "load_model"):
+        model, tokenizer = backend.load(args, hw)
+
+    training_args = training_arguments(args, hw, backend, output_dir)
+
+    print(f"\n=== 데이터셋 로드 ({template.name} 템플릿) ===")
+    with stage(timings, "load_dataset"):
+        trainer, collator, lengths = build_trainer(args, model, tokenizer, template, training_args)
+    # 스텝별 시간/tok/s/메모리 타임라인 (체크포인트와 같은 디렉토리)
+    trainer.add_callback(ThroughputCallback(collator))
+    checkpointer = None
+    if args.async_checkpoint:
+        checkpointer = AsyncCheckpointCallback(args.save_steps, args.save_total_limit,
+                                               run_config={key: getattr(args, key) for key in RESUME_KEYS})
+        trainer.add_callback(checkpointer)
 
     print("\n=== 학습 시작 ===")
-    trainer = SFTTrainer(
-        model=model,
-        tokenizer=tokenizer,
-        train_dataset=dataset,
-        dataset_text_field="text",
-        max_seq_length=args.max_seq_length,
-        dataset_num_proc=2,
-        packing=False,
-        args=TrainingArguments(
-            per_device_train_batch_size=args.batch_size,
-            gradient_accumulation_steps=args.gradient_accumulation,
-            warmup_steps=args.warmup_steps,
-            max_steps=args.max_steps,
-            learning_rate=args.learning_rate,
-            fp16=not torch.cuda.is_bf16_supported(),
-            bf16=torch.cuda.is_bf16_supported(),
-            logging_steps=10,
-            optim="adamw_8bit",
-            weight_decay=0.01,
-            lr_scheduler_type="linear",
-            seed=42,
-            output_dir=args.output,
-            save_strategy="steps",
-            save_steps=50,
-        ),
-    )
 
-    trainer_stats = trainer.train()
+    with stage(timings, "train"):
+        # 체크포인트에서 옵티마이저/스케줄러/RNG/global_step 복원 후 이미 학습한 배치는 건너뜀
+        trainer_stats = trainer.train(resume_from_checkpoint=resume_from)
+    if checkpointer is not None:
+        timings["checkpoint_blocking"] = round(checkpointer.snapshot_seconds, 3)
+        timings["checkpoint_write"] = round(checkpointer.write_seconds, 3)
+        if checkpointer.stopped:
+            # 종료 요청(SIGTERM)으로 중단: 덜 학습된 모델을 완료된 어댑터로 저장/내보내지 않음
+            print(f"\n=== 학습 중단 (스텝 {trainer.state.global_step}) ===")
+            print(f"체크포인트: {checkpointer.saved[-1] if checkpointer.saved else '없음'}")
+            print("이어서 학습: 같은 명령에 --resume")
+            return model, tokenizer, None
 
     print("\n=== 학습 완료 ===")
     print(f"학습 시간: {trainer_stats.metrics['train_runtime']:.2f}초")
-    print(f"총 스텝: {trainer_stats.metrics['train_steps']}")
+    print(f"총 스텝: {trainer_stats.global_step}")
+    os.makedirs(output_dir, exist_ok=True)
+    if collator.padded_tokens:
+        write_batching_stats(args, output_dir, collator, lengths, trainer_stats)
 
     print("\n=== 모델 저장 ===")
-    model.save_pretrained(args.output)
-    tokenizer.save_pretrained(args.output)
-    print(f"저장 위치: {args.output}")
+    lora_path = os.path.join(output_dir, "lora_adapter")
+    with stage(timings, "save"):
+        model.save_pretrained(lora_path)
+        tokenizer.save_pretrained(lora_path)
+    print(f"LoRA 어댑터 저장 위치: {lora_path}")
 
-    return model, tokenizer
+    return model, tokenizer, lora_path
 
 
-def test_model(model, tokenizer, prompt):
-    """학습된 모델 테스트"""
-    from unsloth import FastLanguageModel
+def test_model(backend, model, tokenizer, template, prompt):
+    """학습된 모델 테스트 (학습과 같은 채팅 템플릿으로 프롬프트 생성)"""
+    backend.for_inference(model)
 
-    FastLanguageModel.for_inference(model)
-
-    messages = [
-        {"role": "system", "content": "너는 주황색 치즈냥이 캐릭터다. 한국어로 1~2문장으로 답한다."},
-        {"role": "user", "content": prompt}
-    ]
-
-    inputs = tokenizer.apply_chat_template(
-        messages,
-        tokenize=True,
-        add_generation_prompt=True,
-        return_tensors="pt"
-    ).to("cuda")
+    text = template.prompt(SYSTEM_PROMPT, prompt)
+    # 템플릿에 BOS가 이미 있으면 토크나이저가 다시 붙이지 않도록 함
+    bos = tokenizer.bos_token
+    inputs = tokenizer(text, return_tensors="pt",
+                       add_special_tokens=not (bos and text.startswith(bos))).to(model.device)
 
     outputs = model.generate(
-        input_ids=inputs,
+        **inputs,
         max_new_tokens=64,
         use_cache=True,
+        do_sample=True,
         temperature=0.7,
         top_p=0.9,
     )
 
-    response = tokenizer.decode(outputs[0], skip_special_tokens=True)
-    return response
+    response = tokenizer.decode(outputs[0][inputs["input_ids"].shape[1]:], skip_special_tokens=True)
+    return response.strip()
 
 
-def main():
+def build_parser():
     parser = argparse.ArgumentParser(description='CatTalk2D LoRA 튜닝')
 
-    # 필수 인자
-    parser.add_argument('--dataset', type=str, required=True,
+    # 데이터 / 출력
+    parser.add_argument('--dataset', '--data', dest='dataset', type=str,
                        help='학습 데이터셋 경로 (JSONL)')
     parser.add_argument('--output', type=str, default='cheese_cat_lora',
                        help='출력 디렉토리')
+    parser.add_argument('--timestamp-output', action='store_true',
+                       help='출력 디렉토리 아래 cattalk2d_lora_<시각> 폴더를 만들어 저장')
+    parser.add_argument('--token-cache', type=str,
+                       help='사전 토큰화 캐시 디렉토리 (예: ./token_cache) — 지정 시 토큰화 결과를 재사용')
+    parser.add_argument('--batching', choices=BATCHING_MODES, default='pad',
+                       help='배치 방식: pad(기본) / bucket(길이별 묶음) / pack(샘플 이어 붙이기, 토큰 캐시 사용, peft 백엔드 전용)')
+    parser.add_argument('--pack-attention', choices=['mask', 'position_ids'], default='mask',
+                       help='패킹 시 샘플 경계 처리: mask(4D 블록 마스크) / position_ids(flash_attention_2로 모델 로드, CUDA + flash-attn 필요)')
+    parser.add_argument('--assistant-only', action='store_true',
+                       help='assistant 응답에만 loss 적용 (시스템 프롬프트/[CONTROL]/사용자 대사 제외)')
+    parser.add_argument('--require-meta', action='store_true',
+                       help='meta 필드(ageLevel/moodTag/affectionTier 등)가 없는 샘플을 잘못된 줄로 처리')
 
     # 모델 설정
+    parser.add_argument('--backend', choices=BACKEND_NAMES, default='auto',
+                       help='학습 백엔드: auto(CUDA+unsloth면 unsloth, 아니면 peft) / unsloth / peft')
+    parser.add_argument('--template', choices=['auto', *TEMPLATES], default='auto',
+                       help='채팅 템플릿: auto(기본 모델 이름으로 추정) / gemma / llama3')
     parser.add_argument('--base-model', type=str, default='unsloth/llama-3-8b-Instruct',
                        help='기본 모델 (HuggingFace 경로)')
     parser.add_argument('--max-seq-length', type=int, default=2048,
                        help='최대 시퀀스 길이')
+    parser.add_argument('--load-in-4bit', '--use-4bit', dest='load_in_4bit',
+                       action=argparse.BooleanOptionalAction, default=None,
+                       help='4-bit 로드 (기본: unsloth는 사용, peft는 CUDA + bitsandbytes가 있을 때 사용)')
 
     # LoRA 설정
     parser.add_argument('--lora-r', type=int, default=16,
                        help='LoRA rank')
     parser.add_argument('--lora-alpha', type=int, default=16,
                        help='LoRA alpha')
+    parser.add_argument('--lora-dropout', type=float, default=0.0,
+                       help='LoRA dropout')
 
     # 학습 설정
     parser.add_argument('--batch-size', type=int, default=2,
@@ -200,36 +419,194 @@ def main():
     parser.add_argument('--gradient-accumulation', type=int, default=4,
                        help='Gradient accumulation steps')
     parser.add_argument('--max-steps', type=int, default=100,
-                       help='최대 학습 스텝')
+                       help='최대 학습 스텝 (--epochs를 지정하면 무시)')
+    parser.add_argument('--epochs', type=float,
+                       help='학습 에폭 수 (지정 시 --max-steps 대신 사용)')
     parser.add_argument('--warmup-steps', type=int, default=10,
                        help='Warmup 스텝')
-    parser.add_argument('--learning-rate', type=float, default=2e-4,
+    parser.add_argument('--learning-rate', '--lr', dest='learning_rate', type=float, default=2e-4,
                        help='학습률')
+    parser.add_argument('--lr-scheduler', type=str, default='linear',
+                       help='학습률 스케줄러 (linear / cosine 등)')
+    parser.add_argument('--logging-steps', type=int, default=10,
+                       help='로그 출력 주기 (스텝)')
+    parser.add_argument('--save-steps', type=int, default=50,
+                       help='체크포인트 저장 주기 (스텝)')
+    parser.add_argument('--save-total-limit', type=int, default=2,
+                       help='유지할 체크포인트 수')
+    parser.add_argument('--async-checkpoint', action=argparse.BooleanOptionalAction, default=True,
+                       help='체크포인트(어댑터+옵티마이저)를 백그라운드 스레드에서 저장 (--no-async-checkpoint: Trainer 기본 저장)')
+    parser.add_argument('--resume', nargs='?', const='latest',
+                       help='이어서 학습: 값 없이 쓰면 출력 디렉토리의 가장 최근 유효한 체크포인트, 또는 체크포인트 경로')
+    parser.add_argument('--seed', type=int, default=42,
+                       help='랜덤 시드')
+
+    # 내보내기
+    parser.add_argument('--gguf', action=argparse.BooleanOptionalAction, default=False,
+                       help='학습 후 어댑터 병합 → GGUF 변환/양자화 → Ollama Modelfile (export_gguf.py), '
+                            'llama.cpp가 없으면 학습 전에 종료')
+    parser.add_argument('--gguf-quants', type=str, default=','.join(DEFAULT_QUANTS),
+                       help='GGUF 양자화 목록 (쉼표 구분, 병렬 생성)')
+    parser.add_argument('--llama-cpp', type=str,
+                       help='llama.cpp 디렉토리 (기본: 환경변수 LLAMA_CPP_PATH)')
+    parser.add_argument('--sampling-options', type=str, default=SAMPLING_OPTIONS_PATH,
+                       help='벤치마크와 공유하는 샘플링 옵션 JSON (Modelfile PARAMETER로 기록)')
+
+    # CPU / 스모크
+    parser.add_argument('--cpu', action='store_true',
+                       help='GPU가 있어도 CPU로 학습')
+    parser.add_argument('--threads', type=int,
+                       help='CPU 스레드 수 (torch/OpenMP/MKL/tokenizers)')
+    parser.add_argument('--smoke', action='store_true',
+                       help='초소형 무작위 모델로 CPU에서 파이프라인 전체를 5스텝 실행 (네트워크 불필요)')
+    parser.add_argument('--smoke-model', type=str, default='smoke_model',
+                       help='스모크 모델 디렉토리 (템플릿별 하위 디렉토리, 없거나 설정이 다르면 데이터셋으로 토크나이저를 학습해 생성)')
 
     # 기타
     parser.add_argument('--check-deps', action='store_true',
                        help='의존성만 확인')
     parser.add_argument('--test', type=str,
                        help='학습 후 테스트할 프롬프트')
+    return parser
+
 
-    args = parser.parse_args()
+def main(argv=None, defaults=None):
+    """
+    defaults: 파서 기본값 덮어쓰기 (LoraData 진입점이 기존 기본값을 유지하는 데 사용)
+    """
+    parser = build_parser()
+    if defaults:
+        parser.set_defaults(**defaults)
+    args = parser.parse_args(argv)
 
+    if args.threads:
+        # torch를 불러오기 전에 설정해야 OpenMP 스레드 풀에 반영됨
+        set_threads(args.threads)
     if args.check_deps:
-        check_dependencies()
-        return
+        check_dependencies(args.backend, args.cpu)
+        return 0
+    if not args.dataset:
+        parser.error('--dataset이 필요합니다')
+    if args.smoke:
+        apply_smoke_defaults(args, parser)
 
-    if not check_dependencies():
-        print("\n의존성 설치 후 다시 실행하세요.")
-        return
+    if args.batching == 'pack' and not args.token_cache:
+        # 패킹은 토큰 단위로 샘플을 이어 붙이므로 사전 토큰화 캐시가 필요
+        args.token_cache = 'token_cache'
 
-    model, tokenizer = train(args)
+    try:
+        template = resolve_template(args)
+    except ValueError as e:
+        parser.error(str(e))
+
+    gguf_skipped = False
+    if args.gguf:
+        # 학습 전에 확인해서 경로가 잘못됐으면 바로 실패 (학습이 끝난 뒤 내보내기에서 멈추지 않게)
+        # gguf='auto'(LoraData 진입점 기본값)면 실패 대신 경고하고 내보내기만 건너뜀
+        try:
+            find_llama_cpp(args.llama_cpp)
+            load_sampling_options(args.sampling_options)
+        except (ExportError, OSError, ValueError) as e:
+            print(f"\nGGUF 내보내기 준비 실패: {e}")
+            if args.gguf != 'auto':
+                print("내보내기 없이 학습하려면 --no-gguf")
+                return 1
+            print("경고: GGUF 내보내기를 건너뛰고 학습만 진행합니다 (학습 후 export_gguf.py로 내보낼 수 있음)")
+            args.gguf = False
+            gguf_skipped = True
+
+    hw, backend = check_dependencies(args.backend, args.cpu)
+    if backend is None:
+        print("\n의존성 설치 후 다시 실행하세요.")
+        return 1
+    if args.batching == 'pack' and backend.name != 'peft':
+        # unsloth는 학습 중 4D 블록 마스크를 자체 어텐션 커널로 바꿔 버려 샘플 간 어텐션이 새어 나감
+        print(f"\n--batching pack은 peft 백엔드에서만 지원합니다 (현재: {backend.name})")
+        print("--backend peft를 지정하거나 --batching pad/bucket을 사용하세요")
+        return 1
+    if args.batching == 'pack' and args.pack_attention == 'position_ids' and not flash_attention_available(hw):
+        print("\n--pack-attention position_ids는 flash_attention_2가 필요합니다 (CUDA + pip install flash-attn)")
+        print("다른 어텐션은 position_ids만으로 샘플 간 어텐션을 막지 못하므로 --pack-attention mask를 사용하세요")
+        return 1
+    if args.load_in_4bit is None:
+        args.load_in_4bit = backend.default_4bit(hw)
+    if not hw.cuda and not args.smoke:
+        print("경고: CUDA 없이 CPU로 학습합니다 (실제 모델은 매우 느림, 파이프라인 확인은 --smoke)")
+
+    output_dir = args.output
+    if args.timestamp_output:
+        output_dir = os.path.join(args.output, f"cattalk2d_lora_{datetime.now().strftime('%Y%m%d_%H%M')}")
+        if args.resume == 'latest':
+            # 이어서 학습: 체크포인트가 있는 가장 최근 실행 디렉토리를 그대로 사용
+            output_dir = find_latest_run(args.output) or output_dir
+
+    resume_from = None
+    if args.resume:
+        resume_from = find_latest_checkpoint(output_dir) if args.resume == 'latest' else args.resume
+        if resume_from is None:
+            print(f"\n이어서 학습할 체크포인트가 없습니다 ({output_dir}) — 처음부터 학습합니다")
+        else:
+            print(f"\n이어서 학습: {resume_from}")
+            for diff in check_resume_config(resume_from, {key: getattr(args, key) for key in RESUME_KEYS}):
+                print(f"  경고: 설정이 바뀌어 데이터 위치가 어긋날 수 있습니다 ({diff})")
+
+    timings = {}
+    if args.smoke:
+        print("\n=== 스모크 모델 준비 ===")
+        with stage(timings, "prepare_smoke_model"):
+            args.base_model = prepare_smoke_model(args.dataset, template.name, args.smoke_model,
+                                                  args.max_seq_length, args.seed)
+
+    model, tokenizer, lora_path = train(args, hw, backend, template, output_dir, timings, resume_from)
+    if lora_path is None:
+        # 선점 유예 시간 안에 끝나도록 테스트/GGUF 내보내기 없이 바로 종료
+        return 1
+
+    if backend.name == 'peft':
+        write_inference_script(output_dir, args.base_model, lora_path, template)
 
     if args.test:
         print("\n=== 모델 테스트 ===")
-        response = test_model(model, tokenizer, args.test)
+        with stage(timings, "generate"):
+            response = test_model(backend, model, tokenizer, template, args.test)
         print(f"프롬프트: {args.test}")
         print(f"응답: {response}")
 
+    exit_code = 0
+    if args.gguf:
+        print("\n=== GGUF 내보내기 (Ollama용) ===")
+        # 병합은 기본 모델을 원본 정밀도로 다시 불러오므로 학습 모델 메모리부터 해제
+        del model
+        release_memory()
+        try:
+            with stage(timings, "export_gguf"):
+                run_export(lora_path, os.path.join(output_dir, "gguf"), args.gguf_quants.split(','),
+                           llama_cpp=args.llama_cpp, sampling_options_path=args.sampling_options, bench=False,
+                           force=True)   # 방금 학습한 어댑터이므로 이전 병합/f16 결과는 항상 다시 생성
+        except ExportError as e:
+            print(f"\nGGUF 내보내기 실패: {e}")
+            print(f"어댑터는 저장되어 있습니다. 원인을 해결한 뒤 다시 실행: python export_gguf.py {lora_path}")
+            exit_code = 1
+    elif gguf_skipped:
+        print(f"\nGGUF 내보내기를 건너뛰었습니다. llama.cpp 준비 후 실행: python export_gguf.py {lora_path}")
+
+    # 실행 환경 + 단계별 소요 시간 (스모크 실행끼리 비교해 회귀 확인)
+    report = {
+        "backend": backend.name,
+        "template": template.name,
+        "base_model": args.base_model,
+        "device": "cuda" if hw.cuda else "cpu",
+        "precision": hw.precision,
+        "threads": args.threads,
+        "smoke": args.smoke,
+        "resumed_from": resume_from,
+        "stage_seconds": timings,
+    }
+    with open(os.path.join(output_dir, "run_report.json"), "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print("\n단계별 시간: " + ", ".join(f"{k} {v:.2f}s" for k, v in timings.items()))
+    return exit_code
+
 
 if __name__ == '__main__':
-    main()
+    sys.exit(main())